@@ -0,0 +1,489 @@
+"""
+A vectorized game engine that plays many games in lockstep.
+
+BatchGameState holds N games as NumPy arrays and the functions in this module apply the rules of camelup.py to all
+games at once. Every turn, the active player of all running games (all games start together, so it is the same player
+everywhere) decides on an action for each game through a BatchPlayerInterface bot. Finished games are skipped.
+
+Actions are passed as an integer array of shape (N, 3) with one row per game, mirroring the tuples of
+PlayerInterface.move() with camels and bet types replaced by integers:
+    - (MOVE_CAMEL_ACTION_ID, 0, 0)
+    - (MOVE_TRAP_ACTION_ID, trap_type, trap_location)
+    - (ROUND_BET_ACTION_ID, camel_index, 0)
+    - (GAME_BET_ACTION_ID, bet_type, camel_index)      bet_type is WIN_BET (0) or LOSE_BET (1)
+Rows of finished games are ignored.
+
+Bets are stored per camel in the order in which they were placed, which is all the settlement logic needs. Converting
+a game to a GameState therefore lists bets grouped by camel.
+"""
+import copy
+import numpy as np
+import camelup
+from playerinterface import BatchPlayerInterface
+from actionids import GAME_BET_ACTION_ID, ROUND_BET_ACTION_ID, MOVE_TRAP_ACTION_ID, MOVE_CAMEL_ACTION_ID
+
+WIN_BET = 0
+LOSE_BET = 1
+BET_TYPES = ("win", "lose")
+
+
+class BatchGameState:
+    """
+    The state of N games. Game constants are the same for all games and have the same names as in GameState.
+
+    Per-game arrays (N = number of games, C = number of camels, P = number of players, K = number of round bet cards
+    per camel, T = 2 * BOARD_SIZE):
+        - camel_positions (N, C): board location of each camel
+        - camel_heights (N, C): stack location of each camel, 0 is the bottom of a stack
+        - camel_yet_to_move (N, C)
+        - trap_locations (N, P) and trap_types (N, P): trap of each player, location -1 if it hasn't been placed
+        - trap_board_types (N, T) and trap_board_owners (N, T): the same traps indexed by board location, 0 and -1
+          for empty fields
+        - round_bet_owners (N, C, K) and round_bet_counts (N, C): players who bet on each camel this round, -1 for
+          cards that are still available
+        - game_winner_bet_owners (N, C, P), game_winner_bet_counts (N, C) and the same for game loser bets
+        - player_game_bets (N, P, C): whether a player has made a game bet on a camel
+        - player_money_values (N, P)
+        - active_game (N,), num_turns (N,) and game_winner (N, P), a mask of the players with the most money
+    """
+
+    def __init__(self, num_games, num_camels=5, num_players=4, board_size=16,
+                 move_range=(1, 3),
+                 first_place_round_payout=(5, 3, 2),
+                 second_place_round_payout=(1, 1, 1),
+                 third_or_worse_place_round_payout=-1,
+                 game_end_payout=(8, 5, 3),
+                 bad_game_end_bet=-1,
+                 rng=None):
+        if not len(first_place_round_payout) == len(second_place_round_payout):
+            raise ValueError("Round payouts must all have the same length")
+
+        self.NUM_GAMES = num_games
+        self.NUM_CAMELS = num_camels
+        self.CAMELS = ["c_" + str(i) for i in range(num_camels)]
+        self.NUM_PLAYERS = num_players
+        self.BOARD_SIZE = board_size
+        self.MOVE_RANGE = move_range
+        self.FIRST_PLACE_ROUND_PAYOUT = np.array(first_place_round_payout)
+        self.SECOND_PLACE_ROUND_PAYOUT = np.array(second_place_round_payout)
+        self.THIRD_OR_WORSE_PLACE_ROUND_PAYOUT = third_or_worse_place_round_payout
+        self.GAME_END_PAYOUT = np.array([
+            game_end_payout[i] if i < len(game_end_payout) else 1 for i in range(num_players)])
+        self.BAD_GAME_END_BET = bad_game_end_bet
+
+        self.rng = np.random.default_rng() if rng is None else rng
+
+        n, c, p, k, t = num_games, num_camels, num_players, len(first_place_round_payout), board_size * 2
+        self.camel_positions = np.zeros((n, c), dtype=np.int16)
+        self.camel_heights = np.zeros((n, c), dtype=np.int8)
+        self.camel_yet_to_move = np.ones((n, c), dtype=bool)
+        self.trap_locations = np.full((n, p), -1, dtype=np.int16)
+        self.trap_types = np.zeros((n, p), dtype=np.int8)
+        self.trap_board_types = np.zeros((n, t), dtype=np.int8)
+        self.trap_board_owners = np.full((n, t), -1, dtype=np.int8)
+        self.round_bet_owners = np.full((n, c, k), -1, dtype=np.int8)
+        self.round_bet_counts = np.zeros((n, c), dtype=np.int8)
+        self.game_winner_bet_owners = np.full((n, c, p), -1, dtype=np.int8)
+        self.game_winner_bet_counts = np.zeros((n, c), dtype=np.int8)
+        self.game_loser_bet_owners = np.full((n, c, p), -1, dtype=np.int8)
+        self.game_loser_bet_counts = np.zeros((n, c), dtype=np.int8)
+        self.player_game_bets = np.zeros((n, p, c), dtype=bool)
+        self.player_money_values = np.full((n, p), 2, dtype=np.int32)
+        self.active_game = np.ones(n, dtype=bool)
+        self.num_turns = np.zeros(n, dtype=np.int32)
+        self.game_winner = np.zeros((n, p), dtype=bool)
+
+        # Initialize camels in random position. Like in GameState, camels are placed one after the other in random
+        # order and stack on top of the camels that were placed before them.
+        order = np.argsort(self.rng.random((n, c)), axis=1)
+        distances = self.rng.integers(move_range[0], move_range[1] + 1, size=(n, c)) - 1
+        games = np.arange(n)
+        stack_heights = np.zeros((n, t), dtype=np.int8)
+        for i in range(c):
+            self.camel_positions[games, order[:, i]] = distances[:, i]
+            self.camel_heights[games, order[:, i]] = stack_heights[games, distances[:, i]]
+            stack_heights[games, distances[:, i]] += 1
+
+    @classmethod
+    def from_game_states(cls, game_states, rng=None):
+        """
+        Create a batch from GameState objects that share the same game constants.
+        :param game_states: List of GameState objects.
+        :param rng: numpy.random.Generator used by the batch.
+        :return:
+        """
+        g0 = game_states[0]
+        b = cls(
+            len(game_states), num_camels=g0.NUM_CAMELS, num_players=g0.NUM_PLAYERS, board_size=g0.BOARD_SIZE,
+            move_range=g0.MOVE_RANGE, first_place_round_payout=g0.FIRST_PLACE_ROUND_PAYOUT,
+            second_place_round_payout=g0.SECOND_PLACE_ROUND_PAYOUT,
+            third_or_worse_place_round_payout=g0.THIRD_OR_WORSE_PLACE_ROUND_PAYOUT,
+            game_end_payout=g0.GAME_END_PAYOUT, bad_game_end_bet=g0.BAD_GAME_END_BET, rng=rng)
+        camel_indices = {camel: i for i, camel in enumerate(g0.CAMELS)}
+        for i, g in enumerate(game_states):
+            for camel_index in range(g.NUM_CAMELS):
+                b.camel_positions[i, camel_index], b.camel_heights[i, camel_index] = g.camel_location(camel_index)
+            b.camel_yet_to_move[i] = g.camel_yet_to_move
+            for trap_location, entry in enumerate(g.trap_track):
+                if len(entry) > 0:
+                    _place_traps(b, np.array([i]), entry[1], np.array([entry[0]]), np.array([trap_location]))
+            for camel, player in g.round_bets:
+                camel_index = camel_indices[camel]
+                b.round_bet_owners[i, camel_index, b.round_bet_counts[i, camel_index]] = player
+                b.round_bet_counts[i, camel_index] += 1
+            for owners, counts, bets in (
+                    (b.game_winner_bet_owners, b.game_winner_bet_counts, g.game_winner_bets),
+                    (b.game_loser_bet_owners, b.game_loser_bet_counts, g.game_loser_bets)):
+                for camel, player in bets:
+                    camel_index = camel_indices[camel]
+                    owners[i, camel_index, counts[i, camel_index]] = player
+                    counts[i, camel_index] += 1
+                    b.player_game_bets[i, player, camel_index] = True
+            b.player_money_values[i] = g.player_money_values
+            b.active_game[i] = g.active_game
+            b.game_winner[i, g.game_winner] = True
+        return b
+
+    def to_game_state(self, i):
+        """
+        Convert a single game into a GameState. Bets are listed grouped by camel.
+        :param i: Index of the game in the batch.
+        :return:
+        """
+        g = object.__new__(camelup.GameState)
+        g.NUM_CAMELS = self.NUM_CAMELS
+        g.CAMELS = list(self.CAMELS)
+        g.NUM_PLAYERS = self.NUM_PLAYERS
+        g.BOARD_SIZE = self.BOARD_SIZE
+        g.MOVE_RANGE = self.MOVE_RANGE
+        g.FIRST_PLACE_ROUND_PAYOUT = tuple(self.FIRST_PLACE_ROUND_PAYOUT.tolist())
+        g.SECOND_PLACE_ROUND_PAYOUT = tuple(self.SECOND_PLACE_ROUND_PAYOUT.tolist())
+        g.THIRD_OR_WORSE_PLACE_ROUND_PAYOUT = self.THIRD_OR_WORSE_PLACE_ROUND_PAYOUT
+        g.GAME_END_PAYOUT = tuple(self.GAME_END_PAYOUT.tolist())
+        g.BAD_GAME_END_BET = self.BAD_GAME_END_BET
+        g.verbose = False
+
+        camel_track = [[None] * int(height) for height in np.bincount(
+            self.camel_positions[i], minlength=self.BOARD_SIZE * 2)]
+        for camel_index, camel in enumerate(self.CAMELS):
+            camel_track[self.camel_positions[i, camel_index]][self.camel_heights[i, camel_index]] = camel
+        g.camel_track = camel_track
+        g.trap_track = [[] for _ in range(self.BOARD_SIZE * 2)]
+        for player in range(self.NUM_PLAYERS):
+            if self.trap_locations[i, player] >= 0:
+                g.trap_track[self.trap_locations[i, player]] = [int(self.trap_types[i, player]), player]
+        g.round_bets = [
+            [camel, int(player)] for camel_index, camel in enumerate(self.CAMELS)
+            for player in self.round_bet_owners[i, camel_index, :self.round_bet_counts[i, camel_index]]]
+        g.game_winner_bets = [
+            [camel, int(player)] for camel_index, camel in enumerate(self.CAMELS)
+            for player in self.game_winner_bet_owners[i, camel_index, :self.game_winner_bet_counts[i, camel_index]]]
+        g.game_loser_bets = [
+            [camel, int(player)] for camel_index, camel in enumerate(self.CAMELS)
+            for player in self.game_loser_bet_owners[i, camel_index, :self.game_loser_bet_counts[i, camel_index]]]
+        g.player_money_values = self.player_money_values[i].tolist()
+        g.camel_yet_to_move = self.camel_yet_to_move[i].tolist()
+        g.active_game = bool(self.active_game[i])
+        g.game_winner = np.flatnonzero(self.game_winner[i]).tolist()
+        g.valid_moves_cache = None
+        g.rng = None
+        g.event_bus = None
+        g.position_hash = None
+        return g
+
+    def copy(self):
+        return copy.deepcopy(self)
+
+
+def find_camel_ranking(b, games):
+    """
+    Rank the camels of the given games.
+    :param b: BatchGameState object.
+    :param games: Integer array of game indices.
+    :return: Integer array of shape (len(games), NUM_CAMELS) with camel indices ordered from first to last place.
+    """
+    key = b.camel_positions[games].astype(np.int32) * b.NUM_CAMELS + b.camel_heights[games]
+    return np.argsort(-key, axis=1)
+
+
+def get_valid_move_masks(b, player):
+    """
+    The vectorized rules engine, see camelup.get_valid_moves(). Moving a camel is always valid.
+    :param b: BatchGameState object.
+    :param player: Player ID integer.
+    :return: Tuple of boolean arrays
+        - trap_mask (N, BOARD_SIZE): locations where the player may place a trap (of either type),
+        - round_bet_mask (N, NUM_CAMELS): camels with round bet cards left,
+        - game_bet_mask (N, NUM_CAMELS): camels the player hasn't made a game bet on (for either bet type).
+    """
+    n = b.NUM_GAMES
+    occupied = np.zeros((n, b.BOARD_SIZE * 2), dtype=bool)
+    occupied[np.arange(n)[:, None], b.camel_positions] = True
+    any_trap = b.trap_board_owners >= 0
+    other_trap = any_trap & (b.trap_board_owners != player)
+
+    trap_mask = np.zeros((n, b.BOARD_SIZE), dtype=bool)
+    trap_mask[:, 1:] = (
+        ~occupied[:, 1:b.BOARD_SIZE] & ~any_trap[:, 1:b.BOARD_SIZE] &
+        ~other_trap[:, 0:b.BOARD_SIZE - 1] & ~other_trap[:, 2:b.BOARD_SIZE + 1])
+    round_bet_mask = b.round_bet_counts < len(b.FIRST_PLACE_ROUND_PAYOUT)
+    game_bet_mask = ~b.player_game_bets[:, player, :]
+    return trap_mask, round_bet_mask, game_bet_mask
+
+
+def apply_actions(b, player, actions, camels=None, rolls=None):
+    """
+    Perform one action for every active game and check that it is valid.
+    :param b: BatchGameState object.
+    :param player: Player ID integer of the active player.
+    :param actions: Integer array of shape (N, 3), see the module documentation.
+    :param camels: Optional integer array (N,) to force which camel moves in games with MOVE_CAMEL_ACTION_ID.
+    :param rolls: Optional integer array (N,) to force the dice rolls in games with MOVE_CAMEL_ACTION_ID.
+    :return:
+    """
+    actions = np.asarray(actions)
+    active = b.active_game.copy()
+    action_ids = actions[:, 0]
+    known_actions = (MOVE_CAMEL_ACTION_ID, MOVE_TRAP_ACTION_ID, ROUND_BET_ACTION_ID, GAME_BET_ACTION_ID)
+    if not np.isin(action_ids[active], known_actions).all():
+        raise camelup.IllegalMoveException("Player {} made an illegal move".format(player))
+    trap_mask, round_bet_mask, game_bet_mask = get_valid_move_masks(b, player)
+
+    games = np.flatnonzero(active & (action_ids == MOVE_TRAP_ACTION_ID))
+    trap_types, trap_locations = actions[games, 1], actions[games, 2]
+    if not (np.isin(trap_types, (1, -1)).all() and ((trap_locations >= 0) & (trap_locations < b.BOARD_SIZE)).all()
+            and trap_mask[games, trap_locations].all()):
+        raise camelup.IllegalMoveException("Player {} made an illegal trap move".format(player))
+    move_traps(b, player, games, trap_types, trap_locations)
+
+    games = np.flatnonzero(active & (action_ids == ROUND_BET_ACTION_ID))
+    bet_camels = actions[games, 1]
+    if not (((bet_camels >= 0) & (bet_camels < b.NUM_CAMELS)).all() and round_bet_mask[games, bet_camels].all()):
+        raise camelup.IllegalMoveException("Player {} made an illegal round bet".format(player))
+    place_round_winner_bets(b, player, games, bet_camels)
+
+    games = np.flatnonzero(active & (action_ids == GAME_BET_ACTION_ID))
+    bet_types, bet_camels = actions[games, 1], actions[games, 2]
+    if not (np.isin(bet_types, (WIN_BET, LOSE_BET)).all() and
+            ((bet_camels >= 0) & (bet_camels < b.NUM_CAMELS)).all() and game_bet_mask[games, bet_camels].all()):
+        raise camelup.IllegalMoveException("Player {} made an illegal game bet".format(player))
+    place_game_bets(b, player, games, bet_types, bet_camels)
+
+    games = np.flatnonzero(active & (action_ids == MOVE_CAMEL_ACTION_ID))
+    move_camels(
+        b, player, games,
+        camels=None if camels is None else np.asarray(camels)[games],
+        rolls=None if rolls is None else np.asarray(rolls)[games])
+
+    b.num_turns[active] += 1
+
+
+def move_camels(b, player, games, camels=None, rolls=None):
+    """
+    Move a camel in each of the given games, see camelup.move_camel(). Triggers end-of-round and end-of-game logic.
+    :param b: BatchGameState object.
+    :param player: Player ID integer.
+    :param games: Integer array of game indices.
+    :param camels: Integer array of camel indices to move. If None, a random camel that hasn't moved yet is selected.
+    :param rolls: Integer array of dice rolls. If None, the dice are rolled.
+    :return:
+    """
+    if len(games) == 0:
+        return
+    m = len(games)
+    if camels is None:
+        camels = _random_choice(b.rng, b.camel_yet_to_move[games])
+    if rolls is None:
+        rolls = b.rng.integers(b.MOVE_RANGE[0], b.MOVE_RANGE[1] + 1, size=m)
+
+    b.camel_yet_to_move[games, camels] = False
+
+    # Traps on the landing field pay their owner and change the distance
+    landing = b.camel_positions[games, camels] + rolls
+    trap_types = b.trap_board_types[games, landing]
+    hit = trap_types != 0
+    np.add.at(b.player_money_values, (games[hit], b.trap_board_owners[games[hit], landing[hit]]), 1)
+
+    b.camel_positions[games], b.camel_heights[games] = move_stacks(
+        b.camel_positions[games], b.camel_heights[games], camels, landing + trap_types, trap_types == -1)
+
+    # Give the rolling player a coin
+    b.player_money_values[games, player] += 1
+
+    finished = (b.camel_positions[games] >= b.BOARD_SIZE).any(axis=1)
+    end_of_round(b, games[~b.camel_yet_to_move[games].any(axis=1) | finished])
+    end_of_game(b, games[finished])
+
+
+def move_stacks(positions, heights, camels, new_pos, from_bottom):
+    """
+    Move a camel and the camels on top of it in each row of the camel location arrays, see
+    GameState.move_camel_stack().
+    :param positions: Integer array (M, NUM_CAMELS) of board locations.
+    :param heights: Integer array (M, NUM_CAMELS) of stack locations.
+    :param camels: Integer array (M,) of the camel indices to move.
+    :param new_pos: Integer array (M,) of the target board locations.
+    :param from_bottom: Boolean array (M,), whether the moving camels are put underneath the camels on the target
+        field, i.e. whether the camel hit a -1 trap.
+    :return: Tuple (positions, heights) of new arrays.
+    """
+    rows = np.arange(len(camels))
+    curr_pos = positions[rows, camels]
+    curr_height = heights[rows, camels]
+    moving = (positions == curr_pos[:, None]) & (heights >= curr_height[:, None])
+    num_moving = moving.sum(axis=1)
+    waiting = (positions == new_pos[:, None]) & ~moving
+    from_bottom = from_bottom[:, None]
+    moved_heights = heights - curr_height[:, None] + np.where(from_bottom, 0, waiting.sum(axis=1)[:, None])
+    lifted_heights = heights + np.where(from_bottom & waiting, num_moving[:, None], 0)
+    return np.where(moving, new_pos[:, None], positions), np.where(moving, moved_heights, lifted_heights)
+
+
+def move_traps(b, player, games, trap_types, trap_locations):
+    """
+    Place or move the player's trap in each of the given games, see camelup.move_trap(). Does not check validity.
+    :param b: BatchGameState object.
+    :param player: Player ID integer.
+    :param games: Integer array of game indices.
+    :param trap_types: Integer array of trap types (1, -1).
+    :param trap_locations: Integer array of board locations.
+    :return:
+    """
+    old_locations = b.trap_locations[games, player]
+    placed = old_locations >= 0
+    b.trap_board_types[games[placed], old_locations[placed]] = 0
+    b.trap_board_owners[games[placed], old_locations[placed]] = -1
+    _place_traps(b, games, player, trap_types, trap_locations)
+
+
+def _place_traps(b, games, player, trap_types, trap_locations):
+    b.trap_locations[games, player] = trap_locations
+    b.trap_types[games, player] = trap_types
+    b.trap_board_types[games, trap_locations] = trap_types
+    b.trap_board_owners[games, trap_locations] = player
+
+
+def place_round_winner_bets(b, player, games, camels):
+    """
+    Place a round winner bet in each of the given games, see camelup.place_round_winner_bet(). Does not check
+    validity.
+    :param b: BatchGameState object.
+    :param player: Player ID integer.
+    :param games: Integer array of game indices.
+    :param camels: Integer array of camel indices.
+    :return:
+    """
+    b.round_bet_owners[games, camels, b.round_bet_counts[games, camels]] = player
+    b.round_bet_counts[games, camels] += 1
+
+
+def place_game_bets(b, player, games, bet_types, camels):
+    """
+    Place a game winner or loser bet in each of the given games, see camelup.place_game_bet(). Does not check
+    validity.
+    :param b: BatchGameState object.
+    :param player: Player ID integer.
+    :param games: Integer array of game indices.
+    :param bet_types: Integer array of bet types (WIN_BET, LOSE_BET).
+    :param camels: Integer array of camel indices.
+    :return:
+    """
+    for bet_type, owners, counts in (
+            (WIN_BET, b.game_winner_bet_owners, b.game_winner_bet_counts),
+            (LOSE_BET, b.game_loser_bet_owners, b.game_loser_bet_counts)):
+        selected = bet_types == bet_type
+        bet_games, bet_camels = games[selected], camels[selected]
+        owners[bet_games, bet_camels, counts[bet_games, bet_camels]] = player
+        counts[bet_games, bet_camels] += 1
+    b.player_game_bets[games, player, camels] = True
+
+
+def end_of_round(b, games):
+    """
+    Trigger end-of-round logic in the given games, see camelup.end_of_round().
+    :param b: BatchGameState object.
+    :param games: Integer array of game indices.
+    :return:
+    """
+    if len(games) == 0:
+        return
+    rows = np.arange(len(games))
+    ranking = find_camel_ranking(b, games)
+
+    payouts = np.full(b.round_bet_owners[games].shape, b.THIRD_OR_WORSE_PLACE_ROUND_PAYOUT, dtype=np.int32)
+    payouts[rows, ranking[:, 0]] = b.FIRST_PLACE_ROUND_PAYOUT
+    payouts[rows, ranking[:, 1]] = b.SECOND_PLACE_ROUND_PAYOUT
+    _pay_bets(b, games, b.round_bet_owners[games], payouts)
+
+    # Prepare the games for the beginning of the next round
+    b.camel_yet_to_move[games] = True
+    b.round_bet_owners[games] = -1
+    b.round_bet_counts[games] = 0
+
+
+def end_of_game(b, games):
+    """
+    Trigger end-of-game logic in the given games, see camelup.end_of_game(). Like there, the end-of-round logic of
+    the final round must be triggered separately.
+    :param b: BatchGameState object.
+    :param games: Integer array of game indices.
+    :return:
+    """
+    if len(games) == 0:
+        return
+    rows = np.arange(len(games))
+    ranking = find_camel_ranking(b, games)
+
+    for owners, camels in ((b.game_winner_bet_owners, ranking[:, 0]), (b.game_loser_bet_owners, ranking[:, -1])):
+        payouts = np.full(owners[games].shape, b.BAD_GAME_END_BET, dtype=np.int32)
+        payouts[rows, camels] = b.GAME_END_PAYOUT
+        _pay_bets(b, games, owners[games], payouts)
+
+    b.active_game[games] = False
+    money = b.player_money_values[games]
+    b.game_winner[games] = money == money.max(axis=1, keepdims=True)
+
+
+def _pay_bets(b, games, owners, payouts):
+    """
+    Add payouts to the money of the players who own the corresponding bets.
+    :param b: BatchGameState object.
+    :param games: Integer array of game indices.
+    :param owners: Integer array (len(games), ...) of bet owners, -1 for no bet.
+    :param payouts: Integer array of the same shape as owners.
+    :return:
+    """
+    placed = owners >= 0
+    bet_games = np.broadcast_to(games.reshape((-1,) + (1,) * (owners.ndim - 1)), owners.shape)
+    np.add.at(b.player_money_values, (bet_games[placed], owners[placed]), payouts[placed])
+
+
+def _random_choice(rng, mask):
+    """
+    Select a random True entry in each row of a boolean mask.
+    :param rng: numpy.random.Generator object.
+    :param mask: Boolean array of shape (M, K) with at least one True entry per row.
+    :return: Integer array (M,) of column indices.
+    """
+    return np.argmax(np.where(mask, rng.random(mask.shape), -1.0), axis=1)
+
+
+def play_games(players, num_games, rng=None, **kwargs):
+    """
+    Play num_games games in lockstep until a camel wins in every game, see camelup.play_game().
+    :param players: A list of player classes that extend BatchPlayerInterface.
+    :param num_games: Integer number of games.
+    :param rng: numpy.random.Generator object, or None for a fresh generator.
+    :param kwargs: Further game parameters passed to BatchGameState.
+    :return: The final BatchGameState.
+    """
+    if not all([issubclass(player, BatchPlayerInterface) for player in players]):
+        raise ValueError("All players must extend BatchPlayerInterface")
+
+    b = BatchGameState(num_games, num_players=len(players), rng=rng, **kwargs)
+    turn = 0
+    while b.active_game.any():
+        active_player = turn % len(players)
+        apply_actions(b, active_player, players[active_player].move_batch(active_player, b))
+        turn += 1
+    return b
@@ -0,0 +1,291 @@
+"""
+Benchmarks of the game engine.
+
+Microbenchmarks time single calls of the engine functions on a game state in the middle of a game, for both game state
+representations. End-to-end benchmarks measure how many games per second RandomBot players play for different numbers
+of players and board sizes.
+
+Every run is appended as one line of JSON to a history file. A run can be compared against a baseline (any earlier run)
+to flag regressions:
+
+    python benchmark.py run --save-baseline baseline.json
+    ... change the engine ...
+    python benchmark.py run --baseline baseline.json
+    python benchmark.py compare baseline.json benchmark_history.jsonl
+"""
+import argparse
+import copy
+import datetime
+import functools
+import json
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import time
+import camelup
+import gametree
+import bots
+
+HISTORY_FILE = "benchmark_history.jsonl"
+STATE_CLASSES = (camelup.GameState, camelup.CompactGameState)
+PLAYER_COUNTS = (2, 4, 6, 8)
+BOARD_SIZES = (16, 32)
+
+
+def make_mid_game_state(state_class=camelup.GameState, num_turns=20, seed=0):
+    """
+    Play RandomBot moves to reach a typical game state with traps, bets and camels spread over the board. All camels
+    are marked as not having moved yet, so that any number of camel moves can follow.
+    :param state_class: The game state representation, i.e. GameState or CompactGameState.
+    :param num_turns: Number of moves to play.
+    :param seed: Seed of the random module.
+    :return: GameState object.
+    """
+    random.seed(seed)
+    while True:
+        g = state_class()
+        for turn in range(num_turns):
+            player = turn % g.NUM_PLAYERS
+            gametree.apply_move(g, player, bots.RandomBot.move(player, g.get_player_view(player)))
+            if not g.active_game:
+                break
+        if g.active_game:
+            g.camel_yet_to_move = [True] * g.NUM_CAMELS
+            return g
+
+
+def time_call(func, make_args, min_time=0.2, repeat=5):
+    """
+    Time a function call. The number of calls per measurement is increased until a measurement takes min_time.
+    :param func: The function to time.
+    :param make_args: Function returning the tuple of arguments of one call. It is called before the timer starts, so
+        that functions that modify their arguments can be given fresh ones for every call.
+    :param min_time: Minimum duration of a measurement in seconds.
+    :param repeat: Number of measurements.
+    :return: The best time per call in seconds.
+    """
+    def measure(number):
+        args = [make_args() for _ in range(number)]
+        start = time.perf_counter()
+        for a in args:
+            func(*a)
+        return time.perf_counter() - start
+
+    number = 1
+    while True:
+        elapsed = measure(number)
+        if elapsed >= min_time:
+            break
+        number *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+    return min([elapsed] + [measure(number) for _ in range(repeat - 1)]) / number
+
+
+def _same_args(*args):
+    return args
+
+
+def _copied_args(g, *args):
+    return (copy.deepcopy(g),) + args
+
+
+def get_microbenchmarks():
+    """
+    :return: Dictionary mapping benchmark names to tuples (func, make_args), see time_call().
+    """
+    benchmarks = {}
+    for state_class in STATE_CLASSES:
+        g = make_mid_game_state(state_class)
+        g_with_bets = make_mid_game_state(state_class)
+        g_with_bets.round_bets = [[camel, player % g.NUM_PLAYERS] for player, camel in enumerate(g.CAMELS)]
+
+        # Functions that modify the game state get a fresh copy for every call
+        suffix = "[{}]".format(state_class.__name__)
+        benchmarks["move_camel" + suffix] = (camelup.move_camel, functools.partial(_copied_args, g, 0))
+        benchmarks["get_valid_moves" + suffix] = (camelup.get_valid_moves, functools.partial(_same_args, g, 0))
+        benchmarks["get_player_copy" + suffix] = (state_class.get_player_copy, functools.partial(_same_args, g, 0))
+        benchmarks["summarize_game_state" + suffix] = (
+            camelup.summarize_game_state, functools.partial(_same_args, g))
+        benchmarks["find_camel_in_nth_place" + suffix] = (
+            camelup.find_camel_in_nth_place, functools.partial(_same_args, g, 3))
+        benchmarks["end_of_round" + suffix] = (camelup.end_of_round, functools.partial(_copied_args, g_with_bets))
+    return benchmarks
+
+
+def games_per_second(num_players, board_size, min_time=1.0, seed=0):
+    """
+    Play RandomBot games until min_time has passed.
+    :param num_players: Number of players.
+    :param board_size: Number of fields of the track.
+    :param min_time: Minimum duration in seconds.
+    :param seed: Seed of the random module.
+    :return: Number of games played per second.
+    """
+    random.seed(seed)
+    state_class = functools.partial(camelup.GameState, board_size=board_size)
+    players = [bots.RandomBot] * num_players
+    num_games = 0
+    start = time.perf_counter()
+    while num_games < 3 or time.perf_counter() - start < min_time:
+        camelup.play_game(players, state_class=state_class)
+        num_games += 1
+    return num_games / (time.perf_counter() - start)
+
+
+def run_benchmarks(name_filter=None, quick=False):
+    """
+    Run all benchmarks.
+    :param name_filter: Regular expression. If given, only benchmarks whose name matches it are run.
+    :param quick: If True, measure for a shorter time, which is less accurate.
+    :return: Dictionary mapping benchmark names to dictionaries with the keys value, unit and higher_is_better.
+    """
+    min_time = 0.02 if quick else 0.2
+    game_time = 0.2 if quick else 2.0
+    results = {}
+    for name, (func, make_args) in get_microbenchmarks().items():
+        if name_filter is None or re.search(name_filter, name):
+            results[name] = {
+                "value": time_call(func, make_args, min_time=min_time, repeat=3 if quick else 5),
+                "unit": "s", "higher_is_better": False}
+            print("{:<50} {:10.2f} us".format(name, results[name]["value"] * 1e6))
+    for num_players in PLAYER_COUNTS:
+        for board_size in BOARD_SIZES:
+            name = "play_game[players={},board_size={}]".format(num_players, board_size)
+            if name_filter is None or re.search(name_filter, name):
+                results[name] = {
+                    "value": games_per_second(num_players, board_size, min_time=game_time),
+                    "unit": "games/s", "higher_is_better": True}
+                print("{:<50} {:10.2f} games/s".format(name, results[name]["value"]))
+    return results
+
+
+def get_commit():
+    """
+    :return: The current git commit hash, or None if it cannot be determined.
+    """
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def make_record(results):
+    """
+    :param results: Return value of run_benchmarks().
+    :return: Dictionary with the results and a description of the environment they were measured in.
+    """
+    return {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": get_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results}
+
+
+def save_record(record, path):
+    """
+    Append a record as a line of JSON.
+    :param record: Return value of make_record().
+    :param path: Path of the history file.
+    :return:
+    """
+    with open(path, "a") as f:
+        f.write(json.dumps(record, sort_keys=True) + "\n")
+
+
+def load_record(path):
+    """
+    Load the last record of a history file.
+    :param path: Path of the history or baseline file.
+    :return: Dictionary, see make_record().
+    """
+    with open(path) as f:
+        lines = [line for line in f if line.strip()]
+    if len(lines) == 0:
+        raise ValueError("No benchmark results in {}".format(path))
+    return json.loads(lines[-1])
+
+
+def compare_results(baseline, current, threshold=0.1):
+    """
+    Compare benchmark results against a baseline.
+    :param baseline: Results of the baseline, see run_benchmarks().
+    :param current: Results to compare.
+    :param threshold: Relative slowdown above which a benchmark is flagged as regression, e.g. 0.1 for 10%.
+    :return: List of tuples (name, baseline value, current value, slowdown, status), where slowdown is the relative
+        increase of the time per call (or per game), and status is one of "regression", "improvement", "ok", "new" and
+        "missing".
+    """
+    comparison = []
+    for name in sorted(set(baseline) | set(current)):
+        if name not in baseline:
+            comparison.append((name, None, current[name]["value"], None, "new"))
+            continue
+        if name not in current:
+            comparison.append((name, baseline[name]["value"], None, None, "missing"))
+            continue
+        old, new = baseline[name]["value"], current[name]["value"]
+        slowdown = old / new - 1 if baseline[name]["higher_is_better"] else new / old - 1
+        if slowdown > threshold:
+            status = "regression"
+        elif slowdown < -threshold:
+            status = "improvement"
+        else:
+            status = "ok"
+        comparison.append((name, old, new, slowdown, status))
+    return comparison
+
+
+def print_comparison(comparison):
+    """
+    :param comparison: Return value of compare_results().
+    :return: Number of regressions.
+    """
+    for name, old, new, slowdown, status in comparison:
+        print("{:<50} {:>12} {:>12} {:>9} {}".format(
+            name, "-" if old is None else "{:.4g}".format(old), "-" if new is None else "{:.4g}".format(new),
+            "-" if slowdown is None else "{:+.1%}".format(slowdown),
+            status.upper() if status == "regression" else status))
+    return len([entry for entry in comparison if entry[4] == "regression"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the game engine and track the results over time.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    run_parser = subparsers.add_parser("run", help="Run the benchmarks and append the results to the history")
+    run_parser.add_argument("--filter", default=None, help="Only run benchmarks matching this regular expression")
+    run_parser.add_argument("--quick", action="store_true", help="Shorter, less accurate measurements")
+    run_parser.add_argument(
+        "--history", default=HISTORY_FILE, help="History file to append to (default: {})".format(HISTORY_FILE))
+    run_parser.add_argument("--save-baseline", default=None, metavar="FILE", help="Also save the results as baseline")
+    run_parser.add_argument("--baseline", default=None, metavar="FILE", help="Compare the results against a baseline")
+    compare_parser = subparsers.add_parser("compare", help="Compare results against a baseline")
+    compare_parser.add_argument("baseline", metavar="BASELINE", help="Baseline or history file (last run is used)")
+    compare_parser.add_argument(
+        "current", metavar="CURRENT", nargs="?", default=HISTORY_FILE,
+        help="Baseline or history file (last run is used, default: {})".format(HISTORY_FILE))
+    for p in (run_parser, compare_parser):
+        p.add_argument(
+            "--threshold", type=float, default=0.1, help="Relative slowdown flagged as regression (default: 0.1)")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        record = make_record(run_benchmarks(name_filter=args.filter, quick=args.quick))
+        save_record(record, args.history)
+        if args.save_baseline is not None:
+            with open(args.save_baseline, "w") as f:
+                f.write(json.dumps(record, sort_keys=True) + "\n")
+        baseline_path, current = args.baseline, record
+    else:
+        baseline_path, current = args.baseline, load_record(args.current)
+
+    if baseline_path is not None:
+        num_regressions = print_comparison(
+            compare_results(load_record(baseline_path)["results"], current["results"], threshold=args.threshold))
+        if num_regressions > 0:
+            print("{} regression(s) against {}".format(num_regressions, baseline_path))
+            sys.exit(1)
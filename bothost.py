@@ -0,0 +1,280 @@
+"""
+Out-of-process bot host.
+
+Bots normally run in the process of the game engine, so a slow bot stalls the game and a crashing bot ends the run. A
+BotPool runs bots in pre-started worker processes instead. BotPool.remote_bot() turns a bot class into a player class
+that can be passed to camelup.play_game() like any other bot:
+
+    with bothost.BotPool(workers=2, move_timeout=0.5) as pool:
+        players = [pool.remote_bot(bots.RandomBot), bots.RandomBot, pool.remote_bot(OtherBot)]
+        log, g = camelup.play_game(players)
+
+Every move of a remote bot is a session of the bot class and the active player, pinned to one worker. The game state is
+sent as the player view encoded by gamecodec.GameCodec. The constants of the game are sent once per session and game,
+every move only sends the bytes of the encoded state that changed since the last move of the session. The worker
+decodes the state into the representation of the game (GameState or CompactGameState) and calls the move() function of
+the bot.
+
+Each move call has a wall-clock budget. If the bot does not answer in time, its worker is killed and replaced, and the
+move is made by the fallback, an action tuple or a bot class run in the engine's process. The same happens if the bot
+raises an exception or its worker dies. The failures are counted in BotPool.failures.
+
+Bots in workers draw from their own random module, so games with remote bots are not reproducible from random.seed().
+With the 'spawn' or 'forkserver' start methods, bot classes must be importable from their module.
+"""
+import array
+import collections
+import itertools
+import multiprocessing
+import pickle
+import random
+import struct
+import time
+import traceback
+import camelup
+import gamecodec
+from playerinterface import PlayerInterface
+from actionids import MOVE_CAMEL_ACTION_ID
+
+# Message types sent to the workers
+_SETUP_MESSAGE = 0  # followed by the pickled tuple (session ID, bot class, encoded constants, state class)
+_MOVE_MESSAGE = 1  # _MOVE_HEADER followed by the changes of the encoded state
+
+# Message type, session ID, active player, length of the encoded state and number of changed bytes. The changes follow
+# as the indices of the changed bytes (native uint16) and their new values. Host and workers run on the same machine,
+# so native byte order is fine.
+_MOVE_HEADER = struct.Struct("=BIBHH")
+
+# Kinds of failures counted in BotPool.failures
+FAILURES = ("timeout", "error", "crash")
+
+
+class RemoteBot(PlayerInterface):
+    """
+    Base class of the player classes created by BotPool.remote_bot(). move() asks a worker of 'pool' to run the
+    move() function of 'bot'.
+    """
+    pool = None
+    bot = None
+    fallback = None
+    move_timeout = None
+
+    @classmethod
+    def move(cls, active_player, game_state):
+        return cls.pool.request_move(cls, active_player, game_state)
+
+
+class _Session:
+    """
+    What the host knows about a session, i.e. a remote bot playing as one player.
+    """
+    __slots__ = ("session_id", "worker", "generation", "game", "codec", "state_class", "encoded")
+
+    def __init__(self, session_id, worker):
+        self.session_id = session_id
+        self.worker = worker  # index of the worker the session is pinned to
+        self.generation = -1  # generation of the worker the session was last set up on
+        self.game = None  # live game state of the last move
+        self.codec = None
+        self.state_class = None  # representation the worker decodes into
+        self.encoded = b""  # encoded state the worker holds
+
+
+# What a worker knows about a session. state is the encoded state of the last move, updated in place.
+_WorkerSession = collections.namedtuple("_WorkerSession", ["bot", "codec", "state_class", "state"])
+
+
+def _serve(connection):
+    """
+    Main loop of a worker process: answer the messages of the host until the connection is closed.
+    :param connection: multiprocessing Connection to the host.
+    :return:
+    """
+    # Forked workers start with the random state of the host
+    random.seed()
+    sessions = {}
+    while True:
+        try:
+            message = connection.recv_bytes()
+        except EOFError:
+            return
+        if message[0] == _SETUP_MESSAGE:
+            session_id, bot, constants, state_class = pickle.loads(message[1:])
+            sessions[session_id] = _WorkerSession(
+                bot, gamecodec.GameCodec.from_constants(constants), state_class, bytearray())
+            continue
+
+        _, session_id, active_player, length, num_changes = _MOVE_HEADER.unpack_from(message)
+        session = sessions[session_id]
+        state = session.state
+        if length < len(state):
+            del state[length:]
+        else:
+            state.extend(bytes(length - len(state)))
+        changes = memoryview(message)[_MOVE_HEADER.size:]
+        for index, value in zip(changes[:2 * num_changes].cast("H"), changes[2 * num_changes:]):
+            state[index] = value
+        try:
+            g = session.codec.decode(state, session.state_class)
+            reply = True, session.bot.move(active_player, g)
+        except Exception:
+            reply = False, traceback.format_exc()
+        connection.send(reply)
+
+
+def _get_changes(previous, data):
+    """
+    :param previous: Bytes the worker holds.
+    :param data: Bytes the worker should hold.
+    :return: List of the indices of the bytes of data that the worker has to change.
+    """
+    changes = [i for i, (old, new) in enumerate(zip(previous, data)) if old != new]
+    if len(data) > len(previous):
+        changes += range(len(previous), len(data))
+    return changes
+
+
+class BotPool:
+    """
+    Pool of worker processes that run the moves of remote bots, see the module documentation.
+
+    A pool is meant to be used by one thread at a time. Use it as a context manager or call close() to stop the
+    workers.
+    """
+
+    def __init__(self, workers=1, move_timeout=1.0, fallback=(MOVE_CAMEL_ACTION_ID,), start_method=None):
+        """
+        :param workers: Number of worker processes.
+        :param move_timeout: Wall-clock budget of a move call in seconds, including the communication with the worker.
+        :param fallback: Action tuple, or a class extending PlayerInterface whose move() is called in this process, to
+            use if a remote bot does not make its move. The default, moving a camel, is always valid.
+        :param start_method: multiprocessing start method of the workers, or None for the platform default.
+        """
+        self.move_timeout = move_timeout
+        self.fallback = fallback
+        self.failures = collections.Counter()  # counts by (bot name, kind of failure), see FAILURES
+        self.num_moves = 0
+        self.last_error = None  # traceback of the last exception raised by a remote bot
+        self._context = multiprocessing.get_context(start_method)
+        self._workers = [None] * workers  # tuples (process, connection)
+        self._generations = [0] * workers  # incremented whenever a worker is replaced
+        for worker in range(workers):
+            self._start_worker(worker)
+        self._sessions = {}
+        self._session_ids = itertools.count()
+        self._codecs = {}  # GameCodec objects by encoded constants
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.close()
+
+    def _start_worker(self, worker):
+        host_connection, worker_connection = self._context.Pipe()
+        process = self._context.Process(target=_serve, args=(worker_connection,), daemon=True)
+        process.start()
+        worker_connection.close()
+        self._workers[worker] = process, host_connection
+        self._generations[worker] += 1
+
+    def _replace_worker(self, worker):
+        process, connection = self._workers[worker]
+        connection.close()
+        process.kill()
+        process.join()
+        self._start_worker(worker)
+
+    def close(self):
+        """
+        Stop all workers.
+        :return:
+        """
+        for process, connection in self._workers:
+            connection.close()
+        for process, _ in self._workers:
+            process.join(timeout=1)
+            if process.is_alive():
+                process.kill()
+                process.join()
+
+    def remote_bot(self, bot, fallback=None, move_timeout=None):
+        """
+        :param bot: Class extending PlayerInterface.
+        :param fallback: Fallback of this bot, or None for the fallback of the pool.
+        :param move_timeout: Budget of a move call of this bot in seconds, or None for the budget of the pool.
+        :return: Class extending RemoteBot with the name of 'bot', to be used as a player of a game.
+        """
+        return type(bot.__name__, (RemoteBot,), {
+            "pool": self, "bot": bot, "fallback": self.fallback if fallback is None else fallback,
+            "move_timeout": self.move_timeout if move_timeout is None else move_timeout})
+
+    def _get_codec(self, g):
+        """
+        :param g: Game state.
+        :return: GameCodec object of the constants of g, the same object for all games with the same constants.
+        """
+        codec = gamecodec.GameCodec(g)
+        return self._codecs.setdefault(codec.encode_constants(), codec)
+
+    def request_move(self, remote_bot, active_player, game_state):
+        """
+        Let a worker run the move of a remote bot.
+        :param remote_bot: Class returned by remote_bot().
+        :param active_player: Player ID integer.
+        :param game_state: Game state or player view of the active player.
+        :return: The action of the bot, or of its fallback if the bot fails.
+        """
+        deadline = time.perf_counter() + remote_bot.move_timeout
+        self.num_moves += 1
+        key = remote_bot, active_player
+        session = self._sessions.get(key)
+        if session is None:
+            session = self._sessions[key] = _Session(next(self._session_ids), len(self._sessions) % len(self._workers))
+        worker = session.worker
+        _, connection = self._workers[worker]
+
+        # The live game state is encoded as seen by the active player, which is faster than encoding the view
+        g = camelup._unwrap_view(game_state)
+        if g is not session.game:
+            codec = self._get_codec(g)
+            if codec is not session.codec or type(g) is not session.state_class:
+                session.codec = codec
+                session.state_class = type(g)
+                session.generation = -1
+            session.game = g
+
+        try:
+            if session.generation != self._generations[worker]:
+                session.encoded = b""
+                connection.send_bytes(bytes([_SETUP_MESSAGE]) + pickle.dumps(
+                    (session.session_id, remote_bot.bot, session.codec.encode_constants(), session.state_class)))
+                session.generation = self._generations[worker]
+
+            data = session.codec.encode(g, active_player)
+            changes = _get_changes(session.encoded, data)
+            connection.send_bytes(
+                _MOVE_HEADER.pack(_MOVE_MESSAGE, session.session_id, active_player, len(data), len(changes)) +
+                array.array("H", changes).tobytes() + bytes([data[i] for i in changes]))
+            session.encoded = data
+
+            if connection.poll(max(0.0, deadline - time.perf_counter())):
+                success, result = connection.recv()
+                if success:
+                    return result
+                self.failures[remote_bot.__name__, "error"] += 1
+                self.last_error = result
+            else:
+                self.failures[remote_bot.__name__, "timeout"] += 1
+                self._replace_worker(worker)
+        except (EOFError, OSError):
+            # The worker died during this move or since the last one
+            self.failures[remote_bot.__name__, "crash"] += 1
+            self._replace_worker(worker)
+        return self._fallback_move(remote_bot.fallback, active_player, game_state)
+
+    @staticmethod
+    def _fallback_move(fallback, active_player, game_state):
+        if isinstance(fallback, type):
+            return fallback.move(active_player, game_state)
+        return fallback
@@ -1,6 +1,8 @@
-from playerinterface import PlayerInterface
+from playerinterface import PlayerInterface, BatchPlayerInterface
 from camelup import get_valid_moves
-# from actionids import GAME_BET_ACTION_ID, ROUND_BET_ACTION_ID, MOVE_TRAP_ACTION_ID, MOVE_CAMEL_ACTION_ID
+from actionids import GAME_BET_ACTION_ID, ROUND_BET_ACTION_ID, MOVE_TRAP_ACTION_ID, MOVE_CAMEL_ACTION_ID
+import batchengine
+import numpy as np
 import random
 
 
@@ -19,3 +21,38 @@ class RandomBot(PlayerInterface):
         random_super_move = random.choice(valid_super_moves)
         possible_moves = [move for move in valid_moves if move[0] == random_super_move]
         return random.choice(possible_moves)
+
+
+class BatchRandomBot(BatchPlayerInterface):
+    """
+    The vectorized version of RandomBot for batchengine.py. It makes the same hierarchical random choice in all games
+    at once.
+    """
+    @staticmethod
+    def move_batch(active_player, batch_state):
+        rng = batch_state.rng
+        trap_mask, round_bet_mask, game_bet_mask = batchengine.get_valid_move_masks(batch_state, active_player)
+
+        # Choose a type of move among the available ones
+        super_move_mask = np.stack([
+            np.ones(batch_state.NUM_GAMES, dtype=bool), trap_mask.any(axis=1),
+            round_bet_mask.any(axis=1), game_bet_mask.any(axis=1)], axis=1)
+        super_moves = np.array([MOVE_CAMEL_ACTION_ID, MOVE_TRAP_ACTION_ID, ROUND_BET_ACTION_ID, GAME_BET_ACTION_ID])
+        actions = np.zeros((batch_state.NUM_GAMES, 3), dtype=np.int64)
+        actions[:, 0] = super_moves[batchengine._random_choice(rng, super_move_mask)]
+
+        # Choose a variant of each type of move. Both trap types and bet types are valid wherever a location or camel
+        # is valid.
+        trap_choice = batchengine._random_choice(rng, np.concatenate([trap_mask, trap_mask], axis=1))
+        round_bet_choice = batchengine._random_choice(rng, round_bet_mask)
+        game_bet_choice = batchengine._random_choice(rng, np.concatenate([game_bet_mask, game_bet_mask], axis=1))
+
+        is_trap = actions[:, 0] == MOVE_TRAP_ACTION_ID
+        actions[is_trap, 1] = np.where(trap_choice[is_trap] < batch_state.BOARD_SIZE, 1, -1)
+        actions[is_trap, 2] = trap_choice[is_trap] % batch_state.BOARD_SIZE
+        is_round_bet = actions[:, 0] == ROUND_BET_ACTION_ID
+        actions[is_round_bet, 1] = round_bet_choice[is_round_bet]
+        is_game_bet = actions[:, 0] == GAME_BET_ACTION_ID
+        actions[is_game_bet, 1] = game_bet_choice[is_game_bet] // batch_state.NUM_CAMELS
+        actions[is_game_bet, 2] = game_bet_choice[is_game_bet] % batch_state.NUM_CAMELS
+        return actions
@@ -1,6 +1,13 @@
 import random
 import copy
+import array
+import collections
+import time
+import contextlib
+import zobrist
 from playerinterface import PlayerInterface
+from gameevents import (EventBus, ConsoleSubscriber, CamelMoved, TrapHit, TrapMoved, RoundBetPlaced, GameBetPlaced,
+                        BetPaid, RoundSettled, GameEnded, TurnEnded)
 from actionids import GAME_BET_ACTION_ID, ROUND_BET_ACTION_ID, MOVE_TRAP_ACTION_ID, MOVE_CAMEL_ACTION_ID
 
 
@@ -8,7 +15,29 @@ class IllegalMoveException(Exception):
     pass
 
 
-class GameState:
+# Names of the actions and game bet types in the game logs
+ACTION_TYPES = {
+    MOVE_CAMEL_ACTION_ID: "move_camel",
+    MOVE_TRAP_ACTION_ID: "move_trap",
+    ROUND_BET_ACTION_ID: "round_winner_bet",
+    GAME_BET_ACTION_ID: "game_bet"}
+GAME_BET_TYPES = ("win", "lose")
+
+
+class BaseGameState:
+    """
+    Game constants, bets, traps and money shared by all game state representations. Subclasses decide how the camels
+    are stored on the board and implement the camel interface used by the game engine:
+        - camel_location(camel_index) and camel_locations()
+        - stack_height(board_loc)
+        - move_camel_stack(camel_index, distance, stack_from_bottom)
+        - save_stack(board_loc) and restore_stack(board_loc, stack)
+        - stack_camels(board_loc)
+        - camel_in_nth_place(n)
+        - has_camel_finished()
+    """
+    __slots__ = ()
+
     def __init__(self, num_camels=5, num_players=4, board_size=16,
                  move_range=(1, 3),
                  first_place_round_payout=(5, 3, 2),
@@ -16,7 +45,9 @@ class GameState:
                  third_or_worse_place_round_payout=-1,
                  game_end_payout=(8, 5, 3),
                  bad_game_end_bet=-1,
-                 verbose=False):
+                 verbose=False,
+                 rng=None,
+                 event_bus=None):
 
         # Global game variables
         self.NUM_CAMELS = num_camels
@@ -37,11 +68,17 @@ class GameState:
 
         # Game parameter that can be changed
         self.verbose = verbose
+        self.rng = rng  # gamerng.GameRandom or RngTape object to draw camels and dice from, None for the random module
+        # gameevents.EventBus receiving the events of the game, or None. verbose=True subscribes console output here,
+        # setting g.verbose later does not: subscribe a gameevents.ConsoleSubscriber to g.event_bus instead.
+        if event_bus is None and verbose:
+            event_bus = EventBus([ConsoleSubscriber()])
+        self.event_bus = event_bus
 
         # Game state variables
         # Each entry indicates the order of camels on that fields
         # The list is twice as long as the actual track to allow camels to pass the finish line by variable distances
-        self.camel_track = [[] for _ in range(board_size * 2)]
+        camel_track = [[] for _ in range(board_size * 2)]
         self.trap_track = [[] for _ in range(board_size * 2)]  # entry of the form [trap_type (-1,1), player]
         self.round_bets = []  # entries of the form [camel, player]
         self.game_winner_bets = []  # entries of the form [camel, player]
@@ -50,14 +87,21 @@ class GameState:
         self.camel_yet_to_move = [True] * num_camels
         self.active_game = True  # Has one of the camels passed the finish line?
         self.game_winner = []
+        self.valid_moves_cache = None  # see ValidMoveCache
+        self.position_hash = None  # see enable_position_hashing()
 
         # Initialize camels in random position
         initial_camels = copy.deepcopy(self.CAMELS)
         for _ in range(0, num_camels):
-            index = random.randint(0, len(initial_camels) - 1)
-            distance = roll_dice(self.MOVE_RANGE) - 1
-            self.camel_track[distance].append(initial_camels[index])
+            if rng is None:
+                index = random.randint(0, len(initial_camels) - 1)
+                distance = roll_dice(self.MOVE_RANGE) - 1
+            else:
+                index = rng.randint(0, len(initial_camels) - 1)
+                distance = rng.roll_dice(self.MOVE_RANGE) - 1
+            camel_track[distance].append(initial_camels[index])
             initial_camels.remove(initial_camels[index])
+        self.camel_track = camel_track
 
     def __setattr__(self, key, value):
         """
@@ -65,10 +109,10 @@ class GameState:
         development help more than an actual security measure as there are ways to circumvent this.
         :return:
         """
-        if key.isupper() and key in self.__dict__:
+        if key.isupper() and hasattr(self, key):
             raise TypeError("Game constants cannot be changed")
         else:
-            self.__dict__[key] = value
+            object.__setattr__(self, key, value)
 
     def get_player_bets(self, player):
         """
@@ -104,11 +148,522 @@ class GameState:
         :param player: Player ID integer.
         :return:
         """
-        cp = copy.deepcopy(self)
-        cp.game_winner_bets = [[None, None] if entry[1] != player else entry for entry in cp.game_winner_bets]
-        cp.game_loser_bets = [[None, None] if entry[1] != player else entry for entry in cp.game_loser_bets]
+        # The random number stream is not copied, players must not be able to predict the dice. The event bus is not
+        # copied either, so that moves simulated by bots don't emit events.
+        cp = copy.deepcopy(self, memo={id(self.rng): None, id(self.event_bus): None})
+        cp.game_winner_bets = hide_game_bets(cp.game_winner_bets, player)
+        cp.game_loser_bets = hide_game_bets(cp.game_loser_bets, player)
+        if cp.valid_moves_cache is not None:
+            cp.valid_moves_cache = ValidMoveCache()
+        if cp.position_hash is not None:
+            cp.position_hash ^= zobrist.hide_game_bets_key(self, cp)
         return cp
 
+    def get_player_view(self, player):
+        """
+        Returns a read-only view of the game state that hides the game winner and loser bets not made by 'player'
+        without copying the game state. See PlayerView for details.
+        :param player: Player ID integer.
+        :return:
+        """
+        return PlayerView(self, player)
+
+
+class GameState(BaseGameState):
+    """
+    The reference game state. camel_track is a list of fields, each holding the list of camel IDs standing on it from
+    bottom to top. It can be modified directly, which makes it convenient for setting up test scenarios.
+    """
+
+    def camel_location(self, camel_index):
+        """
+        Find a camel on the board.
+        :param camel_index: Camel index integer, i.e. the position of the camel ID in CAMELS.
+        :return: Tuple (board_location, stack_location). The bottom-most camel of a stack has stack location 0.
+        """
+        camel = self.CAMELS[camel_index]
+        board_loc = [entry for entry in enumerate(self.camel_track) if camel in entry[1]]
+        if len(board_loc) > 1:
+            raise ValueError("Multiple locations for same camel!")
+        stack_loc = [entry[0] for entry in enumerate(board_loc[0][1]) if camel == entry[1]]
+        if len(stack_loc) > 1:
+            raise ValueError("Multiple locations in stack for camel!")
+        return board_loc[0][0], stack_loc[0]
+
+    def camel_locations(self):
+        """
+        Find all camels on the board in a single pass over the track.
+        :return: List of tuples (board_location, stack_location) indexed by camel index.
+        """
+        locations = [None] * self.NUM_CAMELS
+        for board_loc, stack in enumerate(self.camel_track):
+            for stack_loc, camel in enumerate(stack):
+                locations[self.CAMELS.index(camel)] = (board_loc, stack_loc)
+        return locations
+
+    def stack_height(self, board_loc):
+        """
+        Number of camels standing on a field.
+        :param board_loc: Integer denoting the location on the board.
+        :return:
+        """
+        return len(self.camel_track[board_loc])
+
+    def move_camel_stack(self, camel_index, distance, stack_from_bottom=False):
+        """
+        Move a camel and all camels on top of it. This function only moves camels, it does not apply any game rules.
+        :param camel_index: Camel index integer of the lowest camel to move.
+        :param distance: Number of fields to move the stack by.
+        :param stack_from_bottom: Boolean, whether the moved camels are put underneath the camels on the target field.
+        :return:
+        """
+        curr_pos, found_y_pos = self.camel_location(camel_index)
+        camels_to_move = self.camel_track[curr_pos][found_y_pos:]
+        self.camel_track[curr_pos] = self.camel_track[curr_pos][0:found_y_pos]
+        if stack_from_bottom:
+            self.camel_track[curr_pos + distance] = camels_to_move + self.camel_track[curr_pos + distance]
+        else:
+            self.camel_track[curr_pos + distance] = self.camel_track[curr_pos + distance] + camels_to_move
+
+    def save_stack(self, board_loc):
+        """
+        Take a snapshot of the camels standing on a field that can be passed to restore_stack().
+        :param board_loc: Integer denoting the location on the board.
+        :return: A tuple of camels from bottom to top. Its content depends on the game state representation.
+        """
+        return tuple(self.camel_track[board_loc])
+
+    def restore_stack(self, board_loc, stack):
+        """
+        Put camels back onto a field as saved by save_stack(). Camels that are on the field but not in the snapshot
+        must be restored onto their own field as well to keep the game state consistent.
+        :param board_loc: Integer denoting the location on the board.
+        :param stack: Return value of save_stack().
+        :return:
+        """
+        self.camel_track[board_loc] = list(stack)
+
+    def stack_camels(self, board_loc):
+        """
+        :param board_loc: Integer denoting the location on the board.
+        :return: List of the indices of the camels on the field from bottom to top.
+        """
+        return [self.CAMELS.index(camel) for camel in self.camel_track[board_loc]]
+
+    def camel_in_nth_place(self, n):
+        """
+        Retrieve the ID of the camel in n-th place. Use find_camel_in_nth_place(), which checks the bounds of n.
+        :param n: Integer denoting the place to retrieve, e.g 2 for second place.
+        :return:
+        """
+        track = self.camel_track
+        camels_counted = 0
+        i = 1
+        while True:
+            dtg = n - camels_counted
+            camels_in_stack = len(track[len(track) - i])
+            if camels_in_stack >= dtg:
+                return track[len(track) - i][camels_in_stack - dtg]
+            else:
+                camels_counted += camels_in_stack
+                i += 1
+
+    def has_camel_finished(self):
+        """
+        Tests whether any camel has passed the finish line.
+        :return:
+        """
+        return len([field for field in self.camel_track[self.BOARD_SIZE:] if len(field) > 0]) > 0
+
+
+class CompactGameState(BaseGameState):
+    """
+    An alternative game state that stores camels as integers instead of lists of camel IDs. Each camel has a board
+    location and a stack location (0 is the bottom of a stack), stored in flat lists indexed by the camel index, i.e.
+    the position of the camel ID in CAMELS. Every field also lists the indices of its camels from bottom to top. Finding
+    a camel takes constant time, and moving a stack only touches the field it leaves and the field it lands on. Ranking
+    the camels sorts them and doesn't depend on the size of the board either.
+
+    The game engine functions accept this class wherever they accept a GameState. Traps, bets and money are stored
+    exactly like in GameState. camel_track is rebuilt from the integer lists on every access and is meant for display
+    and conversion only, assigning to it replaces all camel positions.
+    """
+    __slots__ = (
+        "NUM_CAMELS", "CAMELS", "NUM_PLAYERS", "BOARD_SIZE", "MOVE_RANGE",
+        "FIRST_PLACE_ROUND_PAYOUT", "SECOND_PLACE_ROUND_PAYOUT", "THIRD_OR_WORSE_PLACE_ROUND_PAYOUT",
+        "GAME_END_PAYOUT", "BAD_GAME_END_BET", "verbose", "rng", "event_bus",
+        "trap_track", "round_bets", "game_winner_bets", "game_loser_bets", "player_money_values",
+        "camel_yet_to_move", "active_game", "game_winner", "valid_moves_cache", "position_hash",
+        "camel_positions",  # board location of each camel
+        "camel_heights",  # stack location of each camel
+        "stacks")  # indices of the camels on each field from bottom to top
+
+    @classmethod
+    def from_game_state(cls, g):
+        """
+        Convert any game state into a CompactGameState.
+        :param g: GameState object.
+        :return:
+        """
+        cp = object.__new__(cls)
+        for key in _SHARED_STATE_ATTRIBUTES:
+            setattr(cp, key, copy.deepcopy(getattr(g, key)))
+        cp.camel_track = g.camel_track
+        return cp
+
+    def to_game_state(self):
+        """
+        Convert this CompactGameState into an equivalent GameState.
+        :return:
+        """
+        g = object.__new__(GameState)
+        for key in _SHARED_STATE_ATTRIBUTES:
+            setattr(g, key, copy.deepcopy(getattr(self, key)))
+        g.camel_track = self.camel_track
+        return g
+
+    @property
+    def camel_track(self):
+        camels = self.CAMELS
+        return [[camels[camel_index] for camel_index in stack] for stack in self.stacks]
+
+    @camel_track.setter
+    def camel_track(self, camel_track):
+        camel_indices = {camel: i for i, camel in enumerate(self.CAMELS)}
+        self.camel_positions = [-1] * self.NUM_CAMELS
+        self.camel_heights = [-1] * self.NUM_CAMELS
+        self.stacks = [[camel_indices[camel] for camel in stack] for stack in camel_track]
+        for board_loc, stack in enumerate(self.stacks):
+            for stack_loc, camel_index in enumerate(stack):
+                self.camel_positions[camel_index] = board_loc
+                self.camel_heights[camel_index] = stack_loc
+        if -1 in self.camel_positions:
+            raise ValueError("Not all camels are on the track!")
+
+    def camel_location(self, camel_index):
+        return self.camel_positions[camel_index], self.camel_heights[camel_index]
+
+    def camel_locations(self):
+        return list(zip(self.camel_positions, self.camel_heights))
+
+    def stack_height(self, board_loc):
+        return len(self.stacks[board_loc])
+
+    def move_camel_stack(self, camel_index, distance, stack_from_bottom=False):
+        positions = self.camel_positions
+        heights = self.camel_heights
+        curr_pos = positions[camel_index]
+        new_pos = curr_pos + distance
+        stack = self.stacks[curr_pos]
+        camels_to_move = stack[heights[camel_index]:]
+        del stack[heights[camel_index]:]
+
+        target = self.stacks[new_pos]
+        if stack_from_bottom:
+            # The camels already on the target field are lifted to make room underneath them
+            target[:0] = camels_to_move
+            for stack_loc, i in enumerate(target):
+                heights[i] = stack_loc
+        else:
+            for stack_loc, i in enumerate(camels_to_move, len(target)):
+                heights[i] = stack_loc
+            target += camels_to_move
+        for i in camels_to_move:
+            positions[i] = new_pos
+
+    def save_stack(self, board_loc):
+        return tuple(self.stacks[board_loc])
+
+    def restore_stack(self, board_loc, stack):
+        for stack_loc, camel_index in enumerate(stack):
+            self.camel_positions[camel_index] = board_loc
+            self.camel_heights[camel_index] = stack_loc
+        self.stacks[board_loc] = list(stack)
+
+    def stack_camels(self, board_loc):
+        return list(self.stacks[board_loc])
+
+    def camel_ranking(self):
+        """
+        List the camel indices ordered from first to last place.
+        :return:
+        """
+        positions = self.camel_positions
+        heights = self.camel_heights
+        return sorted(range(self.NUM_CAMELS), key=lambda i: (positions[i], heights[i]), reverse=True)
+
+    def camel_in_nth_place(self, n):
+        if n == 1:
+            # The leader is on top of the front stack
+            return self.CAMELS[self.stacks[max(self.camel_positions)][-1]]
+        return self.CAMELS[self.camel_ranking()[n - 1]]
+
+    def has_camel_finished(self):
+        return max(self.camel_positions) >= self.BOARD_SIZE
+
+
+# Attributes that are stored identically by all game state representations
+_SHARED_STATE_ATTRIBUTES = tuple(
+    key for key in CompactGameState.__slots__ if key not in ("camel_positions", "camel_heights", "stacks"))
+
+
+def hide_game_bets(bets, player):
+    """
+    Obfuscate the game winner or loser bets not made by 'player'.
+    :param bets: List of game bets, i.e. g.game_winner_bets or g.game_loser_bets.
+    :param player: Player ID integer.
+    :return: A new list. Entries not made by 'player' are replaced with [None, None].
+    """
+    return [[None, None] if entry[1] != player else list(entry) for entry in bets]
+
+
+class PlayerView:
+    """
+    A read-only view of a live game state as seen by one player. This is what bots receive in their move() function.
+
+    Attributes and methods are looked up on the wrapped game state when they are first accessed, so creating a view
+    does not copy anything. game_winner_bets and game_loser_bets are obfuscated the same way as in get_player_copy()
+    the first time they are accessed. Lists are returned wrapped in PlayerViewList objects that behave like lists.
+
+    The view is copy-on-write: as soon as a bot modifies the view (setting an attribute, or modifying any list, e.g.
+    to simulate a move with move_camel()), the view creates a private, obfuscated copy of the game state and forwards
+    all further access to it. The live game state is never modified through a view.
+
+    A view caches what it has read and is only valid until the game state changes, i.e. for the duration of a single
+    move() call. copy.deepcopy() and pickle turn a view into an obfuscated copy of the underlying game state.
+    """
+    __slots__ = ("_state", "_player", "_copy", "_cache")
+
+    def __init__(self, g, player):
+        object.__setattr__(self, "_state", g)
+        object.__setattr__(self, "_player", player)
+        object.__setattr__(self, "_copy", None)
+        object.__setattr__(self, "_cache", {})
+
+    def __getattr__(self, key):
+        if key.startswith("_"):
+            # Private and special attributes, e.g. __dict__, would expose the live game state
+            raise AttributeError("'PlayerView' object has no attribute '{}'".format(key))
+        if self._copy is not None:
+            return getattr(self._copy, key)
+        try:
+            return self._cache[key]
+        except KeyError:
+            pass
+
+        class_attribute = getattr(type(self._state), key, None)
+        if callable(class_attribute):
+            # Methods are bound to the view so that they see the obfuscated bets
+            value = class_attribute.__get__(self)
+        elif key in ("game_winner_bets", "game_loser_bets"):
+            value = PlayerViewList(self, (key,), hide_game_bets(getattr(self._state, key), self._player))
+        elif key in ("rng", "event_bus", "valid_moves_cache"):
+            # The valid moves cache is keyed by player, entries computed from hidden bets must not reach the live cache
+            value = None
+        elif key == "position_hash":
+            value = self._state.position_hash
+            if value is not None:
+                value ^= zobrist.hide_game_bets_key(self._state, self)
+        else:
+            value = getattr(self._state, key)
+            if type(value) is list:
+                value = PlayerViewList(self, (key,), value)
+        self._cache[key] = value
+        return value
+
+    def __setattr__(self, key, value):
+        setattr(self._copy_on_write(), key, value)
+
+    def __delattr__(self, key):
+        delattr(self._copy_on_write(), key)
+
+    def __deepcopy__(self, memo):
+        if self._copy is not None:
+            return copy.deepcopy(self._copy, memo)
+        return self._state.get_player_copy(self._player)
+
+    def __reduce_ex__(self, protocol):
+        # The copy is pickled as an object of its own class, which unpickling returns unchanged
+        return _identity, (self.__deepcopy__({}),)
+
+    def __repr__(self):
+        return "PlayerView(player={}, copied={})".format(self._player, self._copy is not None)
+
+    def _copy_on_write(self):
+        """
+        Create the private copy of the game state if it doesn't exist yet.
+        :return: The private copy.
+        """
+        if self._copy is None:
+            object.__setattr__(self, "_copy", self._state.get_player_copy(self._player))
+        return self._copy
+
+
+def _identity(value):
+    return value
+
+
+def _unwrap_view(g, player=None):
+    """
+    Engine functions that only read the game state can skip the PlayerView indirection as long as their result does
+    not depend on information hidden from the owner of the view, i.e. other players' game bets.
+    :param g: GameState or PlayerView object.
+    :param player: Player ID integer whose game bets the caller reads, or None if it doesn't read any game bets.
+    :return: The live game state if it is safe to read, otherwise g.
+    """
+    if type(g) is PlayerView and g._copy is None and (player is None or player == g._player):
+        return g._state
+    return g
+
+
+class PlayerViewList:
+    """
+    A list inside a PlayerView. Reading and comparing behaves like the wrapped list, nested lists are wrapped as well.
+    Modifying it triggers the copy-on-write of the view and is then applied to the corresponding list of the private
+    copy. It is not a subclass of list: use list() or copy() where a real list is needed, e.g. for isinstance() checks or
+    json.dumps().
+    """
+    __slots__ = ("_view", "_path", "_target", "_items")
+    __hash__ = None
+
+    def __init__(self, view, path, target):
+        self._view = view
+        self._path = path  # attribute name followed by list indices, used to find this list in the private copy
+        self._target = target
+        self._items = None
+
+    def _raw(self):
+        """
+        The wrapped list, or the corresponding list of the private copy once the view has been modified.
+        :return:
+        """
+        if self._view._copy is None:
+            return self._target
+        value = getattr(self._view._copy, self._path[0])
+        for index in self._path[1:]:
+            value = value[index]
+        return value
+
+    def _read(self):
+        """
+        The elements of the list with nested lists wrapped (created on first access).
+        :return:
+        """
+        if self._view._copy is not None:
+            return self._raw()
+        if self._items is None:
+            self._items = [
+                PlayerViewList(self._view, self._path + (index,), value) if type(value) is list else value
+                for index, value in enumerate(self._target)]
+        return self._items
+
+    def _write(self):
+        self._view._copy_on_write()
+        return self._raw()
+
+    def __len__(self):
+        return len(self._target if self._view._copy is None else self._raw())
+
+    def __getitem__(self, index):
+        return self._read()[index]
+
+    def __iter__(self):
+        return iter(self._read())
+
+    def __reversed__(self):
+        return reversed(self._read())
+
+    def __contains__(self, item):
+        return item in self._raw()
+
+    def __eq__(self, other):
+        return self._raw() == _unwrap_list(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __lt__(self, other):
+        return self._raw() < _unwrap_list(other)
+
+    def __le__(self, other):
+        return self._raw() <= _unwrap_list(other)
+
+    def __gt__(self, other):
+        return self._raw() > _unwrap_list(other)
+
+    def __ge__(self, other):
+        return self._raw() >= _unwrap_list(other)
+
+    def __add__(self, other):
+        return list(self._read()) + list(other)
+
+    def __radd__(self, other):
+        return list(other) + list(self._read())
+
+    def __mul__(self, n):
+        return list(self._read()) * n
+
+    def __repr__(self):
+        return repr(self._raw())
+
+    def __deepcopy__(self, memo):
+        return copy.deepcopy(self._raw(), memo)
+
+    def index(self, *args):
+        return self._raw().index(*args)
+
+    def count(self, item):
+        return self._raw().count(item)
+
+    def copy(self):
+        return copy.deepcopy(self._raw())
+
+    def __setitem__(self, index, value):
+        self._write()[index] = value
+
+    def __delitem__(self, index):
+        del self._write()[index]
+
+    def __iadd__(self, other):
+        self._write().extend(other)
+        return self
+
+    def __imul__(self, n):
+        self._write().__imul__(n)
+        return self
+
+    def append(self, item):
+        self._write().append(item)
+
+    def extend(self, items):
+        self._write().extend(items)
+
+    def insert(self, index, item):
+        self._write().insert(index, item)
+
+    def pop(self, *args):
+        return self._write().pop(*args)
+
+    def remove(self, item):
+        self._write().remove(item)
+
+    def clear(self):
+        self._write().clear()
+
+    def sort(self, **kwargs):
+        self._write().sort(**kwargs)
+
+    def reverse(self):
+        self._write().reverse()
+
+
+def _unwrap_list(value):
+    """
+    :param value: Any object.
+    :return: The list wrapped by value if it is a PlayerViewList, otherwise value.
+    """
+    return value._raw() if type(value) is PlayerViewList else value
+
 
 def get_valid_moves(g, player):
     """
@@ -126,43 +681,157 @@ def get_valid_moves(g, player):
                                                                     - bet_type: "win"/"lose" for winner/loser bet,
                                                                       respectively
                                                                     - camel_id: Camel ID
+    If the game state has a ValidMoveCache, the parts of the list are taken from the cache and only recomputed after
+    the engine functions have changed them. Use is_valid_move() to check a single move.
     :param g: GameState object.
     :param player: Player ID integer.
     :return:
     """
-    valid_moves = []
+    g = _unwrap_view(g, player)
 
     # Check if a camel can still be moved. Note that this should ALWAYS be the case. If the last camel moves then the
     # end of round should be triggered after the move. This check is a failsafe and will result in an exception on
     # purpose
     if sum(g.camel_yet_to_move) == 0:
         raise RuntimeError("All camels have moved but end of round was not triggered!")
-    valid_moves.append((MOVE_CAMEL_ACTION_ID,))
-
-    # Traps can be placed anywhere where there is no camel or trap. They may also not be adjacent to a trap UNLESS
-    # the player is moving his trap to an adjacent spot. They may also not be placed on the first spot of the track.
-    trap_track_without_player_trap = [entry if len(entry) > 0 and entry[1] != player else [] for entry in g.trap_track]
-    valid_trap_locations = [
-        i for i in range(1, g.BOARD_SIZE) if
-        len(g.camel_track[i]) == 0 and  # Cannot be placed under camels
-        len(g.trap_track[i]) == 0 and  # Cannot be placed on other trap
-        len(trap_track_without_player_trap[i - 1]) == 0 and  # Cannot be placed next to another player's trap
-        len(trap_track_without_player_trap[i + 1]) == 0]  # Cannot be placed next to another player's trap
-    valid_moves += [(MOVE_TRAP_ACTION_ID, trap_type, trap_location) for trap_type
-                    in (1, -1) for trap_location in valid_trap_locations]
-
-    # Round winner bets can be made as long as there are still cards available
-    for camel in g.CAMELS:
-        if len([bet for bet in g.round_bets if len(bet) > 0 and bet[0] == camel]) < len(g.FIRST_PLACE_ROUND_PAYOUT):
-            valid_moves.append((ROUND_BET_ACTION_ID, camel))
 
+    cache = g.valid_moves_cache
+    if cache is None:
+        return (
+            [(MOVE_CAMEL_ACTION_ID,)] + _get_valid_trap_moves(g, player) +
+            _get_valid_round_bet_moves(g) + _get_valid_game_bet_moves(g, player))
+
+    if player not in cache.trap_moves:
+        cache.trap_moves[player] = _get_valid_trap_moves(g, player)
+    if cache.round_bet_moves is None:
+        cache.round_bet_moves = _get_valid_round_bet_moves(g)
+    if player not in cache.game_bet_moves:
+        cache.game_bet_moves[player] = _get_valid_game_bet_moves(g, player)
+    return (
+        [(MOVE_CAMEL_ACTION_ID,)] + cache.trap_moves[player] +
+        cache.round_bet_moves + cache.game_bet_moves[player])
+
+
+def is_valid_move(g, player, action):
+    """
+    Check whether a single move is valid without building the list of all valid moves. This gives the same result as
+    'action in get_valid_moves(g, player)'.
+    :param g: GameState object.
+    :param player: Player ID integer.
+    :param action: A move tuple as returned by PlayerInterface.move().
+    :return:
+    """
+    g = _unwrap_view(g, player)
+    if sum(g.camel_yet_to_move) == 0:
+        raise RuntimeError("All camels have moved but end of round was not triggered!")
+    if not isinstance(action, tuple) or len(action) == 0:
+        return False
+
+    if action[0] == MOVE_CAMEL_ACTION_ID:
+        return len(action) == 1
+    elif action[0] == MOVE_TRAP_ACTION_ID:
+        return (
+            len(action) == 3 and action[1] in (1, -1) and action[2] in range(1, g.BOARD_SIZE) and
+            _is_valid_trap_location(g, player, action[2]))
+    elif action[0] == ROUND_BET_ACTION_ID:
+        return len(action) == 2 and action[1] in g.CAMELS and _is_round_bet_available(g, action[1])
+    elif action[0] == GAME_BET_ACTION_ID:
+        return (
+            len(action) == 3 and action[1] in ("win", "lose") and action[2] in g.CAMELS and
+            action[2] not in g.get_player_bets(player))
+    return False
+
+
+def _is_valid_trap_location(g, player, trap_location):
+    """
+    Traps can be placed anywhere where there is no camel or trap. They may also not be adjacent to a trap UNLESS the
+    player is moving his trap to an adjacent spot. They may also not be placed on the first spot of the track.
+    :param g: GameState object.
+    :param player: Player ID integer.
+    :param trap_location: Integer from 1 to BOARD_SIZE (exclusive).
+    :return:
+    """
+    trap_track = g.trap_track
+    if g.stack_height(trap_location) != 0 or len(trap_track[trap_location]) != 0:
+        return False
+    for neighbour in (trap_track[trap_location - 1], trap_track[trap_location + 1]):
+        if len(neighbour) > 0 and neighbour[1] != player:
+            return False
+    return True
+
+
+def _is_round_bet_available(g, camel):
+    """
+    Round winner bets can be made as long as there are still cards available.
+    :param g: GameState object.
+    :param camel: Camel ID string.
+    :return:
+    """
+    return len([bet for bet in g.round_bets if len(bet) > 0 and bet[0] == camel]) < len(g.FIRST_PLACE_ROUND_PAYOUT)
+
+
+def _get_valid_trap_moves(g, player):
+    valid_trap_locations = [i for i in range(1, g.BOARD_SIZE) if _is_valid_trap_location(g, player, i)]
+    return [(MOVE_TRAP_ACTION_ID, trap_type, trap_location) for trap_type
+            in (1, -1) for trap_location in valid_trap_locations]
+
+
+def _get_valid_round_bet_moves(g):
+    return [(ROUND_BET_ACTION_ID, camel) for camel in g.CAMELS if _is_round_bet_available(g, camel)]
+
+
+def _get_valid_game_bet_moves(g, player):
     # Game winner/loser bets can be made as long as the player hasn't already bet on that camel
-    # valid_moves += [(bet_type, camel) for bet_type in ("win", "lose")
-    #                 for camel in [camel for camel in g.CAMELS if camel not in g.player_game_bets[player]]]
-    valid_moves += [(GAME_BET_ACTION_ID, bet_type, camel) for bet_type in ("win", "lose")
-                    for camel in g.CAMELS if camel not in g.get_player_bets(player)]
+    player_bets = g.get_player_bets(player)
+    return [(GAME_BET_ACTION_ID, bet_type, camel) for bet_type in ("win", "lose")
+            for camel in g.CAMELS if camel not in player_bets]
+
+
+class ValidMoveCache:
+    """
+    Stores the parts of the valid move lists between turns. The engine functions invalidate only the parts they affect:
+        - trap moves of all players whenever a camel or a trap moves,
+        - round bet moves whenever a round bet is placed or a round ends,
+        - game bet moves of a player whenever that player places a game bet.
+    The cache is only correct if the game state is changed exclusively through the engine functions, so it is opt-in
+    (see enable_valid_moves_cache()). Game states modified by hand, e.g. in unit tests, should not use a cache.
+    """
+    __slots__ = ("trap_moves", "round_bet_moves", "game_bet_moves")
+
+    def __init__(self):
+        self.trap_moves = {}  # player -> list of trap moves
+        self.round_bet_moves = None
+        self.game_bet_moves = {}  # player -> list of game bet moves
+
+    def invalidate_trap_moves(self):
+        self.trap_moves.clear()
 
-    return valid_moves
+    def invalidate_round_bet_moves(self):
+        self.round_bet_moves = None
+
+    def invalidate_game_bet_moves(self, player):
+        self.game_bet_moves.pop(player, None)
+
+
+def enable_valid_moves_cache(g):
+    """
+    Attach a ValidMoveCache to a game state.
+    :param g: GameState object.
+    :return:
+    """
+    g.valid_moves_cache = ValidMoveCache()
+
+
+def enable_position_hashing(g):
+    """
+    Compute the Zobrist hash of a game state (see zobrist.py) and keep it up to date in g.position_hash. Like the
+    ValidMoveCache, the hash is only correct as long as the game state is changed exclusively through the engine
+    functions.
+    :param g: GameState object.
+    :return: The hash.
+    """
+    g.position_hash = zobrist.compute_hash(g)
+    return g.position_hash
 
 
 def summarize_game_state(g):
@@ -172,17 +841,11 @@ def summarize_game_state(g):
     :param g: GameState object.
     :return:
     """
+    g = _unwrap_view(g)
     summary = {}
-    for camel_id in g.CAMELS:
-        board_loc = [entry for entry in enumerate(g.camel_track) if camel_id in entry[1]]
-        if len(board_loc) > 1:
-            raise ValueError("Multiple locations for same camel!")
-        camel_loc = board_loc[0][0]
-        stack_loc = [entry[0] for entry in enumerate(board_loc[0][1]) if camel_id in entry[1]]
-        if len(stack_loc) > 1:
-            raise ValueError("Multiple locations in stack for camel!")
+    for camel_id, (camel_loc, stack_loc) in zip(g.CAMELS, g.camel_locations()):
         summary["camel_{}_location".format(camel_id)] = camel_loc
-        summary["camel_{}_stack_location".format(camel_id)] = stack_loc[0]
+        summary["camel_{}_stack_location".format(camel_id)] = stack_loc
 
     trap_locations = [entry for entry in enumerate(g.trap_track) if len(entry[1]) > 0]
     for entry in trap_locations:
@@ -195,6 +858,156 @@ def summarize_game_state(g):
     return summary
 
 
+class GameRecord:
+    """
+    Fixed-schema log of a game. Every turn is written as a row of integers into a preallocated array.array with a
+    precomputed column layout, so no strings are formatted and no dictionaries are built while the game is played. The
+    columns are those of summarize_game_state() plus round_id, active_player and the parameters of the action.
+    Categorical values are stored as codes:
+        - action_type: the action IDs of actionids.py
+        - camel: the camel index
+        - bet_type: the index in GAME_BET_TYPES
+    Missing values are stored as -1, except for trap types, which use 0, and coins, which can be negative and use
+    MISSING_COINS.
+    """
+    TYPECODE = "h"
+    MISSING_COINS = -2 ** 15
+    ACTION_COLUMNS = (
+        "round_id", "active_player", "action_type", "camel", "distance", "trap_type", "trap_location", "bet_type")
+
+    def __init__(self, g, capacity=128):
+        """
+        :param g: GameState object to take the camels and players from.
+        :param capacity: Number of rows to preallocate. The array grows automatically.
+        """
+        self.CAMELS = list(g.CAMELS)
+        self.NUM_PLAYERS = g.NUM_PLAYERS
+        self.columns = list(self.ACTION_COLUMNS)
+        self.missing = [-1, -1, -1, -1, -1, 0, -1, -1]
+        self.camel_offset = len(self.columns)
+        for camel_id in self.CAMELS:
+            self.columns += ["camel_{}_location".format(camel_id), "camel_{}_stack_location".format(camel_id)]
+            self.missing += [-1, -1]
+        self.trap_offset = len(self.columns)
+        for player_id in range(self.NUM_PLAYERS):
+            self.columns += ["player_{}_trap_location".format(player_id), "player_{}_trap_type".format(player_id)]
+            self.missing += [-1, 0]
+        self.coins_offset = len(self.columns)
+        for player_id in range(self.NUM_PLAYERS):
+            self.columns.append("player_{}_coins".format(player_id))
+            self.missing.append(self.MISSING_COINS)
+        self.num_columns = len(self.columns)
+        self.data = array.array(self.TYPECODE, self.missing * capacity)
+        self.num_rows = 0
+
+    def __len__(self):
+        return self.num_rows
+
+    def append(self, g, round_id, active_player=-1, action_type=-1, camel=-1, distance=-1, trap_type=0,
+               trap_location=-1, bet_type=-1):
+        """
+        Record the state of the game after a turn.
+        :param g: GameState object.
+        :param round_id: Integer number of the turn, 0 for the starting conditions.
+        :param active_player: Integer ID of the player who acted, -1 for the starting conditions.
+        :param action_type: Action ID of the action, -1 for the starting conditions.
+        :param camel: Camel index of the camel that was moved or bet on, -1 if none.
+        :param distance: Net distance the camel was moved by, -1 if none.
+        :param trap_type: Type of the trap that was placed, 0 if none.
+        :param trap_location: Location of the trap that was placed, -1 if none.
+        :param bet_type: Index in GAME_BET_TYPES of a game bet, -1 if none.
+        :return:
+        """
+        data = self.data
+        if (self.num_rows + 1) * self.num_columns > len(data):
+            data.extend(data)
+        base = self.num_rows * self.num_columns
+        data[base:base + self.camel_offset] = array.array(
+            self.TYPECODE, (round_id, active_player, action_type, camel, distance, trap_type, trap_location, bet_type))
+
+        i = base + self.camel_offset
+        for board_loc, stack_loc in g.camel_locations():
+            data[i] = board_loc
+            data[i + 1] = stack_loc
+            i += 2
+
+        i = base + self.trap_offset
+        data[i:i + 2 * self.NUM_PLAYERS] = array.array(self.TYPECODE, self.missing[self.trap_offset:self.coins_offset])
+        for board_loc, entry in enumerate(g.trap_track):
+            if len(entry) > 0:
+                data[i + 2 * entry[1]] = board_loc
+                data[i + 2 * entry[1] + 1] = entry[0]
+
+        i = base + self.coins_offset
+        data[i:i + self.NUM_PLAYERS] = array.array(self.TYPECODE, g.player_money_values)
+        self.num_rows += 1
+
+    def clear(self):
+        """
+        Remove all rows and keep the allocated memory, e.g. to reuse the record for the next game or turn.
+        :return:
+        """
+        self.num_rows = 0
+
+    def get_row(self, row):
+        """
+        :param row: Integer row index.
+        :return: List of the integer values of the row.
+        """
+        return self.data[row * self.num_columns:(row + 1) * self.num_columns].tolist()
+
+    def to_columns(self):
+        """
+        :return: Dictionary mapping column names to lists of integer values.
+        """
+        values = self.data[:self.num_rows * self.num_columns]
+        return {column: values[i::self.num_columns].tolist() for i, column in enumerate(self.columns)}
+
+    def to_dicts(self):
+        """
+        Export the log in the format of play_game(), i.e. one dictionary per row in which missing values are omitted
+        and categorical values are given by their names.
+        :return: List of dictionaries.
+        """
+        return [self._row_to_dict(self.get_row(row)) for row in range(self.num_rows)]
+
+    def _row_to_dict(self, values):
+        round_id, active_player, action_type, camel, distance, trap_type, trap_location, bet_type = \
+            values[:self.camel_offset]
+        summary = {"round_id": round_id}
+        if active_player != -1:
+            summary["active_player"] = active_player
+        if action_type != -1:
+            summary["action_type"] = ACTION_TYPES[action_type]
+        if action_type == MOVE_CAMEL_ACTION_ID:
+            summary["camel"] = self.CAMELS[camel]
+            summary["distance"] = distance
+        elif action_type == MOVE_TRAP_ACTION_ID:
+            summary["trap_type"] = trap_type
+            summary["trap_location"] = trap_location
+        elif action_type == ROUND_BET_ACTION_ID:
+            summary["camel"] = self.CAMELS[camel]
+        elif action_type == GAME_BET_ACTION_ID:
+            summary["bet_type"] = GAME_BET_TYPES[bet_type]
+            summary["camel"] = self.CAMELS[camel]
+
+        for camel_index, camel_id in enumerate(self.CAMELS):
+            summary["camel_{}_location".format(camel_id)] = values[self.camel_offset + 2 * camel_index]
+            summary["camel_{}_stack_location".format(camel_id)] = values[self.camel_offset + 2 * camel_index + 1]
+
+        # Traps in order of their location like in summarize_game_state()
+        traps = [
+            (values[self.trap_offset + 2 * player_id], player_id) for player_id in range(self.NUM_PLAYERS)
+            if values[self.trap_offset + 2 * player_id + 1] != 0]
+        for trap_loc, player_id in sorted(traps):
+            summary["player_{}_trap_location".format(player_id)] = trap_loc
+            summary["player_{}_trap_type".format(player_id)] = values[self.trap_offset + 2 * player_id + 1]
+
+        for player_id in range(self.NUM_PLAYERS):
+            summary["player_{}_coins".format(player_id)] = values[self.coins_offset + player_id]
+        return summary
+
+
 def roll_dice(move_range):
     """
     Customizable dice roll logic.
@@ -204,25 +1017,61 @@ def roll_dice(move_range):
     return random.randint(*move_range)
 
 
-def print_update(msg, display_updates=True):
-    """
-    A helper function to reduce boilerplate code.
-    :param msg: String. The message to display.
-    :param display_updates: Boolean, whether or not to display the message (this makes the code more flexible and
-        agnostic towards verbosity).
-    :return:
-    """
-    if display_updates:
-        print(msg)
-    return None
+# A turn of play_game_iter(). The fields are the action parameters of GameRecord.append().
+#   - round_id: Integer number of the turn, 0 for the starting conditions.
+#   - active_player: Integer ID of the player who acted, -1 for the starting conditions.
+#   - action_type: Action ID of the action, -1 for the starting conditions.
+#   - camel: Camel index of the camel that was moved or bet on, -1 if none.
+#   - distance: Net distance the camel was moved by, -1 if none.
+#   - trap_type: Type of the trap that was placed, 0 if none.
+#   - trap_location: Location of the trap that was placed, -1 if none.
+#   - bet_type: Index in GAME_BET_TYPES of a game bet, -1 if none.
+Turn = collections.namedtuple("Turn", GameRecord.ACTION_COLUMNS)
+START_TURN = Turn(0, -1, -1, -1, -1, 0, -1, -1)
 
 
-def play_game(players):
+def play_game(players, state_class=GameState, record=False, rng=None, instrumentation=None, event_bus=None, stop=None):
     """
     Play a game until a camel wins. The game loops through players and calls their move() function until a camel passes
     the finish line.
     :param players: A list of instances of player classes that extend PlayerInterface.
-    :return:
+    :param state_class: The game state representation to play with, i.e. GameState or CompactGameState.
+    :param record: If True, the game log is returned as GameRecord instead of a list of dictionaries.
+    :param rng: gamerng.GameRandom or RngTape object to draw the starting positions, camels and dice from. If None, the
+        random module is used.
+    :param instrumentation: instrumentation.Instrumentation object to collect timers and counters in, or None.
+    :param event_bus: gameevents.EventBus object receiving the events of the game, or None.
+    :param stop: See play_game_iter().
+    :return: Tuple (game log, final game state).
+    """
+    game_record = None
+    for turn, g in play_game_iter(
+            players, state_class=state_class, rng=rng, instrumentation=instrumentation, event_bus=event_bus, stop=stop):
+        if game_record is None:
+            game_record = GameRecord(g)
+        game_record.append(g, *turn)
+
+    if record:
+        return game_record, g
+    return game_record.to_dicts(), g
+
+
+def play_game_iter(players, state_class=GameState, rng=None, instrumentation=None, event_bus=None, stop=None):
+    """
+    Play a game like play_game() and yield every turn as it happens instead of collecting a log. The consumer runs
+    between two turns, so it can write the log as the game goes on (see GameRecord and gamelogs.py), and it can end the
+    game early by no longer iterating.
+    :param players: A list of instances of player classes that extend PlayerInterface.
+    :param state_class: The game state representation to play with, i.e. GameState or CompactGameState.
+    :param rng: gamerng.GameRandom or RngTape object to draw the starting positions, camels and dice from. If None, the
+        random module is used.
+    :param instrumentation: instrumentation.Instrumentation object to collect timers and counters in, or None. The time
+        the consumer takes for a turn is counted as logging.
+    :param event_bus: gameevents.EventBus object receiving the events of the game, or None.
+    :param stop: Function stop(g, round_id) called after every turn, or None. If it returns True, the game ends after
+        that turn even if no camel has passed the finish line yet.
+    :return: Generator of tuples (turn, g): the Turn and the game state after it. The first turn is START_TURN, which
+        describes the starting conditions. g is the same object in all tuples and is only valid until the next turn.
     """
 
     # Check that player instances are valid objects
@@ -230,66 +1079,76 @@ def play_game(players):
         raise ValueError("All players must extend PlayerInterface")
 
     def action(result, player):
-        action_params = {}
+        """
+        Perform the action.
+        :return: Tuple of the action parameters of the turn, see Turn.
+        """
         if result[0] == MOVE_CAMEL_ACTION_ID:  # Player wants to move camel
             camel, distance = move_camel(g, player)
-            print_update(
-                msg="Player {} moves camel {} by {} spaces".format(str(player), camel, str(distance)),
-                display_updates=g.verbose)
-            action_params["action_type"] = "move_camel"
-            action_params["camel"] = camel
-            action_params["distance"] = distance
+            return MOVE_CAMEL_ACTION_ID, g.CAMELS.index(camel), distance, 0, -1, -1
         elif result[0] == MOVE_TRAP_ACTION_ID:  # Player wants to place trap
             move_trap(g, result[1], result[2], player)
-            print_update(
-                msg="Player {} moves a {:+d} trap to field {}".format(str(player), result[1], str(result[2])),
-                display_updates=g.verbose)
-            action_params["action_type"] = "move_trap"
-            action_params["trap_type"] = result[1]
-            action_params["trap_location"] = result[2]
+            return MOVE_TRAP_ACTION_ID, -1, -1, result[1], result[2], -1
         elif result[0] == ROUND_BET_ACTION_ID:  # Player wants to make round winner bet
             place_round_winner_bet(g, result[1], player)
-            print_update(
-                msg="Player {} places a round winner bet on camel {}".format(str(player), result[1]),
-                display_updates=g.verbose)
-            action_params["action_type"] = "round_winner_bet"
-            action_params["camel"] = result[1]
+            return ROUND_BET_ACTION_ID, g.CAMELS.index(result[1]), -1, 0, -1, -1
         elif result[0] == GAME_BET_ACTION_ID:  # Player wants to make game winner bet
             # I was inconsistent with the coding and have to flip parameters.
             place_game_bet(g, result[2], result[1], player)
-            print_update(
-                msg="Player {} places a game '{}' bet on camel {}".format(str(player), result[1], result[2]),
-                display_updates=g.verbose)
-            action_params["action_type"] = "game_bet"
-            action_params["bet_type"] = result[1]
-            action_params["camel"] = result[2]
+            return GAME_BET_ACTION_ID, g.CAMELS.index(result[2]), -1, 0, -1, GAME_BET_TYPES.index(result[1])
         else:
             raise ValueError("Illegal action ({}) performed by player {}".format(result, player))
-        return action_params
 
-    g = GameState(num_players=len(players))
+    # Timestamps are only taken when instrumenting, otherwise the checks of 'timed' are the only overhead
+    timed = instrumentation is not None
+    # The engine functions are only patched while a turn is played, not while the consumer runs between turns
+    count_engine_calls = instrumentation.count_engine_calls if timed else contextlib.nullcontext
+    with count_engine_calls():
+        g = state_class(num_players=len(players), rng=rng, event_bus=event_bus)
+        enable_valid_moves_cache(g)
     g_round = 0
 
-    # round_id, active_player, action_string, trap_type, trap_location, camel_id, bet_type, player_1_gold, ...,
-    # player_n_gold, camel_1_location, ..., camel_m_location, trap_1_location, ..., trap_j_location
-
-    action_log = [{"round_id": g_round, **summarize_game_state(g)}]
+    yield START_TURN, g
     while g.active_game:
         active_player = (g_round % len(players))
-        player_action = players[active_player].move(active_player, g.get_player_copy(active_player))
-        if player_action not in get_valid_moves(g=g, player=active_player):
-            raise IllegalMoveException("Player {} made an illegal move".format(active_player))
-        action_summary = action(result=player_action, player=active_player)
-        g_round += 1
-        display_game_state(g)
-        action_log.append({
-            "round_id": g_round,
-            "active_player": active_player,
-            **action_summary,
-            **summarize_game_state(g)})
-
-    # print_update("{}".format(str(g.player_money_values)[1:-1]), display_updates=True)
-    return action_log, g
+        with count_engine_calls():
+            if timed:
+                t_start = time.perf_counter()
+            player_view = g.get_player_view(active_player)
+            if timed:
+                t_view = time.perf_counter()
+            player_action = players[active_player].move(active_player, player_view)
+            if timed:
+                t_move = time.perf_counter()
+            if not is_valid_move(g=g, player=active_player, action=player_action):
+                raise IllegalMoveException("Player {} made an illegal move".format(active_player))
+            if timed:
+                t_validation = time.perf_counter()
+            g_round += 1
+            action_summary = action(result=player_action, player=active_player)
+            if timed:
+                t_action = time.perf_counter()
+        if timed:
+            t_yield = time.perf_counter()
+        yield Turn(g_round, active_player, *action_summary), g
+        if timed:
+            t_logging = time.perf_counter()
+        if g.event_bus:
+            g.event_bus.emit(TurnEnded(g_round, active_player, g))
+        if timed:
+            t_events = time.perf_counter()
+            instrumentation.add_time("player_view", t_view - t_start)
+            instrumentation.add_time("bot_move", t_move - t_view)
+            instrumentation.add_think_time(active_player, t_move - t_view)
+            instrumentation.add_time("validation", t_validation - t_move)
+            instrumentation.add_time("action", t_action - t_validation)
+            instrumentation.add_time("logging", t_logging - t_yield)
+            instrumentation.add_time("events", t_events - t_logging)
+            instrumentation.num_turns += 1
+        if stop is not None and stop(g, g_round):
+            break
+    if timed:
+        instrumentation.num_games += 1
 
 
 def move_camel(g, player):
@@ -300,44 +1159,80 @@ def move_camel(g, player):
     :param player: Player ID integer.
     :return:
     """
+    camel_index, distance = draw_camel_move(g)
+    return move_camel_with_roll(g, player, camel_index, distance)
+
+
+def draw_camel_move(g):
+    """
+    Draws the camel to move and its dice roll, from the random number stream of the game state if it has one (see
+    gamerng.py) and from the random module otherwise.
+    :param g: GameState object.
+    :return: Tuple (camel_index, roll).
+    """
+    if g.rng is not None:
+        return g.rng.choose_camel(g.camel_yet_to_move), g.rng.roll_dice(g.MOVE_RANGE)
+
     # Select a random camel to move
     camel_index = random.choice([i for i in range(g.NUM_CAMELS) if g.camel_yet_to_move[i]])
 
+    # Roll the dice
+    distance = roll_dice(g.MOVE_RANGE)
+
+    return camel_index, distance
+
+
+def move_camel_with_roll(g, player, camel_index, distance):
+    """
+    Moves the given camel by the given dice roll, i.e. move_camel() with a known outcome. Search-based bots can use
+    this to evaluate every possible outcome of moving a camel.
+    :param g: GameState object.
+    :param player: Player ID integer.
+    :param camel_index: Camel index integer of a camel that hasn't moved this round yet.
+    :param distance: Dice roll, an integer within MOVE_RANGE.
+    :return: Tuple of the camel ID and the distance it moved, taking traps into account.
+    """
     # Remove camel from pool
     g.camel_yet_to_move[camel_index] = False
 
-    # Find current position of camel on board and in camel stack
-    [curr_pos, found_y_pos] = [
-        (ix, iy) for ix, row in enumerate(g.camel_track) for iy, i in enumerate(row)
-        if i == g.CAMELS[camel_index]][0]
+    # Find current position of camel on board
+    curr_pos, _ = g.camel_location(camel_index)
 
-    # Roll the dice
-    distance = roll_dice(g.MOVE_RANGE)
+    # Remove the keys of the features the move changes from the position hash: the two stacks involved, the camel's
+    # turn and the coins of the rolling player and of the owner of a trap the camel hits
+    if g.position_hash is not None:
+        trap = g.trap_track[curr_pos + distance]
+        changed_fields = {curr_pos, curr_pos + distance + (trap[0] if len(trap) > 0 else 0)}
+        paid_players = {player, trap[1]} if len(trap) > 0 else {player}
+        position_hash = (
+            g.position_hash ^ zobrist.stacks_key(g, changed_fields) ^ zobrist.coins_key(g, paid_players) ^
+            zobrist.get_key("to_move", camel_index))
 
     # Check if camel hits a trap
+    roll = distance
     stack_from_bottom = False
     if len(g.trap_track[curr_pos + distance]) > 0:
-        print_update("Player hit a trap!", display_updates=g.verbose)
+        if g.event_bus:
+            g.event_bus.emit(TrapHit(
+                player, g.CAMELS[camel_index], curr_pos + distance, g.trap_track[curr_pos + distance][0],
+                g.trap_track[curr_pos + distance][1]))
         if g.trap_track[curr_pos + distance][0] == -1:
             stack_from_bottom = True
         g.player_money_values[g.trap_track[curr_pos + distance][1]] += 1  # Give the player who set the trap a coin
         distance += g.trap_track[curr_pos + distance][0]  # Change the distance according to trap
 
-    # Move camels. If a camel hits a -1 trap, the stack is inverted
-    camels_to_move = g.camel_track[curr_pos][found_y_pos:]
-    g.camel_track[curr_pos] = g.camel_track[curr_pos][0:found_y_pos]
-    if stack_from_bottom:
-        g.camel_track[curr_pos + distance] = camels_to_move + g.camel_track[curr_pos + distance]
-    else:
-        g.camel_track[curr_pos + distance] = g.camel_track[curr_pos + distance] + camels_to_move
+    # Move camels. If a camel hits a -1 trap, the stack is placed underneath the camels on the target field
+    g.move_camel_stack(camel_index, distance, stack_from_bottom)
+    if g.valid_moves_cache is not None:
+        g.valid_moves_cache.invalidate_trap_moves()
 
     # Give the rolling player a coin
     g.player_money_values[player] += 1
+    if g.position_hash is not None:
+        g.position_hash = position_hash ^ zobrist.stacks_key(g, changed_fields) ^ zobrist.coins_key(g, paid_players)
 
-    # Print update
-    print_update(
-        msg="Player {} moves camel {} by {} spaces".format(str(player), g.CAMELS[camel_index], str(distance)),
-        display_updates=g.verbose)
+    if g.event_bus:
+        g.event_bus.emit(CamelMoved(player, g.CAMELS[camel_index], roll, distance))
 
     # If round is over, trigger End Of Round effects
     end_of_round_scored = False
@@ -346,7 +1241,7 @@ def move_camel(g, player):
         end_of_round_scored = True
 
     # If game is over, trigger End Of Game and round effects
-    if len([field for field in g.camel_track[g.BOARD_SIZE:] if len(field) > 0]) > 0:
+    if g.has_camel_finished():
         # Make sure to not score the end of the round twice if the end of the game happens to be
         # a natural end of a round
         if not end_of_round_scored:
@@ -367,10 +1262,7 @@ def move_trap(g, trap_type, trap_place, player):
     :param player: Player ID integer.
     :return:
     """
-    # TODO: Remove dummy_track and validity checks here and integrate the corresponding unit tests into ValidMovesTest.
-    # Create a temporary dummy track
-    dummy_track = copy.deepcopy(g.trap_track)
-
+    # TODO: Remove validity checks here and integrate the corresponding unit tests into ValidMovesTest.
     # Check if player has places the trap and remove it if so
     remove_old_trap = False
     curr_pos = None
@@ -384,7 +1276,6 @@ def move_trap(g, trap_type, trap_place, player):
             raise ValueError("Old and new trap position/type are identical")
 
         remove_old_trap = True
-        dummy_track[curr_pos[0]] = []
 
     # Place trap in new position
     # Check that trap_place and trap_type are legal
@@ -398,16 +1289,23 @@ def move_trap(g, trap_type, trap_place, player):
     #       computational overhead so it's not a priority when optimizing the code. The ValueErrors raised here would
     #       break the game flow if they are ever raised, so a lack of errors indicates that play_game() is checking
     #       the moves correctly.
-    if len(g.camel_track[trap_place]) != 0:
+    if g.stack_height(trap_place) != 0:
         raise ValueError("trap_place occupied by camel")
-    if (len(dummy_track[trap_place - 1]) != 0) or \
-       (len(dummy_track[trap_place]) != 0) or \
-       (len(dummy_track[trap_place + 1]) != 0):
+    # The player's own trap doesn't count as it is removed
+    if any(len(entry) != 0 and entry[1] != player for entry in g.trap_track[trap_place - 1:trap_place + 2]):
         raise ValueError("trap_place occupied by or next to an existing trap")
 
     if remove_old_trap:
         g.trap_track[curr_pos[0]] = []
     g.trap_track[trap_place] = [trap_type, player]
+    if g.position_hash is not None:
+        if remove_old_trap:
+            g.position_hash ^= zobrist.trap_key(curr_pos[0], curr_pos[1], player)
+        g.position_hash ^= zobrist.trap_key(trap_place, trap_type, player)
+    if g.valid_moves_cache is not None:
+        g.valid_moves_cache.invalidate_trap_moves()
+    if g.event_bus:
+        g.event_bus.emit(TrapMoved(player, trap_type, trap_place))
     return True
 
 
@@ -426,11 +1324,19 @@ def place_game_bet(g, camel, bet_type, player):
         raise ValueError("Player {} has already bet on camel {}".format(player, camel))
 
     if bet_type == "win":
-        g.game_winner_bets.append([camel, player])
+        bets = g.game_winner_bets
     elif bet_type == "lose":
-        g.game_loser_bets.append([camel, player])
+        bets = g.game_loser_bets
     else:
         raise ValueError("{} is an invalid bet type".format(bet_type))
+    if g.position_hash is not None:
+        g.position_hash ^= zobrist.get_key(
+            "bet", bet_type, camel, len([bet for bet in bets if bet[0] == camel]), player)
+    bets.append([camel, player])
+    if g.valid_moves_cache is not None:
+        g.valid_moves_cache.invalidate_game_bet_moves(player)
+    if g.event_bus:
+        g.event_bus.emit(GameBetPlaced(player, bet_type, camel))
 
 
 def place_round_winner_bet(g, camel, player):
@@ -442,9 +1348,16 @@ def place_round_winner_bet(g, camel, player):
     :return:
     """
     # TODO: Remove this check and integrate corresponding tests into ValidMovesTest.
-    if (ROUND_BET_ACTION_ID, camel) not in get_valid_moves(g, player):
+    if not is_valid_move(g, player, (ROUND_BET_ACTION_ID, camel)):
         raise ValueError("Player {} attempted to make an invalid round bet on camel {}".format(player, camel))
+    if g.position_hash is not None:
+        g.position_hash ^= zobrist.get_key(
+            "bet", "round", camel, len([bet for bet in g.round_bets if bet[0] == camel]), player)
     g.round_bets.append([camel, player])
+    if g.valid_moves_cache is not None:
+        g.valid_moves_cache.invalidate_round_bet_moves()
+    if g.event_bus:
+        g.event_bus.emit(RoundBetPlaced(player, camel))
     return True
 
 
@@ -459,6 +1372,10 @@ def end_of_round(g):
 
     first_place_camel = find_camel_in_nth_place(g, 1)
     second_place_camel = find_camel_in_nth_place(g, 2)
+    if g.position_hash is not None:
+        position_hash = (
+            g.position_hash ^ zobrist.camels_to_move_key(g) ^ zobrist.bets_key(g.round_bets, "round") ^
+            zobrist.coins_key(g))
 
     # Payout
     for bet in g.round_bets:
@@ -466,26 +1383,30 @@ def end_of_round(g):
             payout = g.FIRST_PLACE_ROUND_PAYOUT[first_place_payout_index]
             g.player_money_values[bet[1]] += payout
             first_place_payout_index += 1
-            print_update(
-                msg="Paid player #{} {} coins for selecting the round winner".format(bet[1], payout),
-                display_updates=g.verbose)
+            if g.event_bus:
+                g.event_bus.emit(BetPaid(bet[1], payout, "round", "first", bet[0]))
         elif bet[0] == second_place_camel:
             payout = g.SECOND_PLACE_ROUND_PAYOUT[second_place_payout_index]
             g.player_money_values[bet[1]] += payout
             second_place_payout_index += 1
-            print_update(
-                msg="Paid player #{} {} coins for selecting the round runner up".format(bet[1], payout),
-                display_updates=g.verbose)
+            if g.event_bus:
+                g.event_bus.emit(BetPaid(bet[1], payout, "round", "second", bet[0]))
         else:
             payout = g.THIRD_OR_WORSE_PLACE_ROUND_PAYOUT
             g.player_money_values[bet[1]] += payout
-            print_update(
-                msg="Paid player #{} {} coins for selecting the third or worse camel".format(bet[1], payout),
-                display_updates=g.verbose)
+            if g.event_bus:
+                g.event_bus.emit(BetPaid(bet[1], payout, "round", "other", bet[0]))
+
+    if g.event_bus:
+        g.event_bus.emit(RoundSettled(first_place_camel, second_place_camel, list(g.player_money_values)))
 
     # Prepare GameState for the beginning of next round
-    g.camel_yet_to_move = [True, True, True, True, True]
+    g.camel_yet_to_move = [True] * g.NUM_CAMELS
     g.round_bets = []  # clear round bets
+    if g.position_hash is not None:
+        g.position_hash = position_hash ^ zobrist.camels_to_move_key(g) ^ zobrist.coins_key(g)
+    if g.valid_moves_cache is not None:
+        g.valid_moves_cache.invalidate_round_bet_moves()
 
     # Uncomment this if traps should be reset to their players after each round
     # g.trap_track = [[] for i in range(finish_line)]
@@ -501,6 +1422,8 @@ def end_of_game(g):
     """
     winning_camel = find_camel_in_nth_place(g, 1)  # Find camel that won
     losing_camel = find_camel_in_nth_place(g, g.NUM_CAMELS)  # Find camel that lost
+    if g.position_hash is not None:
+        position_hash = g.position_hash ^ zobrist.coins_key(g) ^ zobrist.game_over_key(g)
 
     # Settle bets on winning camel
     payout_index = 0
@@ -508,16 +1431,13 @@ def end_of_game(g):
         if bet[0] == winning_camel:
             payout = g.get_game_bets_payout(payout_index)
             g.player_money_values[bet[1]] += payout
-            print_update(
-                msg="Paid Player #{} {} coins for betting on the game winner".format(bet[1], payout),
-                display_updates=g.verbose)
+            if g.event_bus:
+                g.event_bus.emit(BetPaid(bet[1], payout, "game_winner", "correct", bet[0]))
             payout_index += 1
         else:
-            print_update(
-                msg="Paid Player #{} {} coins for incorrectly betting on the game winner".format(
-                    bet[1], g.BAD_GAME_END_BET),
-                display_updates=g.verbose)
             g.player_money_values[bet[1]] += g.BAD_GAME_END_BET
+            if g.event_bus:
+                g.event_bus.emit(BetPaid(bet[1], g.BAD_GAME_END_BET, "game_winner", "incorrect", bet[0]))
 
     # Settle bets on losing camel
     payout_index = 0
@@ -525,19 +1445,20 @@ def end_of_game(g):
         if bet[0] == losing_camel:
             payout = g.get_game_bets_payout(payout_index)
             g.player_money_values[bet[1]] += payout
-            print_update(
-                msg="Paid Player #{} {} coins for betting on the game loser".format(bet[1], payout),
-                display_updates=g.verbose)
+            if g.event_bus:
+                g.event_bus.emit(BetPaid(bet[1], payout, "game_loser", "correct", bet[0]))
             payout_index += 1
         else:
-            print_update(
-                msg="Paid Player #{} {} coins for incorrectly betting on the game loser".format(
-                    bet[1], g.BAD_GAME_END_BET),
-                display_updates=g.verbose)
             g.player_money_values[bet[1]] += g.BAD_GAME_END_BET
+            if g.event_bus:
+                g.event_bus.emit(BetPaid(bet[1], g.BAD_GAME_END_BET, "game_loser", "incorrect", bet[0]))
 
     g.active_game = False
     g.game_winner = [i for i, j in enumerate(g.player_money_values) if j == max(g.player_money_values)]
+    if g.position_hash is not None:
+        g.position_hash = position_hash ^ zobrist.coins_key(g) ^ zobrist.game_over_key(g)
+    if g.event_bus:
+        g.event_bus.emit(GameEnded(winning_camel, losing_camel, list(g.game_winner), list(g.player_money_values)))
     return True
 
 
@@ -548,21 +1469,10 @@ def find_camel_in_nth_place(g, n):
     :param n: Integer denoting the place to retrieve, e.g 2 for second place.
     :return:
     """
-    track = g.camel_track
+    g = _unwrap_view(g)
     if n > g.NUM_CAMELS or n < 1:
         raise ValueError('Something tried to find a camel in a Nth place, where N is out of bounds')
-    found_camel = False
-    camels_counted = 0
-    i = 1
-    while not found_camel:
-        dtg = n - camels_counted
-        camels_in_stack = len(track[len(track) - i])
-        if camels_in_stack >= dtg:
-            return track[len(track) - i][camels_in_stack - dtg]
-        else:
-            camels_counted += camels_in_stack
-            i += 1
-    return False
+    return g.camel_in_nth_place(n)
 
 
 def display_game_state(g):
@@ -572,15 +1482,25 @@ def display_game_state(g):
     :return:
     """
     if g.verbose:
-        print("Track:")
-        display_track_state(g, g.camel_track)
-        print("\n")
-        print("Traps:")
-        display_track_state(g, g.trap_track)
-        print("\n")
-        print("$ Totals:")
-        print("\t" + str(g.player_money_values))
-        print("\n")
+        print_game_state(g)
+
+
+def print_game_state(g):
+    """
+    Print the state of the game regardless of g.verbose, see display_game_state(). This is what
+    gameevents.ConsoleSubscriber prints after every turn.
+    :param g: GameState object.
+    :return:
+    """
+    print("Track:")
+    print_track_state(g, g.camel_track)
+    print("\n")
+    print("Traps:")
+    print_track_state(g, g.trap_track)
+    print("\n")
+    print("$ Totals:")
+    print("\t" + str(g.player_money_values))
+    print("\n")
 
 
 def display_track_state(g, track):
@@ -592,7 +1512,16 @@ def display_track_state(g, track):
     """
     if not g.verbose:
         return None
+    print_track_state(g, track)
 
+
+def print_track_state(g, track):
+    """
+    Print the state of either the camel track or the trap track regardless of g.verbose, see display_track_state().
+    :param g: GameState object.
+    :param track: A list of lists/tuples. Either g.camel_track or g.trap_track.
+    :return:
+    """
     max_stack = len(max(track, key=len))
 
     # Print milestones
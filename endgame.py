@@ -0,0 +1,330 @@
+"""
+Search of the end of the game.
+
+Once a camel is within a few fields of the finish line, the game is short enough to search: solve_endgame() runs an
+expectimax search over the actions of all players and the outcomes of the dice. Every player maximizes their own
+final coins (max-n), including the payouts of pending round bets and game bets. Moving a camel is a chance node over
+gametree.get_camel_move_outcomes().
+
+The search deepens iteratively, one player turn (ply) at a time, until the game ends in every line of the search, the
+maximum number of plies is reached or the time budget is used up. Positions at the search horizon are scored with
+evaluate_position(), the expected final coins if only the camels move from there on. Solving the race is the
+expensive part of it, so the race probabilities are computed with the traps of the root position and shared by all
+positions with the same camels; the round outcomes use the actual traps. Results are exact if the game ends before the
+horizon everywhere. Before the search starts, every action gets a cheap static value, so a result
+always values all actions, even if the budget doesn't suffice for a search of depth 1.
+
+Searched positions are memoized in a zobrist.TranspositionTable keyed by the position hash and the player to move.
+Chance nodes are pruned like in Star1: once the outcomes searched so far and an upper bound on the coins of the moving
+player in the remaining outcomes show that moving a camel can't beat another action of the same player, the remaining
+outcomes are skipped. Values of the legal actions at the root are always computed in full.
+
+To keep the search finite, a player may move their trap only once between two camel moves. On a player view, the
+hidden game bets of the other players are ignored.
+"""
+import collections
+import copy
+import time
+import camelup
+import gametree
+import racesolver
+import roundoutcomes
+import zobrist
+from actionids import MOVE_TRAP_ACTION_ID, MOVE_CAMEL_ACTION_ID
+
+# Result of solve_endgame()
+#   - action_values: Dictionary mapping the legal actions of the player to their expected final coins.
+#   - exact: Whether the game ended before the horizon in every line of the search.
+#   - plies: Depth of the search in player turns.
+#   - nodes: Number of positions searched, including the positions at the horizon.
+EndgameResult = collections.namedtuple("EndgameResult", ["action_values", "exact", "plies", "nodes"])
+
+# Depth of transposition table entries whose value doesn't depend on the horizon
+EXACT_DEPTH = 2 ** 30
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+def is_endgame(g, max_distance=None):
+    """
+    Check whether the leading camel is close enough to the finish line for solve_endgame().
+    :param g: GameState object.
+    :param max_distance: Maximum distance of the leading camel to the finish line, by default the maximum dice roll.
+    :return: Boolean.
+    """
+    if max_distance is None:
+        max_distance = g.MOVE_RANGE[1]
+    leader_location = max(board_loc for board_loc, _ in g.camel_locations())
+    return g.active_game and g.BOARD_SIZE - leader_location <= max_distance
+
+
+def evaluate_position(g, race_probabilities=None):
+    """
+    The expected final coins of each player if only the camels move from now on, with the exact probabilities of
+    roundoutcomes.py and racesolver.py.
+    :param g: GameState object.
+    :param race_probabilities: Return value of racesolver.get_placement_probabilities() to use instead of solving the
+        race, or None. Passing the probabilities of a position with the same camels but other traps gives a cheap
+        approximation.
+    :return: Tuple of expected coins by player.
+    """
+    round_probabilities, trap_income = roundoutcomes.get_round_outcome_probabilities(g)
+    if race_probabilities is None:
+        race_probabilities = racesolver.get_placement_probabilities(g)
+    return get_expected_coins(g, round_probabilities, trap_income, race_probabilities)
+
+
+def get_expected_coins(g, round_probabilities, trap_income, race_probabilities):
+    """
+    The expected final coins of each player given the probabilities of the round and race outcomes.
+    :param g: GameState object.
+    :param round_probabilities: Placement probabilities of roundoutcomes.get_round_outcome_probabilities().
+    :param trap_income: Expected trap income of roundoutcomes.get_round_outcome_probabilities().
+    :param race_probabilities: Return value of racesolver.get_placement_probabilities().
+    :return: Tuple of expected coins by player.
+    """
+    values = [coins + income for coins, income in zip(g.player_money_values, trap_income)]
+
+    cards = collections.Counter()
+    for camel, player in g.round_bets:
+        p_first, p_second, p_other = round_probabilities[camel]
+        values[player] += (
+            p_first * g.FIRST_PLACE_ROUND_PAYOUT[cards[camel]] + p_second * g.SECOND_PLACE_ROUND_PAYOUT[cards[camel]] +
+            p_other * g.THIRD_OR_WORSE_PLACE_ROUND_PAYOUT)
+        cards[camel] += 1
+
+    for bets, place in ((g.game_winner_bets, 0), (g.game_loser_bets, g.NUM_CAMELS - 1)):
+        cards = collections.Counter()
+        for camel, player in bets:
+            p = race_probabilities[camel][place]
+            # The k-th correct bet on a camel gets the k-th payout. Bets on the same camel are correct together.
+            values[player] += p * g.get_game_bets_payout(cards[camel]) + (1 - p) * g.BAD_GAME_END_BET
+            cards[camel] += 1
+    return tuple(values)
+
+
+def solve_endgame(g, player, time_budget=None, max_plies=8, table=None, actions=None):
+    """
+    Compute the value of each legal action of a player, see the module documentation.
+    :param g: GameState object or player view.
+    :param player: Player ID integer.
+    :param time_budget: Maximum time in seconds, or None. If the budget runs out, the result of the deepest completed
+        search is returned. If not even the search of depth 1 completes, the static values of the actions are returned
+        with plies=0 (see _Search.static_values()). Those are always computed, even beyond the budget.
+    :param max_plies: Maximum depth of the search in player turns.
+    :param table: zobrist.TranspositionTable object to reuse between calls, or None.
+    :param actions: List of actions to value, or None for all legal actions.
+    :return: EndgameResult.
+    """
+    search = _Search(g, time_budget, table)
+    if actions is None:
+        actions = camelup.get_valid_moves(search.g, player)
+    result = EndgameResult(search.static_values(player, actions), False, 0, search.nodes)
+    for plies in range(1, max_plies + 1):
+        action_values = {}
+        try:
+            exact = True
+            # Search the best action of the previous depth first, it is the most likely to be needed in full
+            for action in sorted(actions, key=lambda a: -result.action_values[a]):
+                values, action_exact = search.action_value(player, action, plies, 0, float("-inf"))
+                action_values[action] = values[player]
+                exact = exact and action_exact
+        except SearchTimeout:
+            break
+        result = EndgameResult(action_values, exact, plies, search.nodes)
+        if exact:
+            break
+    return result
+
+
+class _Search:
+    """
+    State of a search by solve_endgame(). The search applies and undoes moves on a private copy of the game state.
+    """
+
+    def __init__(self, g, time_budget, table):
+        if isinstance(g, camelup.PlayerView):
+            g = copy.deepcopy(g)
+        else:
+            g = copy.deepcopy(g, memo={id(g.rng): None, id(g.event_bus): None})
+        g.game_winner_bets = [bet for bet in g.game_winner_bets if bet[0] is not None]
+        g.game_loser_bets = [bet for bet in g.game_loser_bets if bet[0] is not None]
+        g.verbose = False
+        g.event_bus = None
+        camelup.enable_valid_moves_cache(g)
+        camelup.enable_position_hashing(g)
+        self.g = g
+        self.deadline = None if time_budget is None else time.perf_counter() + time_budget
+        self.table = zobrist.TranspositionTable(max_entries=2 ** 18) if table is None else table
+        self.nodes = 0
+        # Race probabilities by the camel locations and the camels yet to move, see race_probabilities()
+        self.race = {}
+        self.root_trap_track = copy.deepcopy(g.trap_track)
+
+        # Maximum coins a player can gain in one turn of their own: a bet, or moving a camel onto their own trap
+        self.turn_gain = max(
+            2, max(g.FIRST_PLACE_ROUND_PAYOUT), max(g.SECOND_PLACE_ROUND_PAYOUT), max(g.GAME_END_PAYOUT))
+
+    def race_probabilities(self):
+        """
+        The race placement probabilities of the searched game state, memoized by the camels. They are computed with
+        the traps of the root position, so positions that only differ in bets, coins or traps share them.
+        :return: Return value of racesolver.get_placement_probabilities().
+        """
+        g = self.g
+        key = (tuple(g.camel_locations()), tuple(g.camel_yet_to_move))
+        probabilities = self.race.get(key)
+        if probabilities is None:
+            trap_track = g.trap_track
+            g.trap_track = self.root_trap_track
+            try:
+                probabilities = self.race[key] = racesolver.get_placement_probabilities(g)
+            finally:
+                g.trap_track = trap_track
+        return probabilities
+
+    def evaluate(self):
+        """
+        evaluate_position() of the searched game state, with the race probabilities of race_probabilities().
+        :return: Tuple of expected coins by player.
+        """
+        return evaluate_position(self.g, self.race_probabilities())
+
+    def static_values(self, player, actions):
+        """
+        Cheap values of the actions of a player, used before the search of depth 1 completes. Moving a camel is worth
+        its coin on top of evaluate_position(), which doesn't change in expectation when a camel moves. The other
+        actions are evaluated after applying them like positions at the horizon. They don't move camels, so this only
+        solves the race of the current position.
+        :param player: Player ID integer.
+        :param actions: List of legal actions of the player.
+        :return: Dictionary mapping the actions to expected final coins.
+        """
+        g = self.g
+        if not g.active_game:
+            return {action: g.player_money_values[player] for action in actions}
+        current = self.evaluate()
+        action_values = {}
+        for action in actions:
+            if action[0] == MOVE_CAMEL_ACTION_ID:
+                action_values[action] = current[player] + 1
+                continue
+            token = gametree.apply_move(g, player, action)
+            try:
+                action_values[action] = self.evaluate()[player]
+            finally:
+                gametree.undo_move(g, token)
+        return action_values
+
+    def value(self, player, plies, moved_traps):
+        """
+        :param player: Player to move.
+        :param plies: Remaining depth.
+        :param moved_traps: Bit mask of the players that moved their trap since the last camel move.
+        :return: Tuple (values, exact): the expected final coins of each player and whether they are independent of
+            the horizon.
+        """
+        g = self.g
+        if not g.active_game:
+            return tuple(g.player_money_values), True
+        # Evaluating a position at the horizon can take longer than searching one, so the time is checked for both
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+        self.nodes += 1
+        if plies == 0:
+            return self.evaluate(), False
+
+        key = (g.position_hash, player, moved_traps)
+        entry = self.table.lookup(key, min_depth=plies)
+        if entry is not None:
+            values, best_action = entry[0]
+            return values, entry[1] == EXACT_DEPTH
+
+        actions = camelup.get_valid_moves(g, player)
+        if moved_traps & (1 << player):
+            actions = [action for action in actions if action[0] != MOVE_TRAP_ACTION_ID]
+        # Search the best action of a shallower search first
+        entry = self.table.lookup(key, count=False)
+        if entry is not None and entry[0][1] in actions:
+            actions.remove(entry[0][1])
+            actions.insert(0, entry[0][1])
+
+        best, best_action, exact = None, None, True
+        for action in actions:
+            alpha = float("-inf") if best is None else best[player]
+            result = self.action_value(player, action, plies, moved_traps, alpha)
+            if result is None:
+                # Pruned, the action is no better than the best one
+                exact = False
+                continue
+            values, action_exact = result
+            exact = exact and action_exact
+            if best is None or values[player] > best[player]:
+                best, best_action = values, action
+
+        self.table.store(key, (best, best_action), EXACT_DEPTH if exact else plies)
+        return best, exact
+
+    def action_value(self, player, action, plies, moved_traps, alpha):
+        """
+        :param player: Player to move.
+        :param action: Legal action of the player.
+        :param plies: Remaining depth, including the turn of the player.
+        :param moved_traps: See value().
+        :param alpha: Value of the best action of the player so far. Camel moves that can't beat it are pruned.
+        :return: Tuple (values, exact) like value(), or None if the action was pruned.
+        """
+        g = self.g
+        next_player = (player + 1) % g.NUM_PLAYERS
+        if action[0] != MOVE_CAMEL_ACTION_ID:
+            token = gametree.apply_move(g, player, action)
+            try:
+                if action[0] == MOVE_TRAP_ACTION_ID:
+                    moved_traps |= 1 << player
+                return self.value(next_player, plies - 1, moved_traps)
+            finally:
+                gametree.undo_move(g, token)
+
+        upper = self.upper_bound(player, plies) if alpha > float("-inf") else None
+        values = [0.0] * g.NUM_PLAYERS
+        remaining_probability = 1.0
+        exact = True
+        for camel_index, roll, probability in gametree.get_camel_move_outcomes(g):
+            token = gametree.apply_move(g, player, (MOVE_CAMEL_ACTION_ID,), outcome=(camel_index, roll))
+            try:
+                outcome_values, outcome_exact = self.value(next_player, plies - 1, 0)
+            finally:
+                gametree.undo_move(g, token)
+            for i in range(g.NUM_PLAYERS):
+                values[i] += probability * outcome_values[i]
+            exact = exact and outcome_exact
+            remaining_probability -= probability
+            if upper is not None and values[player] + remaining_probability * upper <= alpha:
+                return None
+        return tuple(values), exact
+
+    def upper_bound(self, player, plies):
+        """
+        An upper bound of the value of a player within the next plies, used to prune chance nodes.
+        :param player: Player ID integer.
+        :param plies: Remaining depth, starting with a turn of the player.
+        :return: Number of coins.
+        """
+        g = self.g
+        # Trap income until the end of the round is part of evaluate_position()
+        upper = g.player_money_values[player] + g.NUM_CAMELS
+        cards = collections.Counter()
+        for camel, bet_player in g.round_bets:
+            if bet_player == player:
+                upper += max(
+                    g.FIRST_PLACE_ROUND_PAYOUT[cards[camel]], g.SECOND_PLACE_ROUND_PAYOUT[cards[camel]],
+                    g.THIRD_OR_WORSE_PLACE_ROUND_PAYOUT)
+            cards[camel] += 1
+        for camel, bet_player in g.game_winner_bets + g.game_loser_bets:
+            if bet_player == player:
+                upper += max(g.GAME_END_PAYOUT)
+        # Each own turn gains at most turn_gain, each other turn at most a coin from the trap of the player
+        own_turns = (plies + g.NUM_PLAYERS - 1) // g.NUM_PLAYERS
+        return upper + own_turns * self.turn_gain + (plies - own_turns)
@@ -0,0 +1,246 @@
+"""
+Compact binary encoding of game states, e.g. to send them to other processes or to store snapshots.
+
+A GameCodec is created once per game from its constants (number of camels and players, board size, payouts). The
+constants are sent once as JSON (encode_constants()), every game state only as its mutable part: a few dozen bytes of
+small little-endian integers. The layout of an encoded state is
+    - player_money_values: int16 per player
+    - flags: int8, bit 0 is active_game
+    - camel_positions, camel_heights, camel_yet_to_move: int8 per camel, indexed by camel index
+    - trap_locations, trap_types: int8 per player, -1 and 0 if the player has no trap on the board
+    - the number of round bets, game winner bets, game loser bets and game winners: uint8 each
+    - round_bets, game_winner_bets, game_loser_bets: pairs of int8 (camel index, player) in the order of the bets,
+      -1 for hidden bets of player views
+    - game_winner: int8 per winner
+decode() restores an equal game state, by default a camelup.CompactGameState, whose camel lists are filled directly
+from the encoding. view() decodes nothing at all: it returns an EncodedGameState whose fields are NumPy arrays backed
+by the encoded bytes.
+
+The random number stream, the event bus, verbose, the valid moves cache and the position hash are not encoded. Decoded
+states draw from the random module and have neither cache nor hash, see camelup.enable_valid_moves_cache() and
+camelup.enable_position_hashing().
+"""
+import json
+import struct
+import numpy as np
+import camelup
+
+FORMAT_VERSION = 1
+
+# Constants of a game state and the arguments of BaseGameState.__init__() they are passed as
+_CONSTANTS = (
+    ("NUM_CAMELS", "num_camels"), ("NUM_PLAYERS", "num_players"), ("BOARD_SIZE", "board_size"),
+    ("MOVE_RANGE", "move_range"), ("FIRST_PLACE_ROUND_PAYOUT", "first_place_round_payout"),
+    ("SECOND_PLACE_ROUND_PAYOUT", "second_place_round_payout"),
+    ("THIRD_OR_WORSE_PLACE_ROUND_PAYOUT", "third_or_worse_place_round_payout"),
+    ("GAME_END_PAYOUT", "game_end_payout"), ("BAD_GAME_END_BET", "bad_game_end_bet"))
+
+
+class GameCodec:
+    """
+    Encoder and decoder of the states of games with the same constants, see the module documentation.
+    """
+
+    def __init__(self, g):
+        """
+        :param g: Game state or player view to take the constants from.
+        """
+        self.constants = {key: getattr(g, key) for key, _ in _CONSTANTS}
+        self.constants["CAMELS"] = list(g.CAMELS)
+        if 2 * g.BOARD_SIZE > 127:
+            raise ValueError("Board size {} is too large for the encoding".format(g.BOARD_SIZE))
+        self.camel_indices = {camel: i for i, camel in enumerate(g.CAMELS)}
+        self.camel_indices[None] = -1
+        # Camel IDs by camel index, the last entry is the hidden camel of index -1
+        self.camel_ids = list(g.CAMELS) + [None]
+        self.track_size = 2 * g.BOARD_SIZE
+        # Attributes of a decoded state that are not encoded
+        self._attributes = [(key, self.constants[key]) for key, _ in _CONSTANTS] + [
+            ("verbose", False), ("rng", None), ("event_bus", None), ("valid_moves_cache", None),
+            ("position_hash", None)]
+        self._structs = {}
+
+        num_camels, num_players = g.NUM_CAMELS, g.NUM_PLAYERS
+        self.fixed_format = "<{}h{}b4B".format(num_players, 1 + 3 * num_camels + 2 * num_players)
+        self.fixed_size = struct.calcsize(self.fixed_format)
+        # Offsets of the fields in the fixed part of the encoding
+        self.flags_offset = 2 * num_players
+        self.camels_offset = self.flags_offset + 1
+        self.traps_offset = self.camels_offset + 3 * num_camels
+        self.counts_offset = self.traps_offset + 2 * num_players
+
+    def encode_constants(self):
+        """
+        :return: The constants of the game as bytes, see from_constants().
+        """
+        return json.dumps({"format_version": FORMAT_VERSION, "constants": self.constants}).encode()
+
+    @classmethod
+    def from_constants(cls, data):
+        """
+        Create the codec of a game from its encoded constants.
+        :param data: Return value of encode_constants().
+        :return: GameCodec object.
+        """
+        header = json.loads(bytes(data))
+        if header["format_version"] != FORMAT_VERSION:
+            raise ValueError("Unsupported game state encoding version {}".format(header["format_version"]))
+        constants = header["constants"]
+        g = object.__new__(camelup.GameState)
+        for key, _ in _CONSTANTS:
+            value = constants[key]
+            setattr(g, key, tuple(value) if isinstance(value, list) else value)
+        g.CAMELS = list(constants["CAMELS"])
+        return cls(g)
+
+    def new_game_state(self, state_class=camelup.CompactGameState, **kwargs):
+        """
+        Create a new game with the constants of this codec.
+        :param state_class: The game state representation, i.e. GameState or CompactGameState.
+        :param kwargs: Further arguments of the game state, e.g. rng.
+        :return: Game state.
+        """
+        arguments = {argument: self.constants[key] for key, argument in _CONSTANTS}
+        return state_class(**arguments, **kwargs)
+
+    def _struct(self, num_variable):
+        """
+        :param num_variable: Number of int8 values after the fixed part.
+        :return: struct.Struct object of an encoded state, cached by its size.
+        """
+        encoding = self._structs.get(num_variable)
+        if encoding is None:
+            encoding = self._structs[num_variable] = struct.Struct(self.fixed_format + "{}b".format(num_variable))
+        return encoding
+
+    def encode(self, g, player=None):
+        """
+        :param g: Game state or player view with the constants of this codec.
+        :param player: Player ID integer, or None. If given, the game bets of the other players are encoded as hidden,
+            as in the player view of 'player'.
+        :return: The mutable part of the game state as bytes.
+        """
+        num_players = self.constants["NUM_PLAYERS"]
+        trap_locations = [-1] * num_players
+        trap_types = [0] * num_players
+        for board_loc, entry in enumerate(g.trap_track):
+            if entry:
+                trap_locations[entry[1]] = board_loc
+                trap_types[entry[1]] = entry[0]
+        if isinstance(g, camelup.CompactGameState):
+            positions, heights = g.camel_positions, g.camel_heights
+        else:
+            locations = g.camel_locations()
+            positions = [board_loc for board_loc, _ in locations]
+            heights = [stack_loc for _, stack_loc in locations]
+
+        camel_indices = self.camel_indices
+        variable = []
+        hide = player is not None
+        for bet_list, hidden in ((g.round_bets, False), (g.game_winner_bets, hide), (g.game_loser_bets, hide)):
+            for camel, bet_player in bet_list:
+                if bet_player is None or hidden and bet_player != player:
+                    variable += (-1, -1)
+                else:
+                    variable += (camel_indices[camel], bet_player)
+        variable += g.game_winner
+        return self._struct(len(variable)).pack(
+            *g.player_money_values, 1 if g.active_game else 0, *positions, *heights, *g.camel_yet_to_move,
+            *trap_locations, *trap_types, len(g.round_bets), len(g.game_winner_bets), len(g.game_loser_bets),
+            len(g.game_winner), *variable)
+
+    def decode(self, data, state_class=camelup.CompactGameState):
+        """
+        :param data: Bytes-like object returned by encode().
+        :param state_class: The game state representation to decode into, i.e. GameState or CompactGameState.
+        :return: Game state equal to the encoded one, see the module documentation.
+        """
+        num_camels, num_players = self.constants["NUM_CAMELS"], self.constants["NUM_PLAYERS"]
+        values = self._struct(len(data) - self.fixed_size).unpack(data)
+
+        state = dict(self._attributes)
+        state["CAMELS"] = list(self.constants["CAMELS"])
+        state["player_money_values"] = list(values[:num_players])
+        i = num_players
+        state["active_game"] = values[i] & 1 == 1
+        positions = list(values[i + 1:i + 1 + num_camels])
+        heights = list(values[i + 1 + num_camels:i + 1 + 2 * num_camels])
+        state["camel_yet_to_move"] = [value == 1 for value in values[i + 1 + 2 * num_camels:i + 1 + 3 * num_camels]]
+        i += 1 + 3 * num_camels
+        trap_track = [[] for _ in range(self.track_size)]
+        for player in range(num_players):
+            if values[i + player] != -1:
+                trap_track[values[i + player]] = [values[i + num_players + player], player]
+        state["trap_track"] = trap_track
+        i += 2 * num_players
+
+        num_round_bets, num_winner_bets, num_loser_bets = values[i:i + 3]
+        i += 4
+        camels = self.camel_ids
+        bets = [[camels[values[j]], values[j + 1] if values[j + 1] != -1 else None] for j in range(
+            i, i + 2 * (num_round_bets + num_winner_bets + num_loser_bets), 2)]
+        state["round_bets"] = bets[:num_round_bets]
+        state["game_winner_bets"] = bets[num_round_bets:num_round_bets + num_winner_bets]
+        state["game_loser_bets"] = bets[num_round_bets + num_winner_bets:]
+        state["game_winner"] = list(values[i + 2 * len(bets):])
+
+        # Camel indices on each field from bottom to top
+        stacks = [[] for _ in range(self.track_size)]
+        for camel_index in sorted(range(num_camels), key=heights.__getitem__):
+            stacks[positions[camel_index]].append(camel_index)
+
+        g = object.__new__(state_class)
+        if state_class is camelup.CompactGameState:
+            state["camel_positions"] = positions
+            state["camel_heights"] = heights
+            state["stacks"] = stacks
+            # Attributes are set directly, BaseGameState.__setattr__() only guards against changing constants
+            set_attribute = object.__setattr__
+            for key, value in state.items():
+                set_attribute(g, key, value)
+        else:
+            state["camel_track"] = [[camels[camel_index] for camel_index in stack] for stack in stacks]
+            g.__dict__.update(state)
+        return g
+
+    def view(self, data):
+        """
+        Read an encoded game state without decoding it.
+        :param data: Bytes-like object returned by encode().
+        :return: EncodedGameState object backed by data.
+        """
+        return EncodedGameState(self, data)
+
+
+class EncodedGameState:
+    """
+    Read-only access to an encoded game state. The fields are NumPy arrays that share memory with the encoded bytes,
+    so nothing is copied, see GameCodec.view().
+        - player_money_values: int16 array indexed by player
+        - active_game: Boolean
+        - camel_positions, camel_heights, camel_yet_to_move: int8 arrays indexed by camel index
+        - trap_locations, trap_types: int8 arrays indexed by player, -1 and 0 without a trap
+        - round_bets, game_winner_bets, game_loser_bets: int8 arrays of shape (number of bets, 2) holding the camel
+          index and the player of each bet, -1 where hidden
+        - game_winner: int8 array of the winning players
+    """
+
+    def __init__(self, codec, data):
+        num_camels, num_players = codec.constants["NUM_CAMELS"], codec.constants["NUM_PLAYERS"]
+        self.data = data
+        self.player_money_values = np.frombuffer(data, dtype="<i2", count=num_players)
+        self.active_game = data[codec.flags_offset] & 1 == 1
+        # All int8 fields after the flags
+        camels = np.frombuffer(data, dtype=np.int8, offset=codec.camels_offset)
+        self.camel_positions = camels[:num_camels]
+        self.camel_heights = camels[num_camels:2 * num_camels]
+        self.camel_yet_to_move = camels[2 * num_camels:3 * num_camels]
+        self.trap_locations = camels[3 * num_camels:3 * num_camels + num_players]
+        self.trap_types = camels[3 * num_camels + num_players:3 * num_camels + 2 * num_players]
+        counts = np.frombuffer(data, dtype=np.uint8, count=4, offset=codec.counts_offset).tolist()
+        variable = camels[codec.fixed_size - codec.camels_offset:]
+        start = 0
+        for name, count in zip(("round_bets", "game_winner_bets", "game_loser_bets"), counts):
+            setattr(self, name, variable[start:start + 2 * count].reshape(count, 2))
+            start += 2 * count
+        self.game_winner = variable[start:start + counts[3]]
@@ -0,0 +1,187 @@
+"""
+Structured events emitted by the game engine.
+
+A game state can carry an EventBus (g.event_bus). The engine functions emit an event whenever something noteworthy
+happens, e.g. a camel moves or a bet is paid out. Events are plain named tuples and are only created if the bus has at
+least one subscriber, so a silent game (the default) neither builds events nor formats messages.
+
+A subscriber is any callable taking an event. This module provides subscribers for
+    - console output (ConsoleSubscriber), which prints the messages of GameState(verbose=True),
+    - the logging module (LoggingSubscriber),
+    - counting events and payouts (CounterSubscriber), e.g. for analytics over many games.
+
+Player copies and player views don't have an event bus, so bots simulating moves don't emit events.
+"""
+import collections
+import logging
+
+CamelMoved = collections.namedtuple("CamelMoved", ["player", "camel", "roll", "distance"])
+# owner is the player who placed the trap
+TrapHit = collections.namedtuple("TrapHit", ["player", "camel", "location", "trap_type", "owner"])
+TrapMoved = collections.namedtuple("TrapMoved", ["player", "trap_type", "location"])
+RoundBetPlaced = collections.namedtuple("RoundBetPlaced", ["player", "camel"])
+GameBetPlaced = collections.namedtuple("GameBetPlaced", ["player", "bet_type", "camel"])
+# bet is one of "round", "game_winner" and "game_loser". result is "first", "second" or "other" for round bets and
+# "correct" or "incorrect" for game bets.
+BetPaid = collections.namedtuple("BetPaid", ["player", "payout", "bet", "result", "camel"])
+RoundSettled = collections.namedtuple("RoundSettled", ["first_camel", "second_camel", "player_money_values"])
+GameEnded = collections.namedtuple("GameEnded", ["winning_camel", "losing_camel", "game_winner", "player_money_values"])
+# Emitted by camelup.play_game() after every turn. state is the live game state.
+TurnEnded = collections.namedtuple("TurnEnded", ["turn", "player", "state"])
+
+EVENT_TYPES = (
+    CamelMoved, TrapHit, TrapMoved, RoundBetPlaced, GameBetPlaced, BetPaid, RoundSettled, GameEnded, TurnEnded)
+
+
+class EventBus:
+    """
+    Dispatches events to subscribers. The bus is falsy while it has no subscribers, the engine checks
+    'if g.event_bus:' before building an event.
+    """
+
+    def __init__(self, subscribers=()):
+        self.subscribers = list(subscribers)
+
+    def __len__(self):
+        return len(self.subscribers)
+
+    def subscribe(self, subscriber):
+        """
+        :param subscriber: Callable taking an event.
+        :return: The subscriber.
+        """
+        self.subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        self.subscribers.remove(subscriber)
+
+    def emit(self, event):
+        for subscriber in self.subscribers:
+            subscriber(event)
+
+
+class ConsoleSubscriber:
+    """
+    Prints the events as messages and the board after every turn.
+    """
+
+    def __init__(self, show_board=True):
+        self.show_board = show_board
+
+    def __call__(self, event):
+        name = type(event).__name__
+        if name == "CamelMoved":
+            print("Player {} moves camel {} by {} spaces".format(event.player, event.camel, event.distance))
+        elif name == "TrapHit":
+            print("Player hit a trap!")
+        elif name == "TrapMoved":
+            print("Player {} moves a {:+d} trap to field {}".format(event.player, event.trap_type, event.location))
+        elif name == "RoundBetPlaced":
+            print("Player {} places a round winner bet on camel {}".format(event.player, event.camel))
+        elif name == "GameBetPlaced":
+            print("Player {} places a game '{}' bet on camel {}".format(event.player, event.bet_type, event.camel))
+        elif name == "BetPaid":
+            print(format_bet_paid(event))
+        elif name == "TurnEnded" and self.show_board:
+            # camelup imports this module
+            import camelup
+            camelup.print_game_state(event.state)
+
+
+def format_bet_paid(event):
+    """
+    :param event: BetPaid event.
+    :return: String describing the payout.
+    """
+    if event.bet == "round":
+        reason = {
+            "first": "selecting the round winner",
+            "second": "selecting the round runner up",
+            "other": "selecting the third or worse camel"}[event.result]
+        return "Paid player #{} {} coins for {}".format(event.player, event.payout, reason)
+    reason = "betting on the game {}".format("winner" if event.bet == "game_winner" else "loser")
+    if event.result == "incorrect":
+        reason = "incorrectly " + reason
+    return "Paid Player #{} {} coins for {}".format(event.player, event.payout, reason)
+
+
+class LoggingSubscriber:
+    """
+    Logs every event as one record. The fields of the event are passed as the 'event' attribute of the log record
+    (extra), so that handlers can process them without parsing the message.
+    """
+
+    def __init__(self, logger=None, level=logging.INFO, include_turns=False):
+        """
+        :param logger: logging.Logger object. Defaults to the logger "camelup.events".
+        :param level: Log level of the records.
+        :param include_turns: If True, TurnEnded events are logged as well.
+        """
+        self.logger = logging.getLogger("camelup.events") if logger is None else logger
+        self.level = level
+        self.include_turns = include_turns
+
+    def __call__(self, event):
+        if not self.logger.isEnabledFor(self.level):
+            return
+        name = type(event).__name__
+        if name == "TurnEnded":
+            if not self.include_turns:
+                return
+            fields = {"turn": event.turn, "player": event.player}
+        else:
+            fields = event._asdict()
+        self.logger.log(self.level, "%s %s", name, fields, extra={"event": dict(fields, type=name)})
+
+
+class CounterSubscriber:
+    """
+    Counts events, e.g. to collect statistics over many games by subscribing the same object to every game:
+        - events: number of events of each type
+        - payouts: sum of the payouts of each (bet, result) pair
+        - bets_paid: number of bets paid of each (bet, result) pair
+        - trap_hits: number of times the trap of each player was hit
+        - distance: total distance moved by each camel
+    """
+
+    def __init__(self):
+        self.events = collections.Counter()
+        self.payouts = collections.Counter()
+        self.bets_paid = collections.Counter()
+        self.trap_hits = collections.Counter()
+        self.distance = collections.Counter()
+
+    def __call__(self, event):
+        name = type(event).__name__
+        self.events[name] += 1
+        if name == "BetPaid":
+            self.payouts[(event.bet, event.result)] += event.payout
+            self.bets_paid[(event.bet, event.result)] += 1
+        elif name == "TrapHit":
+            self.trap_hits[event.owner] += 1
+        elif name == "CamelMoved":
+            self.distance[event.camel] += event.distance
+
+    def merge(self, other):
+        """
+        Add the counts of another CounterSubscriber, e.g. collected in a worker process.
+        :param other: CounterSubscriber object.
+        :return:
+        """
+        self.events.update(other.events)
+        self.payouts.update(other.payouts)
+        self.bets_paid.update(other.bets_paid)
+        self.trap_hits.update(other.trap_hits)
+        self.distance.update(other.distance)
+
+    def to_dict(self):
+        """
+        :return: Dictionary of the counts that can be serialized as JSON.
+        """
+        return {
+            "events": dict(sorted(self.events.items())),
+            "payouts": {"{}_{}".format(*key): value for key, value in sorted(self.payouts.items())},
+            "bets_paid": {"{}_{}".format(*key): value for key, value in sorted(self.bets_paid.items())},
+            "trap_hits": {str(player): count for player, count in sorted(self.trap_hits.items())},
+            "distance": dict(sorted(self.distance.items()))}
@@ -0,0 +1,367 @@
+"""
+Columnar game logs in a single file.
+
+Instead of one CSV file per game, game logs can be streamed into a single file made of consecutive NumPy arrays (the
+.npy format):
+    - a header, i.e. a JSON string describing the columns and the codes of categorical values,
+    - any number of row groups, each consisting of one array per column in the order given by the header.
+Rows are buffered in memory and written as a row group once enough rows have accumulated. Every column is stored as a
+small integer type. Categorical values are stored as codes:
+    - action_type: the action IDs of actionids.py
+    - camel: the camel index
+    - bet_type: 0 for "win" and 1 for "lose"
+Missing values are stored as -1, except for trap types, which use 0, and coins, which can be negative and use the
+smallest int16.
+
+The columns are the same as in the CSV game logs (see README.md) plus game_id.
+
+Both formats can be written while a game is played from the turns of camelup.play_game_iter(), see
+GameLogBuffer.add_turns() and write_csv_game().
+"""
+import csv
+import json
+import os
+import numpy as np
+import pandas as pd
+from camelup import ACTION_TYPES, GAME_BET_TYPES, GameRecord
+
+FORMAT_VERSION = 1
+
+
+def get_schema(num_camels=5, num_players=4):
+    """
+    The columns of a game log.
+    :param num_camels: Integer number of camels.
+    :param num_players: Integer number of players.
+    :return: List of tuples (column name, NumPy dtype string, missing value).
+    """
+    camels = ["c_" + str(i) for i in range(num_camels)]
+    schema = [
+        ("game_id", "int32", -1),
+        ("round_id", "int16", -1),
+        ("active_player", "int8", -1),
+        ("action_type", "int8", -1),
+        ("camel", "int8", -1),
+        ("distance", "int8", -1),
+        ("trap_type", "int8", 0),
+        ("trap_location", "int8", -1),
+        ("bet_type", "int8", -1)]
+    for camel in camels:
+        schema.append(("camel_{}_location".format(camel), "int8", -1))
+        schema.append(("camel_{}_stack_location".format(camel), "int8", -1))
+    for player in range(num_players):
+        schema.append(("player_{}_trap_location".format(player), "int8", -1))
+        schema.append(("player_{}_trap_type".format(player), "int8", 0))
+    for player in range(num_players):
+        schema.append(("player_{}_coins".format(player), "int16", np.iinfo(np.int16).min))
+    return schema
+
+
+def get_category_codes(num_camels=5):
+    """
+    The codes of the categorical columns.
+    :param num_camels: Integer number of camels.
+    :return: Dictionary mapping column names to dictionaries mapping values to codes.
+    """
+    return {
+        "action_type": {name: code for code, name in ACTION_TYPES.items()},
+        "camel": {"c_" + str(i): i for i in range(num_camels)},
+        "bet_type": {name: code for code, name in enumerate(GAME_BET_TYPES)}}
+
+
+def encode_frame(games, num_camels=5, num_players=4):
+    """
+    Convert game logs in the CSV layout (e.g. read with pandas.read_csv) into typed columns.
+    :param games: DataFrame with the CSV log columns and game_id. Missing columns are filled with missing values.
+    :param num_camels: Integer number of camels.
+    :param num_players: Integer number of players.
+    :return: Dictionary mapping column names to NumPy arrays.
+    """
+    category_codes = get_category_codes(num_camels)
+    columns = {}
+    for name, dtype, missing in get_schema(num_camels, num_players):
+        if name not in games:
+            columns[name] = np.full(len(games), missing, dtype=dtype)
+            continue
+        column = games[name]
+        if name in category_codes:
+            column = column.map(category_codes[name])
+        columns[name] = column.fillna(missing).to_numpy().astype(dtype)
+    return columns
+
+
+class GameLogBuffer:
+    """
+    Collects the rows of game logs column by column. A buffer can be filled in a worker process and its columns sent to
+    the process that writes the file. Rows added one by one are collected in lists, rows added as columns are kept as
+    typed arrays, and both are only concatenated by to_columns().
+    """
+
+    def __init__(self, num_camels=5, num_players=4):
+        self.schema = get_schema(num_camels, num_players)
+        category_codes = get_category_codes(num_camels)
+        self.camels = category_codes["camel"]
+        self.action_types = category_codes["action_type"]
+        self.bet_types = category_codes["bet_type"]
+        self.columns = {name: [] for name, _, _ in self.schema}  # values of the rows added by add_game()
+        self.chunks = {name: [] for name, _, _ in self.schema}  # arrays in the order the rows were added
+        self.num_rows = 0
+
+    def __len__(self):
+        return self.num_rows
+
+    def add_game(self, game_id, action_log):
+        """
+        Add the log of a game as returned by camelup.play_game().
+        :param game_id: Integer index of the game.
+        :param action_log: Iterable of dictionaries, one per row.
+        :return:
+        """
+        num_rows = 0
+        for row in action_log:
+            num_rows += 1
+            row = dict(row, game_id=game_id)
+            if "action_type" in row:
+                row["action_type"] = self.action_types[row["action_type"]]
+            if "camel" in row:
+                row["camel"] = self.camels[row["camel"]]
+            if "bet_type" in row:
+                row["bet_type"] = self.bet_types[row["bet_type"]]
+            for name, _, missing in self.schema:
+                self.columns[name].append(row.get(name, missing))
+        self.num_rows += num_rows
+
+    def add_record(self, game_id, game_record):
+        """
+        Add the log of a game recorded as camelup.GameRecord, i.e. play_game(..., record=True). This is much faster
+        than add_game() as the rows are already stored as integer codes.
+        :param game_id: Integer index of the game.
+        :param game_record: camelup.GameRecord object.
+        :return:
+        """
+        columns = game_record.to_columns()
+        columns["game_id"] = np.full(len(game_record), game_id)
+        self.add_columns(columns)
+
+    def add_turns(self, game_id, turns):
+        """
+        Add the log of a game while it is played. The turns are collected in a camelup.GameRecord and added at the end
+        of the game, so only the compact record of a single game is held in memory.
+        :param game_id: Integer index of the game.
+        :param turns: Iterable of tuples (turn, g) as yielded by camelup.play_game_iter().
+        :return: The game state after the last turn.
+        """
+        game_record = g = None
+        for turn, g in turns:
+            if game_record is None:
+                game_record = GameRecord(g)
+            game_record.append(g, *turn)
+        if game_record is not None:
+            self.add_record(game_id, game_record)
+        return g
+
+    def add_columns(self, columns):
+        """
+        Add rows given as columns, e.g. the return value of to_columns() of another buffer.
+        :param columns: Dictionary mapping column names to arrays or lists of equal length.
+        :return:
+        """
+        self._flush_rows()
+        for name, dtype, _ in self.schema:
+            self.chunks[name].append(np.asarray(columns[name], dtype=dtype))
+        self.num_rows += len(columns[self.schema[0][0]])
+
+    def _flush_rows(self):
+        """
+        Move the rows added by add_game() into the chunks, so they keep their place before rows added later.
+        :return:
+        """
+        if not self.columns[self.schema[0][0]]:
+            return
+        for name, dtype, _ in self.schema:
+            self.chunks[name].append(np.array(self.columns[name], dtype=dtype))
+            self.columns[name] = []
+
+    def to_columns(self):
+        """
+        Convert the buffered rows into typed arrays and empty the buffer.
+        :return: Dictionary mapping column names to NumPy arrays.
+        """
+        self._flush_rows()
+        columns = {
+            name: np.concatenate(self.chunks[name]) if self.chunks[name] else np.array([], dtype=dtype)
+            for name, dtype, _ in self.schema}
+        self.chunks = {name: [] for name, _, _ in self.schema}
+        self.num_rows = 0
+        return columns
+
+
+class GameLogWriter:
+    """
+    Streams game logs into a single columnar file. Use it as a context manager or call close() to write the last
+    buffered rows.
+    """
+
+    def __init__(self, path, num_camels=5, num_players=4, row_group_size=2 ** 16):
+        self.buffer = GameLogBuffer(num_camels, num_players)
+        self.row_group_size = row_group_size
+        self.file = open(path, "wb")
+        header = {
+            "format_version": FORMAT_VERSION,
+            "columns": [[name, dtype, int(missing)] for name, dtype, missing in self.buffer.schema],
+            "action_types": {str(code): name for code, name in ACTION_TYPES.items()},
+            "camels": sorted(self.buffer.camels, key=self.buffer.camels.get),
+            "bet_types": list(GAME_BET_TYPES)}
+        np.save(self.file, np.array(json.dumps(header)), allow_pickle=False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write_game(self, game_id, action_log):
+        """
+        Buffer the log of a game as returned by camelup.play_game().
+        :param game_id: Integer index of the game.
+        :param action_log: List of dictionaries, one per row.
+        :return:
+        """
+        self.buffer.add_game(game_id, action_log)
+        if len(self.buffer) >= self.row_group_size:
+            self.flush()
+
+    def write_turns(self, game_id, turns):
+        """
+        Buffer the log of a game while it is played, see GameLogBuffer.add_turns().
+        :param game_id: Integer index of the game.
+        :param turns: Iterable of tuples (turn, g) as yielded by camelup.play_game_iter().
+        :return: The game state after the last turn.
+        """
+        g = self.buffer.add_turns(game_id, turns)
+        if len(self.buffer) >= self.row_group_size:
+            self.flush()
+        return g
+
+    def write_columns(self, columns):
+        """
+        Buffer rows given as columns, e.g. collected by a GameLogBuffer in a worker process.
+        :param columns: Dictionary mapping column names to arrays.
+        :return:
+        """
+        self.buffer.add_columns(columns)
+        if len(self.buffer) >= self.row_group_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Write the buffered rows as a row group.
+        :return:
+        """
+        if len(self.buffer) == 0:
+            return
+        columns = self.buffer.to_columns()
+        for name, _, _ in self.buffer.schema:
+            np.save(self.file, columns[name], allow_pickle=False)
+        self.file.flush()
+
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+
+def write_csv_game(path, turns):
+    """
+    Write the CSV log of a game while it is played, one row per turn. The file has the columns of camelup.GameRecord
+    preceded by an unnamed row index, like a pandas DataFrame of the log of camelup.play_game() written with to_csv().
+    Missing values are left empty.
+    :param path: Path of the CSV file.
+    :param turns: Iterable of tuples (turn, g) as yielded by camelup.play_game_iter().
+    :return: The game state after the last turn.
+    """
+    g = None
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        game_record = None
+        for index, (turn, g) in enumerate(turns):
+            if game_record is None:
+                # A record of a single row converts each turn into a row of the log
+                game_record = GameRecord(g, capacity=1)
+                writer.writerow([""] + game_record.columns)
+            game_record.append(g, *turn)
+            row = game_record.to_dicts()[0]
+            game_record.clear()
+            writer.writerow([index] + [row.get(column, "") for column in game_record.columns])
+    return g
+
+
+def read_header(f):
+    """
+    Read the header of a columnar game log.
+    :param f: File object opened in binary mode, positioned at the start of the file.
+    :return: Dictionary, see GameLogWriter.
+    """
+    header = json.loads(str(np.load(f, allow_pickle=False)))
+    if header["format_version"] != FORMAT_VERSION:
+        raise ValueError("Unsupported game log format version {}".format(header["format_version"]))
+    return header
+
+
+def read_row_groups(path):
+    """
+    Iterate over the row groups of a columnar game log without loading the whole file.
+    :param path: Path to the file.
+    :return: Generator of dictionaries mapping column names to NumPy arrays.
+    """
+    with open(path, "rb") as f:
+        header = read_header(f)
+        size = os.fstat(f.fileno()).st_size
+        while f.tell() < size:
+            yield {name: np.load(f, allow_pickle=False) for name, _, _ in header["columns"]}
+
+
+def read_game_logs(path, decode=True):
+    """
+    Load a columnar game log into a DataFrame.
+    :param path: Path to the file.
+    :param decode: If True, categorical codes are replaced with their names and missing values with NA, like in the
+        CSV game logs. Otherwise, the raw integer columns are returned.
+    :return: pandas.DataFrame
+    """
+    with open(path, "rb") as f:
+        header = read_header(f)
+    row_groups = list(read_row_groups(path))
+    if len(row_groups) == 0:
+        columns = {name: np.array([], dtype=dtype) for name, dtype, _ in header["columns"]}
+    else:
+        columns = {name: np.concatenate([rg[name] for rg in row_groups]) for name, _, _ in header["columns"]}
+    games = pd.DataFrame(columns)
+    if decode:
+        games = decode_columns(games, header)
+    return games
+
+
+def decode_columns(games, header):
+    """
+    Replace categorical codes with their names and missing values with NA.
+    :param games: DataFrame with raw integer columns.
+    :param header: Dictionary, see GameLogWriter.
+    :return: pandas.DataFrame
+    """
+    games = games.copy()
+    # The action IDs are 0, 1, ... so that all categorical values can be used as pandas category codes
+    categories = {
+        "action_type": [header["action_types"][str(code)] for code in range(len(header["action_types"]))],
+        "camel": header["camels"],
+        "bet_type": header["bet_types"]}
+    for name, dtype, missing in header["columns"]:
+        if name in categories:
+            codes = games[name].to_numpy()
+            codes = np.where(codes != missing, codes, -1)
+            games[name] = pd.Categorical.from_codes(codes, categories=categories[name])
+        else:
+            nullable = pd.array(games[name].to_numpy(), dtype=dtype.capitalize())
+            nullable[games[name].to_numpy() == missing] = pd.NA
+            games[name] = nullable
+    return games
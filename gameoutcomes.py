@@ -0,0 +1,159 @@
+"""
+Monte Carlo estimates of the outcome of the whole game.
+
+Game winner and loser bets pay out at the end of the game, which is usually several rounds away and too deep to
+enumerate like the rest of a round (see roundoutcomes.py). This module plays the race to the finish line many times
+instead, assuming that only camels move from now on, i.e. traps stay where they are. The rollouts are vectorized with
+NumPy: every step moves one camel in all unfinished rollouts at once.
+
+Rollouts are run in batches until the confidence intervals of all probabilities are narrower than the requested
+precision, the maximum number of rollouts is reached or the time budget is used up, so that bots can call the
+estimator every turn.
+"""
+import collections
+import statistics
+import time
+import numpy as np
+import batchengine
+
+# Probabilities and Wilson score intervals of each camel winning and losing the game
+GameOutcomeEstimate = collections.namedtuple(
+    "GameOutcomeEstimate", ["win_probabilities", "lose_probabilities", "win_intervals", "lose_intervals",
+                            "num_rollouts"])
+
+
+def simulate_races(g, num_rollouts, rng):
+    """
+    Move the camels of a game state until a camel crosses the finish line, num_rollouts times.
+    :param g: GameState object.
+    :param num_rollouts: Integer number of rollouts.
+    :param rng: numpy.random.Generator object.
+    :return: Integer array (num_rollouts, NUM_CAMELS) with the camel indices of each rollout ordered from first to last
+        place.
+    """
+    locations = np.array(g.camel_locations())
+    positions = np.tile(locations[:, 0], (num_rollouts, 1))
+    heights = np.tile(locations[:, 1], (num_rollouts, 1))
+    yet_to_move = np.array(g.camel_yet_to_move, dtype=bool)
+    if not yet_to_move.any():
+        yet_to_move[:] = True
+    traps = np.array([entry[0] if len(entry) > 0 else 0 for entry in g.trap_track])
+    rankings = np.empty((num_rollouts, g.NUM_CAMELS), dtype=np.int64)
+
+    # All rollouts start from the same position, so their rounds start and end at the same step. The order in which
+    # the camels move and the dice rolls are drawn once per round. Camels that have already moved in the current round
+    # are sorted to the end of the order and never reached.
+    running = np.arange(num_rollouts)
+    round_length = int(yet_to_move.sum())
+    order = np.argsort(rng.random((num_rollouts, g.NUM_CAMELS)) + ~yet_to_move, axis=1)
+    step = 0
+    while True:
+        if step == round_length:
+            order = np.argsort(rng.random((len(running), g.NUM_CAMELS)), axis=1)
+            round_length = g.NUM_CAMELS
+            step = 0
+        if step == 0:
+            rolls = rng.integers(g.MOVE_RANGE[0], g.MOVE_RANGE[1] + 1, size=(len(running), g.NUM_CAMELS))
+
+        camels = order[:, step]
+        landing = positions[np.arange(len(running)), camels] + rolls[:, step]
+        new_pos = landing + traps[landing]
+        positions, heights = batchengine.move_stacks(positions, heights, camels, new_pos, traps[landing] == -1)
+        step += 1
+
+        # Only the unfinished rollouts are kept in the arrays, 'running' holds their indices
+        finished = new_pos >= g.BOARD_SIZE
+        if finished.any():
+            key = positions[finished] * g.NUM_CAMELS + heights[finished]
+            rankings[running[finished]] = np.argsort(-key, axis=1)
+            if finished.all():
+                return rankings
+            unfinished = ~finished
+            running, positions, heights = running[unfinished], positions[unfinished], heights[unfinished]
+            order, rolls = order[unfinished], rolls[unfinished]
+
+
+def wilson_interval(successes, n, z):
+    """
+    Wilson score interval of a binomial proportion.
+    :param successes: Integer array of the number of successes.
+    :param n: Integer number of trials.
+    :param z: Quantile of the standard normal distribution, e.g. 1.96 for 95% confidence.
+    :return: Tuple (lower, upper) of arrays.
+    """
+    p = successes / n
+    denominator = 1 + z ** 2 / n
+    center = (p + z ** 2 / (2 * n)) / denominator
+    half_width = z * np.sqrt(p * (1 - p) / n + z ** 2 / (4 * n ** 2)) / denominator
+    return center - half_width, center + half_width
+
+
+def estimate_game_outcome_probabilities(g, precision=0.01, confidence=0.95, batch_size=500, max_rollouts=100000,
+                                        time_budget=None, rng=None):
+    """
+    Estimate the probability of each camel winning and losing the game, see the module documentation.
+    :param g: GameState object.
+    :param precision: Rollouts stop once all confidence intervals are at most twice this wide.
+    :param confidence: Confidence level of the intervals.
+    :param batch_size: Number of rollouts between two checks of the stopping criteria.
+    :param max_rollouts: Maximum number of rollouts.
+    :param time_budget: Maximum time in seconds, or None. At least one batch is always run.
+    :param rng: numpy.random.Generator object, or None for a fresh generator.
+    :return: GameOutcomeEstimate. The probabilities and intervals are dictionaries mapping camel IDs to floats and
+        tuples (lower, upper).
+    """
+    start = time.perf_counter()
+    if rng is None:
+        rng = np.random.default_rng()
+    z = statistics.NormalDist().inv_cdf((1 + confidence) / 2)
+
+    if not g.active_game:
+        winner, loser = g.camel_in_nth_place(1), g.camel_in_nth_place(g.NUM_CAMELS)
+        win = {camel: float(camel == winner) for camel in g.CAMELS}
+        lose = {camel: float(camel == loser) for camel in g.CAMELS}
+        return GameOutcomeEstimate(
+            win, lose, {camel: (p, p) for camel, p in win.items()}, {camel: (p, p) for camel, p in lose.items()}, 0)
+
+    wins = np.zeros(g.NUM_CAMELS, dtype=np.int64)
+    losses = np.zeros(g.NUM_CAMELS, dtype=np.int64)
+    n = 0
+    while True:
+        rankings = simulate_races(g, min(batch_size, max_rollouts - n), rng)
+        wins += np.bincount(rankings[:, 0], minlength=g.NUM_CAMELS)
+        losses += np.bincount(rankings[:, -1], minlength=g.NUM_CAMELS)
+        n += len(rankings)
+        win_lower, win_upper = wilson_interval(wins, n, z)
+        lose_lower, lose_upper = wilson_interval(losses, n, z)
+        half_width = max((win_upper - win_lower).max(), (lose_upper - lose_lower).max()) / 2
+        if (half_width <= precision or n >= max_rollouts or
+                (time_budget is not None and time.perf_counter() - start >= time_budget)):
+            break
+
+    return GameOutcomeEstimate(
+        {camel: wins[i] / n for i, camel in enumerate(g.CAMELS)},
+        {camel: losses[i] / n for i, camel in enumerate(g.CAMELS)},
+        {camel: (win_lower[i], win_upper[i]) for i, camel in enumerate(g.CAMELS)},
+        {camel: (lose_lower[i], lose_upper[i]) for i, camel in enumerate(g.CAMELS)},
+        n)
+
+
+def get_game_bet_expected_values(g, estimate=None, **kwargs):
+    """
+    Expected payout of placing a game winner or loser bet on each camel. The payout of a correct bet depends on the
+    number of earlier bets on the same camel. Bets of other players are hidden from bots, so only the visible bets are
+    counted.
+    :param g: GameState object.
+    :param estimate: GameOutcomeEstimate. If None, it is computed with estimate_game_outcome_probabilities().
+    :param kwargs: Passed on to estimate_game_outcome_probabilities().
+    :return: Dictionary mapping tuples (bet_type, camel) to expected payouts, bet_type being "win" or "lose".
+    """
+    if estimate is None:
+        estimate = estimate_game_outcome_probabilities(g, **kwargs)
+    expected_values = {}
+    for bet_type, bets, probabilities in (
+            ("win", g.game_winner_bets, estimate.win_probabilities),
+            ("lose", g.game_loser_bets, estimate.lose_probabilities)):
+        for camel, p in probabilities.items():
+            index = len([bet for bet in bets if bet[0] == camel])
+            expected_values[(bet_type, camel)] = p * g.get_game_bets_payout(index) + (1 - p) * g.BAD_GAME_END_BET
+    return expected_values
@@ -0,0 +1,164 @@
+"""
+Per-game random number streams.
+
+By default the game engine draws from the global random module, so a game depends on everything drawn before it in
+the same process. A GameRandom object passed to a game state (GameState(rng=...) or play_game(..., rng=...)) replaces
+the global random module for the camel draws and dice rolls of that game.
+
+GameRandom is backed by Philox, a counter-based generator: the key is the seed of the run and the high word of the
+counter is the index of the game. Every game therefore has its own stream that starts at a known counter, and game k of
+a run can be replayed directly without drawing the numbers of games 0..k-1. Dice rolls and camel orders are drawn in
+vectorized blocks and handed out one at a time.
+
+Bots are not affected and keep using the random module. Player views and player copies don't have access to the stream,
+so bots cannot peek at future dice.
+
+An RngTape records the draws of a game and replays them in another game: the k-th dice roll and the k-th camel drawn
+are the same in every replay, whatever the players do in between. This is used to compare bots on common random
+numbers (see tournament.run_paired_evaluation()).
+"""
+import numpy as np
+
+
+def make_generator(seed, stream_index=0):
+    """
+    Create a NumPy generator for one stream of a run, e.g. for batchengine.BatchGameState or draw_rounds().
+    :param seed: Non-negative integer seed of the run (up to 128 bits).
+    :param stream_index: Non-negative integer index of the stream, e.g. the index of the game.
+    :return: numpy.random.Generator
+    """
+    return np.random.Generator(np.random.Philox(key=seed, counter=[0, 0, 0, stream_index]))
+
+
+def draw_rounds(generator, num_rounds, num_camels, move_range):
+    """
+    Draw the camel orders and dice rolls of several full rounds (or of one round of several games) in one call.
+    :param generator: numpy.random.Generator
+    :param num_rounds: Integer number of rounds.
+    :param num_camels: Integer number of camels.
+    :param move_range: A tuple indicating the minimum and maximum move range (inclusive).
+    :return: Tuple (camel_orders, rolls) of integer arrays of shape (num_rounds, num_camels). Row r holds the camel
+        indices in the order they move in round r and the dice roll of each of these moves.
+    """
+    camel_orders = np.argsort(generator.random((num_rounds, num_camels)), axis=1)
+    rolls = generator.integers(move_range[0], move_range[1] + 1, size=(num_rounds, num_camels))
+    return camel_orders, rolls
+
+
+class GameRandom:
+    """
+    The random numbers of one game, see the module documentation. The game engine calls choose_camel() and
+    roll_dice() instead of random.choice() and camelup.roll_dice() when a game state has a GameRandom object.
+    """
+
+    def __init__(self, seed, game_index=0, block_size=64):
+        """
+        :param seed: Non-negative integer seed of the run (up to 128 bits).
+        :param game_index: Non-negative integer index of the game within the run.
+        :param block_size: Number of dice rolls drawn at a time.
+        """
+        self.generator = make_generator(seed, game_index)
+        self.block_size = block_size
+        self._camel_order = []
+        self._rolls = []
+        self._rolls_range = None
+
+    def randint(self, low, high):
+        """
+        :return: A random integer N such that low <= N <= high.
+        """
+        return int(self.generator.integers(low, high + 1))
+
+    def roll_dice(self, move_range):
+        """
+        Roll the dice, see camelup.roll_dice().
+        :param move_range: A tuple indicating the minimum and maximum move range (inclusive).
+        :return:
+        """
+        if len(self._rolls) == 0 or self._rolls_range != move_range:
+            self._rolls = self.generator.integers(move_range[0], move_range[1] + 1, size=self.block_size).tolist()
+            self._rolls.reverse()
+            self._rolls_range = move_range
+        return self._rolls.pop()
+
+    def choose_camel(self, camel_yet_to_move):
+        """
+        Choose a random camel among those that haven't moved this round. Camels are taken from a random order drawn for
+        the whole round. If the game state has been modified since, e.g. a move was undone, a new order is drawn, so
+        that the choice is always uniform among the camels that haven't moved.
+        :param camel_yet_to_move: List of booleans indexed by camel index.
+        :return: Camel index integer.
+        """
+        candidates = [i for i in self._camel_order if camel_yet_to_move[i]]
+        if len(candidates) != sum(camel_yet_to_move):
+            self._camel_order = self.generator.permutation(len(camel_yet_to_move)).tolist()
+            candidates = [i for i in self._camel_order if camel_yet_to_move[i]]
+        self._camel_order.remove(candidates[0])
+        return candidates[0]
+
+    def draw_rounds(self, num_rounds, num_camels, move_range):
+        """
+        Draw the camel orders and dice rolls of whole rounds from this game's stream, see draw_rounds().
+        :return: Tuple (camel_orders, rolls) of integer arrays of shape (num_rounds, num_camels).
+        """
+        return draw_rounds(self.generator, num_rounds, num_camels, move_range)
+
+
+class RngTape:
+    """
+    Records the random numbers a game draws from a GameRandom object and replays them in other games, see the module
+    documentation. A tape is used like a GameRandom object. Each kind of draw (starting positions, dice rolls, camels)
+    has its own track, so the draws stay aligned even if games use them in a different order. Games that draw more than
+    recorded extend the tape from the source.
+    """
+
+    def __init__(self, source):
+        """
+        :param source: GameRandom object to record from.
+        """
+        self.source = source
+        self.tracks = {"randint": [], "roll_dice": [], "choose_camel": []}
+        self._positions = dict.fromkeys(self.tracks, 0)
+
+    def rewind(self):
+        """
+        Start replaying the tape from the beginning, e.g. before the next game.
+        :return: self
+        """
+        self._positions = dict.fromkeys(self.tracks, 0)
+        return self
+
+    def _next(self, track, draw):
+        values = self.tracks[track]
+        position = self._positions[track]
+        if position == len(values):
+            values.append(draw())
+        self._positions[track] = position + 1
+        return values[position]
+
+    def randint(self, low, high):
+        """
+        :return: A random integer N such that low <= N <= high, see GameRandom.randint().
+        """
+        return self._next("randint", lambda: self.source.randint(low, high))
+
+    def roll_dice(self, move_range):
+        """
+        Roll the dice, see GameRandom.roll_dice().
+        :param move_range: A tuple indicating the minimum and maximum move range (inclusive).
+        :return:
+        """
+        return self._next("roll_dice", lambda: self.source.roll_dice(move_range))
+
+    def choose_camel(self, camel_yet_to_move):
+        """
+        Choose a camel among those that haven't moved this round, see GameRandom.choose_camel(). In games that only
+        move camels forward, the k-th camel of a replay has always yet to move, since rounds end after the same camel
+        moves. Otherwise, e.g. if a move was undone, a camel is chosen from the source without recording it.
+        :param camel_yet_to_move: List of booleans indexed by camel index.
+        :return: Camel index integer.
+        """
+        camel = self._next("choose_camel", lambda: self.source.choose_camel(camel_yet_to_move))
+        if not camel_yet_to_move[camel]:
+            return self.source.choose_camel(camel_yet_to_move)
+        return camel
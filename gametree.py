@@ -0,0 +1,134 @@
+"""
+Apply/undo interface for bots that search the game tree (expectimax, MCTS, ...).
+
+Instead of copying the game state for every node, a search applies a move to a single mutable game state with
+apply_move(), explores the resulting position and reverts it with undo_move(). Moving a camel is a chance node, its
+outcomes can be listed with get_camel_move_outcomes() and forced through the 'outcome' parameter of apply_move().
+
+Undo tokens are tuples that start with the action ID and the player and end with the position hash before the move
+(see zobrist.py). They only store what the move changed, e.g. the two camel stacks involved in a camel move, and must be
+undone in reverse order of application:
+
+    token = apply_move(g, player, (MOVE_CAMEL_ACTION_ID, ), outcome=(camel_index, roll))
+    ...
+    undo_move(g, token)
+"""
+import camelup
+from actionids import GAME_BET_ACTION_ID, ROUND_BET_ACTION_ID, MOVE_TRAP_ACTION_ID, MOVE_CAMEL_ACTION_ID
+
+
+def get_camel_move_outcomes(g):
+    """
+    List all outcomes of moving a camel, i.e. every camel that hasn't moved this round combined with every dice roll.
+    :param g: GameState object.
+    :return: List of tuples (camel_index, roll, probability).
+    """
+    camels = [i for i in range(g.NUM_CAMELS) if g.camel_yet_to_move[i]]
+    rolls = range(g.MOVE_RANGE[0], g.MOVE_RANGE[1] + 1)
+    probability = 1.0 / (len(camels) * len(rolls))
+    return [(camel_index, roll, probability) for camel_index in camels for roll in rolls]
+
+
+def apply_move(g, player, action, outcome=None):
+    """
+    Perform a move in place and return a token that reverts it. End-of-round and end-of-game settlement triggered by
+    a camel move is part of the move and is reverted along with it. The move is not validated beyond the checks of the
+    engine functions, so it should come from camelup.get_valid_moves().
+    :param g: GameState object.
+    :param player: Player ID integer.
+    :param action: A move tuple as returned by PlayerInterface.move().
+    :param outcome: Tuple (camel_index, roll) to force the outcome of a MOVE_CAMEL_ACTION_ID action. If None, the
+        outcome is drawn like in camelup.move_camel().
+    :return: Undo token.
+    """
+    if action[0] == MOVE_CAMEL_ACTION_ID:
+        if outcome is None:
+            camel_index, roll = camelup.draw_camel_move(g)
+        else:
+            camel_index, roll = outcome[0], outcome[1]
+
+        # Save the stack the camel leaves and the stack it lands on
+        curr_pos, _ = g.camel_location(camel_index)
+        trap = g.trap_track[curr_pos + roll]
+        new_pos = curr_pos + roll + trap[0] if len(trap) > 0 else curr_pos + roll
+        token = (
+            MOVE_CAMEL_ACTION_ID, player, camel_index, roll,
+            curr_pos, g.save_stack(curr_pos), new_pos, g.save_stack(new_pos),
+            tuple(g.player_money_values), tuple(g.camel_yet_to_move), g.round_bets, g.active_game, g.game_winner,
+            g.position_hash)
+        camelup.move_camel_with_roll(g, player, camel_index, roll)
+
+    elif action[0] == MOVE_TRAP_ACTION_ID:
+        old_trap = None
+        for trap_location, entry in enumerate(g.trap_track):
+            if len(entry) > 0 and entry[1] == player:
+                old_trap = (trap_location, entry)
+                break
+        token = (MOVE_TRAP_ACTION_ID, player, action[2], old_trap, g.position_hash)
+        camelup.move_trap(g, action[1], action[2], player)
+
+    elif action[0] == ROUND_BET_ACTION_ID:
+        token = (ROUND_BET_ACTION_ID, player, g.position_hash)
+        camelup.place_round_winner_bet(g, action[1], player)
+
+    elif action[0] == GAME_BET_ACTION_ID:
+        token = (GAME_BET_ACTION_ID, player, action[1], g.position_hash)
+        camelup.place_game_bet(g, action[2], action[1], player)
+
+    else:
+        raise ValueError("Illegal action ({}) performed by player {}".format(action, player))
+
+    return token
+
+
+def undo_move(g, token):
+    """
+    Revert a move performed by apply_move(). Moves must be undone in the reverse order in which they were applied.
+    :param g: GameState object.
+    :param token: Undo token returned by apply_move().
+    :return: The outcome of the reverted move, i.e. (camel_index, roll) for camel moves and None otherwise.
+    """
+    outcome = None
+    cache = g.valid_moves_cache
+
+    if token[0] == MOVE_CAMEL_ACTION_ID:
+        (_, _, camel_index, roll, curr_pos, curr_stack, new_pos, new_stack,
+         player_money_values, camel_yet_to_move, round_bets, active_game, game_winner, _) = token
+        g.restore_stack(new_pos, new_stack)
+        g.restore_stack(curr_pos, curr_stack)
+        g.player_money_values[:] = player_money_values
+        g.camel_yet_to_move = list(camel_yet_to_move)
+        g.round_bets = round_bets
+        g.active_game = active_game
+        g.game_winner = game_winner
+        if cache is not None:
+            cache.invalidate_trap_moves()
+            cache.invalidate_round_bet_moves()
+        outcome = (camel_index, roll)
+
+    elif token[0] == MOVE_TRAP_ACTION_ID:
+        _, _, trap_location, old_trap, _ = token
+        g.trap_track[trap_location] = []
+        if old_trap is not None:
+            g.trap_track[old_trap[0]] = old_trap[1]
+        if cache is not None:
+            cache.invalidate_trap_moves()
+
+    elif token[0] == ROUND_BET_ACTION_ID:
+        g.round_bets.pop()
+        if cache is not None:
+            cache.invalidate_round_bet_moves()
+
+    elif token[0] == GAME_BET_ACTION_ID:
+        if token[2] == "win":
+            g.game_winner_bets.pop()
+        else:
+            g.game_loser_bets.pop()
+        if cache is not None:
+            cache.invalidate_game_bet_moves(token[1])
+
+    else:
+        raise ValueError("Invalid undo token {}".format(token))
+
+    g.position_hash = token[-1]
+    return outcome
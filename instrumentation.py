@@ -0,0 +1,172 @@
+"""
+Opt-in timing and call counting for camelup.play_game() and rungame.run_game().
+
+An Instrumentation object passed to play_game() collects:
+    - phases: wall-clock time and number of calls of each phase of a turn, i.e. creating the player view
+      (player_view), the bots' move() calls (bot_move), move validation (validation), executing the action including
+      settlement (action), logging (logging) and emitting events (events). Logging is the time the consumer of
+      camelup.play_game_iter() takes for a turn, i.e. writing the log in run_game(). run_game() adds the time spent
+      writing the columnar log file in the main process (write_logs).
+    - functions: number of calls and inclusive wall-clock time of the rules-engine functions in ENGINE_FUNCTIONS.
+      Settlement is the time spent in end_of_round and end_of_game. Calls made by bots are included if they call the
+      functions through the camelup module, functions imported with "from camelup import ..." are not seen.
+    - think_time: per player (seat), a histogram of the duration of the move() calls.
+The same object can be passed to any number of games to aggregate over them, and objects collected in different
+processes can be merged. Without an Instrumentation object, play_game() only performs a few None checks per turn.
+"""
+import bisect
+import collections
+import contextlib
+import functools
+import json
+import time
+import camelup
+
+ENGINE_FUNCTIONS = (
+    "get_valid_moves", "is_valid_move", "move_camel", "move_trap", "place_game_bet", "place_round_winner_bet",
+    "end_of_round", "end_of_game", "find_camel_in_nth_place", "BaseGameState.get_player_copy")
+
+# Upper bounds in seconds of the think time histogram buckets, from 1 microsecond doubling up to about 16 seconds. The
+# last bucket counts everything above.
+THINK_TIME_BUCKETS = tuple(1e-6 * 2 ** i for i in range(25))
+
+
+class Instrumentation:
+    """
+    Collects timers, counters and think time histograms, see the module documentation.
+    """
+
+    def __init__(self):
+        self.num_games = 0
+        self.num_turns = 0
+        self.phase_seconds = collections.defaultdict(float)
+        self.phase_calls = collections.Counter()
+        self.function_seconds = collections.defaultdict(float)
+        self.function_calls = collections.Counter()
+        self.think_times = {}  # player -> list of counts per bucket of THINK_TIME_BUCKETS plus overflow
+        self.think_seconds = collections.defaultdict(float)
+
+    def add_time(self, phase, seconds):
+        """
+        Add the duration of a phase.
+        :param phase: String name of the phase.
+        :param seconds: Duration in seconds.
+        :return:
+        """
+        self.phase_seconds[phase] += seconds
+        self.phase_calls[phase] += 1
+
+    def add_think_time(self, player, seconds):
+        """
+        Add the duration of a move() call to the think time histogram of a player.
+        :param player: Player ID integer.
+        :param seconds: Duration in seconds.
+        :return:
+        """
+        if player not in self.think_times:
+            self.think_times[player] = [0] * (len(THINK_TIME_BUCKETS) + 1)
+        self.think_times[player][bisect.bisect_left(THINK_TIME_BUCKETS, seconds)] += 1
+        self.think_seconds[player] += seconds
+
+    @contextlib.contextmanager
+    def timer(self, phase):
+        """
+        Context manager timing a phase.
+        :param phase: String name of the phase.
+        :return:
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(phase, time.perf_counter() - start)
+
+    @contextlib.contextmanager
+    def count_engine_calls(self, names=ENGINE_FUNCTIONS):
+        """
+        Context manager that replaces the rules-engine functions of the camelup module by wrappers counting and timing
+        their calls. The original functions are restored on exit. Nested use is ignored.
+        :param names: Names of module functions or of methods in the form Class.method.
+        :return:
+        """
+        patched = []
+        for name in names:
+            owner = camelup
+            attribute = name
+            if "." in name:
+                class_name, attribute = name.split(".")
+                owner = getattr(camelup, class_name)
+            func = getattr(owner, attribute)
+            if getattr(func, "instrumentation", None) is not None:
+                continue
+            setattr(owner, attribute, self._wrap(name, func))
+            patched.append((owner, attribute, func))
+        try:
+            yield
+        finally:
+            for owner, attribute, func in patched:
+                setattr(owner, attribute, func)
+
+    def _wrap(self, name, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.function_seconds[name] += time.perf_counter() - start
+                self.function_calls[name] += 1
+        wrapper.instrumentation = self
+        return wrapper
+
+    def merge(self, other):
+        """
+        Add the statistics of another Instrumentation object, e.g. collected in a worker process.
+        :param other: Instrumentation object.
+        :return:
+        """
+        self.num_games += other.num_games
+        self.num_turns += other.num_turns
+        for phase, seconds in other.phase_seconds.items():
+            self.phase_seconds[phase] += seconds
+        self.phase_calls.update(other.phase_calls)
+        for name, seconds in other.function_seconds.items():
+            self.function_seconds[name] += seconds
+        self.function_calls.update(other.function_calls)
+        for player, counts in other.think_times.items():
+            if player not in self.think_times:
+                self.think_times[player] = [0] * (len(THINK_TIME_BUCKETS) + 1)
+            self.think_times[player] = [a + b for a, b in zip(self.think_times[player], counts)]
+            self.think_seconds[player] += other.think_seconds[player]
+
+    def to_dict(self):
+        """
+        :return: Dictionary of the statistics that can be serialized as JSON.
+        """
+        bucket_names = ["<={:g}".format(bound) for bound in THINK_TIME_BUCKETS]
+        bucket_names.append(">{:g}".format(THINK_TIME_BUCKETS[-1]))
+        return {
+            "games": self.num_games,
+            "turns": self.num_turns,
+            "phases": {
+                phase: {"seconds": self.phase_seconds[phase], "calls": self.phase_calls[phase]}
+                for phase in sorted(self.phase_seconds)},
+            "functions": {
+                name: {"seconds": self.function_seconds[name], "calls": self.function_calls[name]}
+                for name in sorted(self.function_calls)},
+            "think_time": {
+                str(player): {
+                    "moves": sum(counts),
+                    "seconds": self.think_seconds[player],
+                    "histogram": {bucket: count for bucket, count in zip(bucket_names, counts) if count > 0}}
+                for player, counts in sorted(self.think_times.items())}}
+
+    def dump(self, path, **metadata):
+        """
+        Write the statistics as JSON.
+        :param path: Path of the file.
+        :param metadata: Additional entries of the JSON object, e.g. the names of the players.
+        :return:
+        """
+        with open(path, "w") as f:
+            json.dump(dict(metadata, **self.to_dict()), f, indent=2)
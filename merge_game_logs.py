@@ -1,31 +1,152 @@
 import pandas as pd
 import os
-import sys
 import re
+import csv
+import argparse
+import collections
+import concurrent.futures
+import gamelogs
 
-if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python {} <DIRECTORY>".format(sys.argv[0]))
-        exit(0)
+OUTPUT_FORMATS = ("csv", "columnar")
+OUTPUT_FILES = {"csv": "GameLogs.csv", "columnar": "GameLogs.npl"}
+
+
+def find_game_logs(log_dir):
+    """
+    Find the CSV game logs written by rungame.py.
+    :param log_dir: Directory containing the files game_<i>.csv.
+    :return: List of tuples (game_id, path) sorted by game_id.
+    """
+    game_logs = []
+    for file in os.listdir(log_dir):
+        match = re.match(r"game_([0-9]+)\.csv$", file)
+        if match is not None:
+            game_logs.append((int(match.groups()[0]), os.path.join(log_dir, file)))
+    return sorted(game_logs)
 
-    logdir = sys.argv[1]
 
-    files = [
-        f for f in os.listdir(logdir) if
-        re.match("game_[0-9]+\.csv", f) is not None]
+def read_columns(game_logs):
+    """
+    Collect the columns of the merged log from the header lines of the game logs. Games differ in their columns, e.g.
+    a trap location column only exists if the player ever placed a trap.
+    :param game_logs: List of tuples (game_id, path).
+    :return: List of column names: game_id and round_id followed by the other columns in alphabetical order.
+    """
+    columns = set()
+    for _, path in game_logs:
+        with open(path, newline="") as f:
+            columns.update(next(csv.reader(f))[1:])
+    first_columns = ["game_id", "round_id"]
+    return first_columns + sorted(columns.difference(first_columns))
+
 
-    print("Merging {} game logs ...".format(len(files)))
+def get_num_camels_and_players(columns):
+    """
+    :param columns: List of column names of a game log.
+    :return: Tuple (num_camels, num_players).
+    """
+    num_camels = len([col for col in columns if re.match(r"camel_.+_stack_location$", col) is not None])
+    num_players = len([col for col in columns if re.match(r"player_[0-9]+_coins$", col) is not None])
+    return num_camels, num_players
 
+
+def read_game_logs(game_logs, columns, output_format="csv"):
+    """
+    Read a chunk of game logs and convert it to the output format. This is the unit of work of a worker process.
+    :param game_logs: List of tuples (game_id, path).
+    :param columns: List of column names as returned by read_columns().
+    :param output_format: "csv" or "columnar".
+    :return: With the CSV format, the rows as CSV text without header. With the columnar format, a dictionary mapping
+        column names to NumPy arrays.
+    """
     games = []
-    for file in files:
-        i = int(re.match(r"game_([0-9]+)\.csv", file).groups()[0])
-        dat = pd.read_csv(os.path.join(logdir, file), index_col=0)
-        dat["game_id"] = i
+    for game_id, path in game_logs:
+        dat = pd.read_csv(path, index_col=0)
+        dat["game_id"] = game_id
         games.append(dat)
-    games = pd.concat(games, sort=True)
-    games = games.sort_values(["game_id", "round_id"])
+    games = pd.concat(games, ignore_index=True).reindex(columns=columns)
 
-    first_columns = ["game_id", "round_id"]
-    remaining_columns = [col for col in games.columns if col not in first_columns]
-    games = games[first_columns + remaining_columns]
-    games.to_csv("game_logs/GameLogs.csv", header=True, index=False)
+    if output_format == "columnar":
+        num_camels, num_players = get_num_camels_and_players(columns)
+        return gamelogs.encode_frame(games, num_camels=num_camels, num_players=num_players)
+
+    # Missing values turn integer columns into floats, which would be written as e.g. 3.0 depending on the chunk
+    for col in games.columns:
+        if games[col].dtype.kind == "f":
+            games[col] = games[col].astype("Int64")
+    return games.to_csv(header=False, index=False)
+
+
+def merge_game_logs(log_dir, output=None, output_format="csv", workers=1, chunk_size=100, max_pending_chunks=None):
+    """
+    Merge the CSV game logs of a directory into a single file. The files are parsed in chunks by worker processes and
+    the output is written chunk by chunk in order of the game index, so that at most max_pending_chunks chunks are held
+    in memory at any time.
+    :param log_dir: Directory containing the files game_<i>.csv.
+    :param output: Path of the merged file. Defaults to GameLogs.csv or GameLogs.npl in log_dir.
+    :param output_format: "csv" or "columnar" (see gamelogs.py).
+    :param workers: Number of worker processes. With 1, all files are parsed in the current process.
+    :param chunk_size: Number of game logs parsed by a worker at a time.
+    :param max_pending_chunks: Maximum number of chunks being parsed or waiting to be written. Defaults to twice the
+        number of workers.
+    :return: Path of the merged file.
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError("Unknown output format {}, must be one of {}".format(output_format, OUTPUT_FORMATS))
+    if output is None:
+        output = os.path.join(log_dir, OUTPUT_FILES[output_format])
+    if max_pending_chunks is None:
+        max_pending_chunks = 2 * workers
+
+    game_logs = find_game_logs(log_dir)
+    columns = read_columns(game_logs)
+    chunks = [game_logs[i:i + chunk_size] for i in range(0, len(game_logs), chunk_size)]
+    print("Merging {} game logs ...".format(len(game_logs)))
+
+    def write_chunk(chunk_output):
+        if output_format == "columnar":
+            writer.write_columns(chunk_output)
+        else:
+            writer.write(chunk_output)
+
+    if output_format == "columnar":
+        num_camels, num_players = get_num_camels_and_players(columns)
+        writer = gamelogs.GameLogWriter(output, num_camels=num_camels, num_players=num_players)
+    else:
+        writer = open(output, "w", newline="")
+        writer.write(",".join(columns) + "\n")
+
+    with writer:
+        if workers == 1:
+            for chunk in chunks:
+                write_chunk(read_game_logs(chunk, columns, output_format))
+        else:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+                # Submit chunks ahead of the writer, but never more than max_pending_chunks
+                pending = collections.deque()
+                for chunk in chunks:
+                    if len(pending) >= max_pending_chunks:
+                        write_chunk(pending.popleft().result())
+                    pending.append(executor.submit(read_game_logs, chunk, columns, output_format))
+                while len(pending) > 0:
+                    write_chunk(pending.popleft().result())
+    return output
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Merge the game logs written by rungame.py into a single file.")
+    parser.add_argument("log_dir", metavar="DIRECTORY", help="Directory containing the files game_<i>.csv")
+    parser.add_argument(
+        "--output", default=None, help="Path of the merged file (default: GameLogs.csv or GameLogs.npl in DIRECTORY)")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="csv", help="Output format (default: csv)")
+    parser.add_argument("--workers", type=int, default=1, help="Number of worker processes (default: 1)")
+    parser.add_argument(
+        "--chunk-size", type=int, default=100, help="Number of game logs parsed at a time (default: 100)")
+    parser.add_argument(
+        "--max-pending-chunks", type=int, default=None,
+        help="Maximum number of chunks held in memory, bounding memory usage (default: twice the number of workers)")
+    args = parser.parse_args()
+
+    merge_game_logs(
+        args.log_dir, output=args.output, output_format=args.format, workers=args.workers,
+        chunk_size=args.chunk_size, max_pending_chunks=args.max_pending_chunks)
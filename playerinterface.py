@@ -29,6 +29,13 @@ class PlayerInterface:
     of tuples describing all legal moves for the given player. The game engine will check that the move submitted by
     a bot is on this list.
 
+    The game_state passed to move() is a camelup.PlayerView of the live game state. It can be read like a GameState
+    and hides the other players' game winner/loser bets. Bots may modify it, e.g. to simulate moves, in which case the
+    view transparently switches to a private copy. The view is only valid during the move() call. Its lists, e.g.
+    camel_track, are camelup.PlayerViewList objects that support reading, comparing and modifying like lists but are
+    not lists themselves, so isinstance(..., list) is False and json.dumps() fails on them. copy.deepcopy(game_state)
+    returns a private GameState with real lists.
+
     Subclasses should remain stateless and the move()-function should be a static function as the game-code never
     instantiates any of the player classes.
     """
@@ -50,3 +57,24 @@ class PlayerInterface:
 #     def move(player,g):
 #         #This dumb player always makes a round winner bet
 #         return [2,random.randint(0,len(g.camels)-1)]
+
+
+class BatchPlayerInterface:
+    """
+    Bots for the vectorized engine in batchengine.py must extend this interface and implement the method move_batch().
+
+    move_batch() receives the index of the active player and the BatchGameState holding all games. It should return an
+    integer array of shape (NUM_GAMES, 3) with one action per game in the format described in batchengine.py. Rows of
+    finished games (see batch_state.active_game) are ignored.
+
+    The recommended method of selecting moves is batchengine.get_valid_move_masks(). Random numbers should be drawn
+    from batch_state.rng so that batches can be reproduced.
+
+    Unlike PlayerInterface.move(), batch bots see the complete game state, including the other players' game bets.
+    Batch bots are expected to only read the public parts of the state.
+    """
+    @staticmethod
+    def move_batch(active_player, batch_state):
+        raise NotImplementedError(
+            "Do not create an instance of the BatchPlayerInterface! "
+            "Extend this class and make sure to implement the move_batch() function.")
@@ -0,0 +1,401 @@
+"""
+Exact probabilities of the outcome of the camel race.
+
+Without bets, the rest of the game is a Markov process over the stack configuration: every step, a camel that hasn't
+moved this round is drawn uniformly and moves by a uniform dice roll, until a camel crosses the finish line. Like
+roundoutcomes.py and gameoutcomes.py, traps are assumed to stay where they are. RaceSolver computes the outcome
+distribution of this process exactly by dynamic programming over canonical states, memoizing every state it visits.
+
+States are canonicalized so that equivalent positions share one table entry:
+    - locations are stored as distances to the finish line, so a table serves every board size,
+    - camels are interchangeable, so they are relabeled by their current rank (label 0 is the leader). A state is then
+      described by the distance and height of each stack, the set of labels that have yet to move this round and
+      the traps (distance and type, the owner doesn't matter) in front of the last camel.
+A camel that rolls a 1 onto a -1 trap falls back to its field, so a round in which every camel does so can lead back
+to the same state. Such cycles are found as strongly connected components of the states (Tarjan's algorithm), and the
+values of their states are iterated to a fixed point. This converges quickly as every round of a cycle has a
+probability of at most (1 / 3) ** NUM_CAMELS with the default dice.
+
+The value of a state is the placement matrix (the probability of the camel with label i finishing in place j) or, with
+full_order=True, the probability of every finishing order of the labels. Results are translated back to camel IDs.
+
+Tables can be saved to and loaded from disk, e.g. to solve the positions of a board once and reuse them.
+"""
+import itertools
+import json
+import numpy as np
+
+FORMAT_VERSION = 1
+
+# Cycles are solved by iterating until the values change by at most this much
+CYCLE_TOLERANCE = 1e-14
+
+_solvers = {}
+
+
+class RaceSolver:
+    """
+    Solves and memoizes canonical race states, see the module documentation. A solver is specific to the number of
+    camels and the move range.
+    """
+
+    def __init__(self, num_camels=5, move_range=(1, 3), full_order=False):
+        """
+        :param num_camels: Integer number of camels.
+        :param move_range: A tuple indicating the minimum and maximum move range (inclusive).
+        :param full_order: If True, the distribution of the full finishing order is computed instead of the placement
+            matrix. This is slower and needs NUM_CAMELS! values per state.
+        """
+        self.num_camels = num_camels
+        self.move_range = tuple(move_range)
+        self.full_order = full_order
+        self.table = {}
+        # Bookkeeping of Tarjan's algorithm, see _visit()
+        self._next_index = 0
+        self._indices = {}
+        self._stack = []
+        self._edges = {}
+        if full_order:
+            self.orders = list(itertools.permutations(range(num_camels)))
+            self.order_indices = {order: i for i, order in enumerate(self.orders)}
+            self._relabelings = {}
+
+    def __len__(self):
+        return len(self.table)
+
+    def canonicalize(self, g):
+        """
+        :param g: GameState object.
+        :return: Tuple (state, labels). state is the canonical state key (stacks, remaining, traps), see solve_state().
+            labels lists the camel indices by label.
+        """
+        locations = g.camel_locations()
+        labels = sorted(range(g.NUM_CAMELS), key=lambda i: locations[i], reverse=True)
+        stacks = []
+        for camel_index in labels:
+            distance = g.BOARD_SIZE - locations[camel_index][0]
+            if len(stacks) > 0 and stacks[-1][0] == distance:
+                stacks[-1][1] += 1
+            else:
+                stacks.append([distance, 1])
+        remaining = sum(1 << label for label, camel_index in enumerate(labels) if g.camel_yet_to_move[camel_index])
+        if remaining == 0:
+            remaining = (1 << g.NUM_CAMELS) - 1
+        # Traps behind the last camel can't be reached anymore
+        traps = tuple(sorted(
+            (g.BOARD_SIZE - trap_location, entry[0]) for trap_location, entry in enumerate(g.trap_track)
+            if len(entry) > 0 and g.BOARD_SIZE - trap_location < stacks[-1][0]))
+        return (tuple(tuple(stack) for stack in stacks), remaining, traps), labels
+
+    def solve(self, g):
+        """
+        :param g: GameState object.
+        :return: Tuple (value, labels): the value of the canonical state (see solve_state()) and the camel indices by
+            label.
+        """
+        state, labels = self.canonicalize(g)
+        if not g.active_game or state[0][0][0] <= 0:
+            return self._final_value(), labels
+        return self.solve_state(state), labels
+
+    def solve_state(self, state):
+        """
+        :param state: Tuple (stacks, remaining, traps).
+            - stacks: Tuple of (distance to the finish line, number of camels) from the front stack to the back. The
+              camels of a stack are labeled from top to bottom, continuing the labels of the stacks in front.
+            - remaining: Bit mask of the labels that have yet to move this round.
+            - traps: Tuple of (distance to the finish line, trap type).
+        :return: NumPy array. The placement matrix (labels x places), or the probabilities of self.orders.
+        """
+        value = self.table.get(state)
+        if value is None:
+            self._visit(state)
+            value = self.table[state]
+        return value
+
+    def _visit(self, state):
+        """
+        Depth-first search of Tarjan's algorithm. The states of a strongly connected component are solved as soon as
+        the component is complete, all states reachable from it are solved by then.
+        :param state: See solve_state().
+        :return: The lowlink of the state.
+        """
+        index = self._next_index
+        self._next_index += 1
+        self._indices[state] = index
+        self._stack.append(state)
+        transitions = self._transitions(state)
+        self._edges[state] = transitions
+
+        low = index
+        for _, child, _ in transitions:
+            if child is None or child in self.table:
+                continue
+            # Only the states on the stack have an index
+            child_index = self._indices.get(child)
+            low = min(low, self._visit(child) if child_index is None else child_index)
+
+        if low == index:
+            component = []
+            while len(component) == 0 or component[-1] != state:
+                component.append(self._stack.pop())
+            self._solve_component(component)
+        return low
+
+    def _solve_component(self, component):
+        """
+        Solve the states of a strongly connected component. Cycles are iterated to a fixed point, see the module
+        documentation.
+        :param component: List of states, the states found last first.
+        :return:
+        """
+        if len(component) == 1 and all(child != component[0] for _, child, _ in self._edges[component[0]]):
+            values = {component[0]: self._combine(self._edges[component[0]], {})}
+        else:
+            values = {state: self._zeros() for state in component}
+            change = None
+            while change is None or change > CYCLE_TOLERANCE:
+                change = 0.0
+                for state in component:
+                    value = self._combine(self._edges[state], values)
+                    change = max(change, np.abs(value - values[state]).max())
+                    values[state] = value
+        for state in component:
+            self.table[state] = values[state]
+            del self._edges[state]
+            del self._indices[state]
+
+    def _combine(self, transitions, values):
+        """
+        :param transitions: List of transitions of a state, see _transitions().
+        :param values: Dictionary of values of the states that aren't in the table yet.
+        :return: The value of the state.
+        """
+        value = self._zeros()
+        for weight, child, new_labels in transitions:
+            if child is None:
+                child_value = self._final_value()
+            else:
+                child_value = values.get(child)
+                if child_value is None:
+                    child_value = self.table[child]
+            value += weight * self._relabel(child_value, new_labels)
+        return value
+
+    def _transitions(self, state):
+        """
+        :param state: See solve_state().
+        :return: List of tuples (probability, child, new_labels) for every camel that can move and every dice roll.
+            child is the next state, or None if the race is over, new_labels maps the labels of the state to the labels
+            of the child.
+        """
+        stacks, remaining, traps = state
+        trap_dict = dict(traps)
+        rolls = range(self.move_range[0], self.move_range[1] + 1)
+        movers = [label for label in range(self.num_camels) if remaining & (1 << label)]
+        weight = 1.0 / (len(movers) * len(rolls))
+        transitions = []
+
+        for label in movers:
+            # Find the stack of the camel. The camel and the camels above it (smaller labels of the same stack) move.
+            first_label = 0
+            for stack_index, (distance, size) in enumerate(stacks):
+                if label < first_label + size:
+                    break
+                first_label += size
+            for roll in rolls:
+                new_distance = distance - roll
+                trap_type = trap_dict.get(new_distance, 0)
+                new_distance -= trap_type
+                child_stacks, new_labels = self._move(
+                    stacks, stack_index, first_label, label, new_distance, trap_type == -1)
+                if child_stacks[0][0] <= 0:
+                    transitions.append((weight, None, new_labels))
+                    continue
+                child_remaining = 0
+                for old_label in movers:
+                    if old_label != label:
+                        child_remaining |= 1 << new_labels[old_label]
+                if child_remaining == 0:
+                    child_remaining = (1 << self.num_camels) - 1
+                child = (child_stacks, child_remaining, tuple(trap for trap in traps if trap[0] < child_stacks[-1][0]))
+                transitions.append((weight, child, new_labels))
+        return transitions
+
+    def _zeros(self):
+        return np.zeros(len(self.orders) if self.full_order else (self.num_camels, self.num_camels))
+
+    def _move(self, stacks, stack_index, first_label, label, new_distance, from_bottom):
+        """
+        Move a camel and the camels above it.
+        :return: Tuple (child_stacks, new_labels): the canonical stacks after the move and the new label of each old
+            label.
+        """
+        # Stacks as lists of old labels from top to bottom, keyed by distance
+        fields = {}
+        next_label = 0
+        for distance, size in stacks:
+            fields[distance] = list(range(next_label, next_label + size))
+            next_label += size
+        source = fields[stacks[stack_index][0]]
+        moving = source[:label - first_label + 1]
+        del source[:label - first_label + 1]
+        if len(source) == 0:
+            del fields[stacks[stack_index][0]]
+        if from_bottom:
+            fields[new_distance] = fields.get(new_distance, []) + moving
+        else:
+            fields[new_distance] = moving + fields.get(new_distance, [])
+
+        child_stacks = []
+        new_labels = [0] * self.num_camels
+        next_label = 0
+        for distance in sorted(fields):
+            for old_label in fields[distance]:
+                new_labels[old_label] = next_label
+                next_label += 1
+            child_stacks.append((distance, len(fields[distance])))
+        return tuple(child_stacks), new_labels
+
+    def _final_value(self):
+        """
+        :return: The value of a finished race in canonical labels, i.e. label i finishes in place i.
+        """
+        if self.full_order:
+            value = np.zeros(len(self.orders))
+            value[self.order_indices[tuple(range(self.num_camels))]] = 1.0
+            return value
+        return np.eye(self.num_camels)
+
+    def _relabel(self, child_value, new_labels):
+        """
+        Express the value of a child state in the labels of the parent state.
+        :param child_value: Value of the child state.
+        :param new_labels: List mapping the labels of the parent to the labels of the child.
+        :return: NumPy array.
+        """
+        if not self.full_order:
+            return child_value[new_labels]
+        new_labels = tuple(new_labels)
+        indices = self._relabelings.get(new_labels)
+        if indices is None:
+            # Order j of the child corresponds to the order of the parent labels at the same places
+            old_labels = [0] * self.num_camels
+            for old_label, new_label in enumerate(new_labels):
+                old_labels[new_label] = old_label
+            indices = np.array([
+                self.order_indices[tuple(old_labels[new_label] for new_label in order)] for order in self.orders])
+            self._relabelings[new_labels] = indices
+        value = np.empty(len(self.orders))
+        value[indices] = child_value
+        return value
+
+    def save(self, path):
+        """
+        Save the table as a NumPy .npz file.
+        :param path: Path of the file.
+        :return:
+        """
+        max_traps = max([len(traps) for _, _, traps in self.table] + [0])
+        keys = np.zeros((len(self.table), 3 + 2 * self.num_camels + 2 * max_traps), dtype=np.int16)
+        for row, (stacks, remaining, traps) in zip(keys, self.table):
+            row[0] = remaining
+            row[1] = len(stacks)
+            row[2:2 + 2 * len(stacks)] = [x for stack in stacks for x in stack]
+            offset = 2 + 2 * self.num_camels
+            row[offset] = len(traps)
+            row[offset + 1:offset + 1 + 2 * len(traps)] = [x for trap in traps for x in trap]
+        values = np.array(list(self.table.values())).reshape((len(self.table), -1))
+        header = {
+            "format_version": FORMAT_VERSION, "num_camels": self.num_camels, "move_range": list(self.move_range),
+            "full_order": self.full_order}
+        np.savez_compressed(path, header=np.array(json.dumps(header)), keys=keys, values=values)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a table saved with save().
+        :param path: Path of the file.
+        :return: RaceSolver object.
+        """
+        with np.load(path, allow_pickle=False) as data:
+            header = json.loads(str(data["header"]))
+            if header["format_version"] != FORMAT_VERSION:
+                raise ValueError("Unsupported race table format version {}".format(header["format_version"]))
+            solver = cls(header["num_camels"], tuple(header["move_range"]), header["full_order"])
+            keys, values = data["keys"], data["values"]
+        shape = (-1,) if solver.full_order else (solver.num_camels, solver.num_camels)
+        offset = 2 + 2 * solver.num_camels
+        for row, value in zip(keys.tolist(), values):
+            stacks = tuple((row[2 + 2 * i], row[3 + 2 * i]) for i in range(row[1]))
+            traps = tuple((row[offset + 1 + 2 * i], row[offset + 2 + 2 * i]) for i in range(row[offset]))
+            solver.table[(stacks, row[0], traps)] = value.reshape(shape)
+        return solver
+
+    def update(self, other):
+        """
+        Add the table of another solver with the same parameters, e.g. loaded from disk.
+        :param other: RaceSolver object.
+        :return:
+        """
+        if (other.num_camels, other.move_range, other.full_order) != (
+                self.num_camels, self.move_range, self.full_order):
+            raise ValueError("Cannot merge race tables of different parameters")
+        self.table.update(other.table)
+
+
+def get_solver(g, full_order=False):
+    """
+    The solver shared by all calls with the same game constants.
+    :param g: GameState object.
+    :param full_order: See RaceSolver.
+    :return: RaceSolver object.
+    """
+    key = (g.NUM_CAMELS, tuple(g.MOVE_RANGE), full_order)
+    if key not in _solvers:
+        _solvers[key] = RaceSolver(g.NUM_CAMELS, g.MOVE_RANGE, full_order)
+    return _solvers[key]
+
+
+def clear_cache():
+    """
+    Drop the tables of the shared solvers.
+    :return:
+    """
+    _solvers.clear()
+
+
+def get_placement_probabilities(g, solver=None):
+    """
+    Compute the exact probability of each camel finishing the game in each place.
+    :param g: GameState object.
+    :param solver: RaceSolver object, or None for the shared solver.
+    :return: Dictionary mapping camel IDs to lists [P(first), P(second), ..., P(last)]. The first and last entries are
+        the probabilities of winning and losing the game.
+    """
+    if solver is None:
+        solver = get_solver(g)
+    value, labels = solver.solve(g)
+    if solver.full_order:
+        value = np.array([
+            [sum(p for order, p in zip(solver.orders, value) if order[place] == label)
+             for place in range(g.NUM_CAMELS)] for label in range(g.NUM_CAMELS)])
+    return {g.CAMELS[camel_index]: value[label].tolist() for label, camel_index in enumerate(labels)}
+
+
+def get_finishing_order_distribution(g, solver=None):
+    """
+    Compute the exact distribution of the finishing order of the camels.
+    :param g: GameState object.
+    :param solver: RaceSolver object with full_order=True, or None for the shared solver.
+    :return: Dictionary mapping tuples of camel IDs from first to last place to probabilities. Orders that cannot
+        occur are omitted.
+    """
+    if solver is None:
+        solver = get_solver(g, full_order=True)
+    if not solver.full_order:
+        raise ValueError("The finishing order distribution needs a solver with full_order=True")
+    value, labels = solver.solve(g)
+    return {
+        tuple(g.CAMELS[labels[label]] for label in order): float(p)
+        for order, p in zip(solver.orders, value) if p > 0}
@@ -0,0 +1,332 @@
+"""
+Exact probabilities for the outcome of the current round.
+
+The rest of a round is a small finite tree: the camels that haven't moved yet are drawn in random order and each moves
+by a dice roll within MOVE_RANGE. This module enumerates that tree assuming that only camels move for the rest of the
+round, i.e. traps stay where they are. Sub-trees are memoized on the stack configuration, the traps and the camels
+that have yet to move, so repeated queries within a round (and positions reached through different move orders) are
+only enumerated once.
+
+get_trap_placement_evaluations() scores all trap placements of a player in a single enumeration: the paths of all
+placements are shared until a camel lands on one of the placements, and only then a sub-tree with that trap is
+enumerated.
+
+The functions can also share a zobrist.TranspositionTable with search-based bots. Results are then stored under the
+position hash of game states with position hashing enabled (see camelup.enable_position_hashing()), which skips
+building the memoization key for positions that have been seen before.
+"""
+import collections
+import functools
+import camelup
+from actionids import MOVE_TRAP_ACTION_ID
+
+# Maximum number of memoized sub-trees
+CACHE_SIZE = 2 ** 17
+
+# Evaluation of a trap placement for the rest of the round
+#   - expected_coin_gain: expected_trap_income plus bet_value_change, minus the expected income of the player's current
+#     trap (if any). This is the expected gain of the move compared to not moving the trap.
+#   - expected_trap_income: Expected coins the trap earns until the end of the round.
+#   - bet_value_change: Change of the expected payout of the player's round bets.
+#   - round_winner_change: Dictionary mapping camel IDs to the change of their probability of winning the round.
+#   - placement_probabilities: Like get_round_outcome_probabilities().
+TrapPlacementEvaluation = collections.namedtuple(
+    "TrapPlacementEvaluation", ["expected_coin_gain", "expected_trap_income", "bet_value_change", "round_winner_change",
+                                "placement_probabilities"])
+
+
+def get_round_outcome_probabilities(g, table=None):
+    """
+    Compute the exact probability of each camel finishing the current round in first place, second place or worse,
+    and the expected number of coins each player earns from their trap until the end of the round.
+    :param g: GameState object.
+    :param table: zobrist.TranspositionTable object, or None.
+    :return: Tuple (placement_probabilities, expected_trap_income).
+        - placement_probabilities: Dictionary mapping camel IDs to lists [P(first), P(second), P(third or worse)].
+        - expected_trap_income: List with the expected trap coins of each player.
+    """
+    outcomes = None
+    if table is not None and g.position_hash is not None:
+        key = ("round_outcomes", g.position_hash)
+        outcomes = table.get(key)
+    if outcomes is None:
+        outcomes = _round_outcomes(*get_round_key(g))
+        if table is not None and g.position_hash is not None:
+            # The depth is the number of camel moves enumerated
+            table.store(key, outcomes, depth=sum(g.camel_yet_to_move))
+    first, second, trap_income = outcomes
+    placement_probabilities = {
+        camel: [first[i], second[i], 1.0 - first[i] - second[i]] for i, camel in enumerate(g.CAMELS)}
+    return placement_probabilities, list(trap_income)
+
+
+def get_round_bet_expected_values(g, table=None):
+    """
+    Expected payout of placing a round winner bet on each camel, using the next available betting card.
+    :param g: GameState object.
+    :param table: zobrist.TranspositionTable object, or None.
+    :return: Dictionary mapping camel IDs to expected payouts. Camels without betting cards left are omitted.
+    """
+    placement_probabilities, _ = get_round_outcome_probabilities(g, table)
+    expected_values = {}
+    for camel, (p_first, p_second, p_other) in placement_probabilities.items():
+        card = len([bet for bet in g.round_bets if bet[0] == camel])
+        if card < len(g.FIRST_PLACE_ROUND_PAYOUT):
+            expected_values[camel] = (
+                p_first * g.FIRST_PLACE_ROUND_PAYOUT[card] + p_second * g.SECOND_PLACE_ROUND_PAYOUT[card] +
+                p_other * g.THIRD_OR_WORSE_PLACE_ROUND_PAYOUT)
+    return expected_values
+
+
+def get_trap_placement_evaluations(g, player, actions=None):
+    """
+    Evaluate every trap placement of a player for the rest of the round, see the module documentation.
+    :param g: GameState object.
+    :param player: Player ID integer.
+    :param actions: List of trap moves (MOVE_TRAP_ACTION_ID, trap_type, trap_location) to evaluate. If None, all valid
+        trap moves of the player are evaluated.
+    :return: Dictionary mapping the trap moves to TrapPlacementEvaluation.
+    """
+    if actions is None:
+        actions = [action for action in camelup.get_valid_moves(g, player) if action[0] == MOVE_TRAP_ACTION_ID]
+    current_probabilities, current_trap_income = get_round_outcome_probabilities(g)
+    current_bet_value = _round_bet_value(g, player, current_probabilities)
+
+    stacks, remaining, traps, board_size, move_range, num_camels, num_players = get_round_key(g)
+    # The player's trap is removed from its current location by the move
+    traps = tuple(trap for trap in traps if trap[2] != player)
+    placements = [(action[2], action[1]) for action in actions]
+    values = _trap_placement_outcomes(
+        stacks, remaining, traps, board_size, move_range, num_camels, num_players, player, placements)
+
+    evaluations = {}
+    for action, value in zip(actions, values):
+        first, second, trap_income = value[:num_camels], value[num_camels:-1], value[-1]
+        placement_probabilities = {
+            camel: [first[i], second[i], 1.0 - first[i] - second[i]] for i, camel in enumerate(g.CAMELS)}
+        bet_value_change = _round_bet_value(g, player, placement_probabilities) - current_bet_value
+        evaluations[action] = TrapPlacementEvaluation(
+            trap_income + bet_value_change - current_trap_income[player], trap_income, bet_value_change,
+            {camel: first[i] - current_probabilities[camel][0] for i, camel in enumerate(g.CAMELS)},
+            placement_probabilities)
+    return evaluations
+
+
+def _round_bet_value(g, player, placement_probabilities):
+    """
+    :return: The expected payout of the round bets a player has placed.
+    """
+    value = 0.0
+    cards = collections.Counter()
+    for camel, bet_player in g.round_bets:
+        if bet_player == player:
+            p_first, p_second, p_other = placement_probabilities[camel]
+            value += (
+                p_first * g.FIRST_PLACE_ROUND_PAYOUT[cards[camel]] +
+                p_second * g.SECOND_PLACE_ROUND_PAYOUT[cards[camel]] + p_other * g.THIRD_OR_WORSE_PLACE_ROUND_PAYOUT)
+        cards[camel] += 1
+    return value
+
+
+def _trap_placement_outcomes(stacks, remaining, traps, board_size, move_range, num_camels, num_players, player,
+                             placements):
+    """
+    Enumerate the rest of the round once for a list of trap placements. See get_round_key() for the parameters.
+    :param traps: The traps without the player's trap.
+    :param player: Owner of the placed trap.
+    :param placements: List of (trap_location, trap_type).
+    :return: List of tuples (P(first) of each camel..., P(second) of each camel..., expected trap income), one per
+        placement.
+    """
+    placements_by_location = {}
+    for k, (trap_location, trap_type) in enumerate(placements):
+        placements_by_location.setdefault(trap_location, []).append((k, trap_type))
+    trap_dict = {board_loc: (trap_type, trap_player) for board_loc, trap_type, trap_player in traps}
+    rolls = range(move_range[0], move_range[1] + 1)
+    memo = {}
+
+    def recurse(stacks, remaining):
+        """
+        :return: Tuple (base, values). base is the outcome without the player's trap, values maps the indices of the
+            placements whose outcome differs from base to their outcome.
+        """
+        key = (stacks, remaining)
+        if key in memo:
+            return memo[key]
+
+        if len(remaining) == 0 or stacks[-1][0] >= board_size:
+            ranking = rank_camels(stacks)
+            base = [0.0] * (2 * num_camels + 1)
+            base[ranking[0]] = 1.0
+            base[num_camels + ranking[1]] = 1.0
+            memo[key] = base, {}
+            return memo[key]
+
+        weight = 1.0 / (len(remaining) * len(rolls))
+        base = [0.0] * (2 * num_camels + 1)
+        deltas = {}
+        for camel_index in remaining:
+            next_remaining = tuple(i for i in remaining if i != camel_index)
+            board_loc = [loc for loc, stack in stacks if camel_index in stack][0]
+            for roll in rolls:
+                landing = board_loc + roll
+                trap = trap_dict.get(landing)
+                if trap is None:
+                    child_base, child_values = recurse(move_stack(stacks, camel_index, roll, False), next_remaining)
+                    diverging = placements_by_location.get(landing, ())
+                else:
+                    child_base, child_values = recurse(
+                        move_stack(stacks, camel_index, roll + trap[0], trap[0] == -1), next_remaining)
+                    diverging = ()
+                for i in range(len(base)):
+                    base[i] += weight * child_base[i]
+
+                # Placements that the camel lands on leave the shared path here
+                for k, trap_type in diverging:
+                    child_stacks = move_stack(stacks, camel_index, roll + trap_type, trap_type == -1)
+                    sub_first, sub_second, sub_trap_income = _round_outcomes(
+                        child_stacks, next_remaining,
+                        reachable_traps(child_stacks, next_remaining, sorted(traps + ((landing, trap_type, player),))),
+                        board_size, move_range, num_camels, num_players)
+                    value = sub_first + sub_second + (1.0 + sub_trap_income[player],)
+                    delta = deltas.setdefault(k, [0.0] * len(base))
+                    for i in range(len(base)):
+                        delta[i] += weight * (value[i] - child_base[i])
+                for k, value in child_values.items():
+                    if landing != placements[k][0]:
+                        delta = deltas.setdefault(k, [0.0] * len(base))
+                        for i in range(len(base)):
+                            delta[i] += weight * (value[i] - child_base[i])
+
+        memo[key] = base, {k: [b + d for b, d in zip(base, delta)] for k, delta in deltas.items()}
+        return memo[key]
+
+    base, values = recurse(stacks, remaining)
+    return [tuple(values.get(k, base)) for k in range(len(placements))]
+
+
+def get_round_key(g):
+    """
+    The canonical description of a game state used by the enumeration (and as memoization key).
+    :param g: GameState object.
+    :return: Tuple (stacks, remaining, traps, board_size, move_range, num_camels, num_players).
+        - stacks: Tuple of (board_location, camel indices from bottom to top) sorted by location.
+        - remaining: Tuple of the indices of the camels that haven't moved this round.
+        - traps: Tuple of (board_location, trap_type, player) sorted by location.
+    """
+    stacks = {}
+    for camel_index in range(g.NUM_CAMELS):
+        board_loc, stack_loc = g.camel_location(camel_index)
+        stacks.setdefault(board_loc, []).append((stack_loc, camel_index))
+    stacks = tuple(sorted(
+        (board_loc, tuple(camel_index for _, camel_index in sorted(stack))) for board_loc, stack in stacks.items()))
+    remaining = tuple(i for i in range(g.NUM_CAMELS) if g.camel_yet_to_move[i])
+    traps = tuple(
+        (board_loc, entry[0], entry[1]) for board_loc, entry in enumerate(g.trap_track) if len(entry) > 0)
+    return stacks, remaining, traps, g.BOARD_SIZE, tuple(g.MOVE_RANGE), g.NUM_CAMELS, g.NUM_PLAYERS
+
+
+def move_stack(stacks, camel_index, distance, stack_from_bottom):
+    """
+    Move a camel and the camels on top of it in a stack tuple as returned by get_round_key().
+    :param stacks: Tuple of (board_location, camel indices from bottom to top) sorted by location.
+    :param camel_index: Camel index integer.
+    :param distance: Number of fields to move the camels by, including trap effects.
+    :param stack_from_bottom: Boolean, whether the moved camels are put underneath the camels on the target field.
+    :return: The new stacks tuple.
+    """
+    new_stacks = dict(stacks)
+    for board_loc, stack in stacks:
+        if camel_index in stack:
+            stack_loc = stack.index(camel_index)
+            moving = stack[stack_loc:]
+            if stack_loc > 0:
+                new_stacks[board_loc] = stack[:stack_loc]
+            else:
+                del new_stacks[board_loc]
+            target = board_loc + distance
+            if stack_from_bottom:
+                new_stacks[target] = moving + new_stacks.get(target, ())
+            else:
+                new_stacks[target] = new_stacks.get(target, ()) + moving
+            return tuple(sorted(new_stacks.items()))
+    raise ValueError("Camel {} is not on the track".format(camel_index))
+
+
+def reachable_traps(stacks, remaining, traps):
+    """
+    Drop the traps that no camel can land on for the rest of the round, so that sub-trees that only differ in such
+    traps share their memoized result. Camels never move backwards and land in front of their field, so traps up to
+    the field of the last camel that has yet to move are out of reach.
+    :param stacks: Tuple of (board_location, camel indices from bottom to top) sorted by location.
+    :param remaining: Tuple of the indices of the camels that haven't moved this round.
+    :param traps: Iterable of (board_location, trap_type, player) sorted by location.
+    :return: Tuple of the reachable traps.
+    """
+    if len(remaining) == 0:
+        return ()
+    for board_loc, stack in stacks:
+        if any(camel_index in remaining for camel_index in stack):
+            return tuple(trap for trap in traps if trap[0] > board_loc)
+
+
+def rank_camels(stacks):
+    """
+    Order the camels from first to last place.
+    :param stacks: Tuple of (board_location, camel indices from bottom to top) sorted by location.
+    :return: Tuple of camel indices.
+    """
+    return tuple(camel_index for _, stack in reversed(stacks) for camel_index in reversed(stack))
+
+
+def clear_cache():
+    """
+    Drop all memoized sub-trees.
+    :return:
+    """
+    _round_outcomes.cache_clear()
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def _round_outcomes(stacks, remaining, traps, board_size, move_range, num_camels, num_players):
+    """
+    Enumerate the rest of the round. See get_round_key() for the parameters.
+    :return: Tuple (first, second, trap_income) of tuples with the probability of each camel finishing the round
+        first and second and the expected trap income of each player.
+    """
+    first = [0.0] * num_camels
+    second = [0.0] * num_camels
+    trap_income = [0.0] * num_players
+
+    # The round is over once all camels have moved or a camel has crossed the finish line
+    if len(remaining) == 0 or stacks[-1][0] >= board_size:
+        ranking = rank_camels(stacks)
+        first[ranking[0]] = 1.0
+        second[ranking[1]] = 1.0
+        return tuple(first), tuple(second), tuple(trap_income)
+
+    trap_dict = {board_loc: (trap_type, player) for board_loc, trap_type, player in traps}
+    rolls = range(move_range[0], move_range[1] + 1)
+    weight = 1.0 / (len(remaining) * len(rolls))
+    for camel_index in remaining:
+        next_remaining = tuple(i for i in remaining if i != camel_index)
+        board_loc = [loc for loc, stack in stacks if camel_index in stack][0]
+        for roll in rolls:
+            distance = roll
+            stack_from_bottom = False
+            trap = trap_dict.get(board_loc + roll)
+            if trap is not None:
+                distance += trap[0]
+                stack_from_bottom = trap[0] == -1
+                trap_income[trap[1]] += weight
+
+            sub_first, sub_second, sub_trap_income = _round_outcomes(
+                move_stack(stacks, camel_index, distance, stack_from_bottom), next_remaining, traps,
+                board_size, move_range, num_camels, num_players)
+            for i in range(num_camels):
+                first[i] += weight * sub_first[i]
+                second[i] += weight * sub_second[i]
+            for i in range(num_players):
+                trap_income[i] += weight * sub_trap_income[i]
+
+    return tuple(first), tuple(second), tuple(trap_income)
@@ -1,43 +1,201 @@
-import pandas as pd
 import os
-import sys
+import random
+import argparse
+import functools
+import contextlib
+import time
+import concurrent.futures
 import camelup
+import gamelogs
+import gamerng
+import instrumentation
 import bots
 
+LOG_FORMATS = ("csv", "columnar")
+COLUMNAR_LOG_FILE = "GameLogs.npl"
 
-def run_game(num_games, players):
+
+def get_game_seed(master_seed, game_index):
+    """
+    Derive the seed of a single game from the seed of the whole run. Any game can be reproduced from the master seed
+    and its index alone, independent of how many games were played before it and by which process.
+    :param master_seed: Integer seed of the run.
+    :param game_index: Integer index of the game within the run.
+    :return:
+    """
+    return "{}:{}".format(master_seed, game_index)
+
+
+def play_seeded_game(players, master_seed, game_index, record=False, game_rng=False, game_instrumentation=None,
+                     stop=None):
+    """
+    Reproducibly play the game with the given index. Note that this reseeds the global random module, which the bots
+    draw from.
+    :param players: A list of classes inheriting PlayerInterface
+    :param master_seed: Integer seed of the run.
+    :param game_index: Integer index of the game within the run.
+    :param record: Passed on to camelup.play_game().
+    :param game_rng: If True, the camels and dice are drawn from the counter-based stream of the game (see gamerng.py)
+        instead of the random module.
+    :param game_instrumentation: Passed on to camelup.play_game() as instrumentation.
+    :param stop: Passed on to camelup.play_game().
+    :return: The return value of camelup.play_game().
+    """
+    random.seed(get_game_seed(master_seed, game_index))
+    rng = gamerng.GameRandom(master_seed, game_index) if game_rng else None
+    return camelup.play_game(players=players, record=record, rng=rng, instrumentation=game_instrumentation, stop=stop)
+
+
+def play_seeded_game_iter(players, master_seed, game_index, game_rng=False, game_instrumentation=None, stop=None):
+    """
+    Reproducibly play the game with the given index turn by turn, see play_seeded_game() and camelup.play_game_iter().
+    The random module is reseeded when the first turn is requested.
+    :return: Generator of tuples (turn, g), see camelup.play_game_iter().
+    """
+    random.seed(get_game_seed(master_seed, game_index))
+    rng = gamerng.GameRandom(master_seed, game_index) if game_rng else None
+    yield from camelup.play_game_iter(players=players, rng=rng, instrumentation=game_instrumentation, stop=stop)
+
+
+def _stop_after(max_turns, g, round_id):
+    return round_id >= max_turns
+
+
+def run_games(players, master_seed, game_indices, log_dir="game_logs", log_format="csv", game_rng=False,
+              instrument=False, log_every=1, max_turns=None):
+    """
+    Play a chunk of games and write or collect their logs. This is the unit of work of a worker process. The logs are
+    written turn by turn while the games are played (see camelup.play_game_iter()).
+    :param players: A list of classes inheriting PlayerInterface
+    :param master_seed: Integer seed of the run.
+    :param game_indices: Iterable of game indices.
+    :param log_dir: Directory to write the CSV game logs to.
+    :param log_format: "csv" to write one CSV file per game or "columnar" to collect the logs in memory.
+    :param game_rng: Passed on to play_seeded_game().
+    :param instrument: If True, collect timers and counters, see instrumentation.py. Writing the logs of the turns is
+        counted in the logging phase of the games.
+    :param log_every: Only the logs of games whose index is a multiple of log_every are written.
+    :param max_turns: If given, games end after this many turns even if no camel has passed the finish line.
+    :return: Tuple (results, log_columns, stats).
+        - results: List of tuples (player_money_values, game_winner), one per game.
+        - log_columns: With the columnar format, a dictionary mapping column names to NumPy arrays, which the caller
+          writes with a gamelogs.GameLogWriter. None otherwise.
+        - stats: instrumentation.Instrumentation object if instrument is True, None otherwise.
+    """
+    if log_every < 1:
+        raise ValueError("log_every must be at least 1, got {}".format(log_every))
+    results = []
+    log_buffer = gamelogs.GameLogBuffer(num_players=len(players)) if log_format == "columnar" else None
+    stats = instrumentation.Instrumentation() if instrument else None
+    stop = functools.partial(_stop_after, max_turns) if max_turns is not None else None
+    for i in game_indices:
+        turns = play_seeded_game_iter(players, master_seed, i, game_rng=game_rng, game_instrumentation=stats, stop=stop)
+        if i % log_every != 0:
+            for _, gamestate in turns:
+                pass
+            results.append((gamestate.player_money_values, gamestate.game_winner))
+            continue
+        if log_buffer is not None:
+            gamestate = log_buffer.add_turns(i, turns)
+        else:
+            gamestate = gamelogs.write_csv_game(os.path.join(log_dir, "game_{}.csv".format(i)), turns)
+        results.append((gamestate.player_money_values, gamestate.game_winner))
+    return results, log_buffer.to_columns() if log_buffer is not None else None, stats
+
+
+def run_game(num_games, players, workers=1, seed=None, chunk_size=100, log_dir="game_logs", log_format="csv",
+             game_rng=False, stats_file=None, log_every=1, max_turns=None):
     """
     Simulate Camel Up games with the given list of player bots
     :param num_games: An integer
     :param players: A list of classes inheriting PlayerInterface
-    :return:
+    :param workers: Number of worker processes. With 1, all games are played in the current process.
+    :param seed: Master seed of the run. If None, a random seed is drawn and printed. The games (and therefore the
+        logs and results) only depend on the seed, not on the number of workers.
+    :param chunk_size: Number of consecutive games assigned to a worker at a time.
+    :param log_dir: Directory to write the game logs to.
+    :param log_format: "csv" to write one CSV file per game (game_<i>.csv) or "columnar" to stream all games into a
+        single columnar file (see gamelogs.py), which is much faster to write and read.
+    :param game_rng: If True, every game draws its camels and dice from its own counter-based stream (see gamerng.py).
+    :param stats_file: If given, timers and counters are collected in all games (see instrumentation.py) and written to
+        this file as JSON at the end of the run.
+    :param log_every: Only write the logs of every log_every-th game, i.e. of the games whose index is a multiple of it.
+    :param max_turns: If given, games end after this many turns even if no camel has passed the finish line. The results
+        of such games have an empty list of winners.
+    :return: List of tuples (player_money_values, game_winner), one per game in order of the game index.
     """
+    if log_format not in LOG_FORMATS:
+        raise ValueError("Unknown log format {}, must be one of {}".format(log_format, LOG_FORMATS))
+    if log_every < 1:
+        raise ValueError("log_every must be at least 1, got {}".format(log_every))
+    if seed is None:
+        seed = random.SystemRandom().randrange(2 ** 32)
+        print("Using seed {}".format(seed))
+    os.makedirs(log_dir, exist_ok=True)
 
-    for i in range(num_games):
-        if i % 100 == 0:
-            print("Simulating game {} out of {}".format(i+1, num_games))
-        game, gamestate = camelup.play_game(players=players)
-        game = pd.DataFrame(game)
-        game.to_csv(path_or_buf=os.path.join("game_logs", "game_{}.csv".format(i)))
+    chunks = [range(i, min(i + chunk_size, num_games)) for i in range(0, num_games, chunk_size)]
+    run_chunk = functools.partial(
+        run_games, players, seed, log_dir=log_dir, log_format=log_format, game_rng=game_rng,
+        instrument=stats_file is not None, log_every=log_every, max_turns=max_turns)
+    results = []
+    stats = instrumentation.Instrumentation() if stats_file is not None else None
+    start = time.perf_counter()
+    with contextlib.ExitStack() as stack:
+        log_writer = None
+        if log_format == "columnar":
+            log_writer = stack.enter_context(
+                gamelogs.GameLogWriter(os.path.join(log_dir, COLUMNAR_LOG_FILE), num_players=len(players)))
+        if workers == 1:
+            chunk_outputs = map(run_chunk, chunks)
+        else:
+            executor = stack.enter_context(concurrent.futures.ProcessPoolExecutor(max_workers=workers))
+            chunk_outputs = executor.map(run_chunk, chunks)
+        for chunk, (chunk_results, log_columns, chunk_stats) in zip(chunks, chunk_outputs):
+            print("Simulated game {} out of {}".format(chunk.stop, num_games))
+            results += chunk_results
+            if stats is not None:
+                stats.merge(chunk_stats)
+            if log_writer is not None:
+                with stats.timer("write_logs") if stats is not None else contextlib.nullcontext():
+                    log_writer.write_columns(log_columns)
+    if stats is not None:
+        stats.dump(
+            stats_file, players=[player.__name__ for player in players], workers=workers,
+            run_seconds=time.perf_counter() - start)
+    return results
 
 
 if __name__ == "__main__":
-    if len(sys.argv) < 3:
-        print(
-            "Usage: python {} <NUM_GAMES> <PLAYER_1> ... <PLAYER_N>\n".format(sys.argv[0]) +
-            "PLAYER_J should be the name of a bot class to be imported from bots.py\n" +
-            "The game can technically run with a single player")
-        exit(0)
-
-    ng = None
-    try:
-        ng = int(sys.argv[1])
-    except ValueError:
-        print("NUM_GAMES must be an integer")
+    parser = argparse.ArgumentParser(
+        description="Simulate Camel Up games. The game logs are written to the directory game_logs.",
+        epilog="The game can technically run with a single player")
+    parser.add_argument("num_games", type=int, metavar="NUM_GAMES", help="Number of games to simulate")
+    parser.add_argument(
+        "players", nargs="+", metavar="PLAYER",
+        help="PLAYER_J should be the name of a bot class to be imported from bots.py")
+    parser.add_argument("--workers", type=int, default=1, help="Number of worker processes (default: 1)")
+    parser.add_argument("--seed", type=int, default=None, help="Master seed to reproduce a run (default: random)")
+    parser.add_argument(
+        "--chunk-size", type=int, default=100, help="Number of games assigned to a worker at a time (default: 100)")
+    parser.add_argument(
+        "--log-format", choices=LOG_FORMATS, default="csv",
+        help="csv writes one file per game, columnar a single file {} (default: csv)".format(COLUMNAR_LOG_FILE))
+    parser.add_argument(
+        "--game-rng", action="store_true",
+        help="Draw camels and dice from a counter-based stream per game instead of the random module")
+    parser.add_argument(
+        "--stats", default=None, metavar="FILE", help="Collect timers and counters and write them to FILE as JSON")
+    parser.add_argument(
+        "--log-every", type=int, default=1, metavar="K", help="Only write the logs of every K-th game (default: 1)")
+    parser.add_argument(
+        "--max-turns", type=int, default=None, help="End games after this many turns (default: no limit)")
+    args = parser.parse_args()
 
     p = []
-    for botname in sys.argv[2:]:
+    for botname in args.players:
         p.append(getattr(bots, botname))
 
-    print("Simulating {} games  with {} players: {}...".format(ng, len(p), str(p)))
-    run_game(num_games=ng, players=p)
+    print("Simulating {} games  with {} players: {}...".format(args.num_games, len(p), str(p)))
+    run_game(num_games=args.num_games, players=p, workers=args.workers, seed=args.seed, chunk_size=args.chunk_size,
+             log_format=args.log_format, game_rng=args.game_rng, stats_file=args.stats, log_every=args.log_every,
+             max_turns=args.max_turns)
@@ -0,0 +1,80 @@
+import unittest
+import random
+import numpy as np
+import camelup
+import gametree
+import batchengine
+import bots
+from actionids import GAME_BET_ACTION_ID, ROUND_BET_ACTION_ID, MOVE_TRAP_ACTION_ID, MOVE_CAMEL_ACTION_ID
+
+
+def comparable(g):
+    return (
+        g.camel_track, g.trap_track, list(g.player_money_values), list(g.camel_yet_to_move),
+        sorted(g.round_bets), sorted(g.game_winner_bets), sorted(g.game_loser_bets), g.active_game,
+        list(g.game_winner))
+
+
+class BatchEngineTest(unittest.TestCase):
+
+    def test_replay_reference_games(self):
+        random.seed(3)
+        games = [camelup.GameState() for _ in range(8)]
+        b = batchengine.BatchGameState.from_game_states(games, rng=np.random.default_rng(0))
+        for i, g in enumerate(games):
+            self.assertEqual(comparable(g), comparable(b.to_game_state(i)))
+
+        turn = 0
+        while any(g.active_game for g in games):
+            player = turn % games[0].NUM_PLAYERS
+            actions = np.zeros((len(games), 3), dtype=int)
+            camels = np.zeros(len(games), dtype=int)
+            rolls = np.ones(len(games), dtype=int)
+            for i, g in enumerate(games):
+                if not g.active_game:
+                    continue
+                action = bots.RandomBot.move(player, g.get_player_view(player))
+                if action[0] == MOVE_CAMEL_ACTION_ID:
+                    camels[i] = random.choice([c for c in range(g.NUM_CAMELS) if g.camel_yet_to_move[c]])
+                    rolls[i] = random.randint(*g.MOVE_RANGE)
+                    actions[i] = (MOVE_CAMEL_ACTION_ID, 0, 0)
+                elif action[0] == MOVE_TRAP_ACTION_ID:
+                    actions[i] = action
+                elif action[0] == ROUND_BET_ACTION_ID:
+                    actions[i] = (ROUND_BET_ACTION_ID, g.CAMELS.index(action[1]), 0)
+                else:
+                    actions[i] = (GAME_BET_ACTION_ID, batchengine.BET_TYPES.index(action[1]), g.CAMELS.index(action[2]))
+                gametree.apply_move(g, player, action, outcome=(camels[i], rolls[i]))
+
+            batchengine.apply_actions(b, player, actions, camels=camels, rolls=rolls)
+            for i, g in enumerate(games):
+                self.assertEqual(comparable(g), comparable(b.to_game_state(i)))
+            turn += 1
+
+    def test_illegal_moves(self):
+        b = batchengine.BatchGameState(2, rng=np.random.default_rng(0))
+        b.round_bet_counts[0, 1] = len(b.FIRST_PLACE_ROUND_PAYOUT)
+        self.assertRaises(
+            camelup.IllegalMoveException, batchengine.apply_actions, b, 0, [[ROUND_BET_ACTION_ID, 1, 0]] * 2)
+        self.assertRaises(
+            camelup.IllegalMoveException, batchengine.apply_actions, b, 0, [[MOVE_TRAP_ACTION_ID, 1, 0]] * 2)
+        self.assertRaises(camelup.IllegalMoveException, batchengine.apply_actions, b, 0, [[7, 0, 0]] * 2)
+
+        # Rows of finished games are ignored
+        b.active_game[0] = False
+        batchengine.apply_actions(b, 0, [[ROUND_BET_ACTION_ID, 1, 0]] * 2)
+        self.assertEqual([0, 1], b.num_turns.tolist())
+
+    def test_random_bot_statistics(self):
+        b = batchengine.play_games([bots.BatchRandomBot] * 4, 4000, rng=np.random.default_rng(1))
+        self.assertFalse(b.active_game.any())
+        self.assertTrue((b.game_winner.sum(axis=1) >= 1).all())
+
+        # RandomBot games take about 77 turns and every camel wins about as often as the others
+        self.assertAlmostEqual(77, b.num_turns.mean(), delta=2)
+        winners = batchengine.find_camel_ranking(b, np.arange(b.NUM_GAMES))[:, 0]
+        np.testing.assert_allclose(np.bincount(winners) / b.NUM_GAMES, 0.2, atol=0.03)
+
+
+if __name__ == '__main__':
+    unittest.main()
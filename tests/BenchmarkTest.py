@@ -0,0 +1,38 @@
+import unittest
+import tempfile
+import os
+import benchmark
+
+
+class BenchmarkTest(unittest.TestCase):
+
+    def test_compare_results(self):
+        baseline = {
+            "move_camel": {"value": 1e-5, "unit": "s", "higher_is_better": False},
+            "play_game": {"value": 100.0, "unit": "games/s", "higher_is_better": True},
+            "end_of_round": {"value": 1e-5, "unit": "s", "higher_is_better": False},
+            "removed": {"value": 1.0, "unit": "s", "higher_is_better": False}}
+        current = {
+            "move_camel": {"value": 1.5e-5, "unit": "s", "higher_is_better": False},
+            "play_game": {"value": 200.0, "unit": "games/s", "higher_is_better": True},
+            "end_of_round": {"value": 1.05e-5, "unit": "s", "higher_is_better": False},
+            "added": {"value": 1.0, "unit": "s", "higher_is_better": False}}
+        status = {entry[0]: entry[4] for entry in benchmark.compare_results(baseline, current, threshold=0.1)}
+        self.assertEqual(
+            {"move_camel": "regression", "play_game": "improvement", "end_of_round": "ok", "removed": "missing",
+             "added": "new"}, status)
+
+    def test_run_and_history(self):
+        results = benchmark.run_benchmarks(name_filter=r"^(find_camel_in_nth_place|end_of_round)\[GameState", quick=True)
+        self.assertEqual({"find_camel_in_nth_place[GameState]", "end_of_round[GameState]"}, set(results))
+        self.assertTrue(all(result["value"] > 0 for result in results.values()))
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "history.jsonl")
+            benchmark.save_record(benchmark.make_record({}), path)
+            benchmark.save_record(benchmark.make_record(results), path)
+            self.assertEqual(results, benchmark.load_record(path)["results"])
+
+
+if __name__ == '__main__':
+    unittest.main()
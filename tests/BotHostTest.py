@@ -0,0 +1,113 @@
+import unittest
+import os
+import random
+import time
+import camelup
+import bothost
+import bots
+from playerinterface import PlayerInterface
+from actionids import MOVE_CAMEL_ACTION_ID, ROUND_BET_ACTION_ID, GAME_BET_ACTION_ID
+
+
+class LeaderBot(PlayerInterface):
+    @staticmethod
+    def move(active_player, game_state):
+        leader = camelup.find_camel_in_nth_place(game_state, 1)
+        valid_moves = camelup.get_valid_moves(game_state, active_player)
+        if (GAME_BET_ACTION_ID, "win", leader) in valid_moves and game_state.round_bets:
+            return GAME_BET_ACTION_ID, "win", leader
+        if (ROUND_BET_ACTION_ID, leader) in valid_moves:
+            return ROUND_BET_ACTION_ID, leader
+        return MOVE_CAMEL_ACTION_ID,
+
+
+class SleepyBot(PlayerInterface):
+    @staticmethod
+    def move(active_player, game_state):
+        time.sleep(10)
+        return MOVE_CAMEL_ACTION_ID,
+
+
+class FaultyBot(PlayerInterface):
+    @staticmethod
+    def move(active_player, game_state):
+        if game_state.round_bets:
+            os._exit(1)
+        raise RuntimeError("No move")
+
+
+class StateClassBot(PlayerInterface):
+    @staticmethod
+    def move(active_player, game_state):
+        if isinstance(game_state, camelup.CompactGameState):
+            return ROUND_BET_ACTION_ID, game_state.CAMELS[0]
+        return MOVE_CAMEL_ACTION_ID,
+
+
+class BotHostTest(unittest.TestCase):
+
+    def test_remote_game(self):
+        # Remote bots see the same game state as local ones, so the games are the same
+        for state_class in (camelup.GameState, camelup.CompactGameState):
+            random.seed(2)
+            expected_log, _ = camelup.play_game([LeaderBot, LeaderBot, bots.RandomBot], state_class=state_class)
+            with bothost.BotPool(workers=2) as pool:
+                random.seed(2)
+                remote_bot = pool.remote_bot(LeaderBot)
+                log, g = camelup.play_game([remote_bot, remote_bot, bots.RandomBot], state_class=state_class)
+                self.assertEqual(expected_log, log)
+                self.assertEqual("LeaderBot", remote_bot.__name__)
+                self.assertEqual(sum(1 for row in log[1:] if row["active_player"] != 2), pool.num_moves)
+                self.assertEqual({}, dict(pool.failures))
+
+                # The same bot in a game with other constants
+                random.seed(3)
+                log, _ = camelup.play_game([bots.RandomBot, remote_bot], state_class=state_class)
+                random.seed(3)
+                self.assertEqual(camelup.play_game([bots.RandomBot, LeaderBot], state_class=state_class)[0], log)
+
+    def test_changes(self):
+        self.assertEqual([1, 3], bothost._get_changes(b"\x00\x01\x02\x03", b"\x00\x05\x02\x07"))
+        self.assertEqual([0, 2, 3], bothost._get_changes(b"\x01\x01", b"\x00\x01\x02\x03"))
+        self.assertEqual([], bothost._get_changes(b"\x01\x01\x02", b"\x01\x01"))
+
+    def test_failures(self):
+        g = camelup.GameState(num_players=2)
+        with bothost.BotPool(move_timeout=0.2) as pool:
+            sleepy_bot = pool.remote_bot(SleepyBot)
+            faulty_bot = pool.remote_bot(FaultyBot, fallback=LeaderBot, move_timeout=5)
+            t_start = time.perf_counter()
+            self.assertEqual((MOVE_CAMEL_ACTION_ID,), sleepy_bot.move(0, g.get_player_view(0)))
+            self.assertLess(time.perf_counter() - t_start, 5)
+
+            # Errors are answered by the fallback
+            leader = camelup.find_camel_in_nth_place(g, 1)
+            self.assertEqual((ROUND_BET_ACTION_ID, leader), faulty_bot.move(1, g.get_player_view(1)))
+            self.assertIn("RuntimeError: No move", pool.last_error)
+            # A crashed worker is replaced
+            camelup.place_round_winner_bet(g, leader, 0)
+            self.assertEqual((GAME_BET_ACTION_ID, "win", leader), faulty_bot.move(1, g.get_player_view(1)))
+            g.round_bets.clear()
+            self.assertEqual((ROUND_BET_ACTION_ID, leader), faulty_bot.move(1, g.get_player_view(1)))
+            self.assertEqual({("SleepyBot", "timeout"): 1, ("FaultyBot", "error"): 2, ("FaultyBot", "crash"): 1},
+                             dict(pool.failures))
+
+    def test_dead_worker(self):
+        with bothost.BotPool() as pool:
+            remote_bot = pool.remote_bot(StateClassBot, fallback=(GAME_BET_ACTION_ID, "win", "c_0"))
+            g = camelup.GameState(num_players=2)
+            self.assertEqual((MOVE_CAMEL_ACTION_ID,), remote_bot.move(0, g.get_player_view(0)))
+            # A worker that dies between two moves is replaced
+            pool._workers[0][0].kill()
+            pool._workers[0][0].join()
+            self.assertEqual((GAME_BET_ACTION_ID, "win", "c_0"), remote_bot.move(0, g.get_player_view(0)))
+            self.assertEqual((MOVE_CAMEL_ACTION_ID,), remote_bot.move(0, g.get_player_view(0)))
+            self.assertEqual({("StateClassBot", "crash"): 1}, dict(pool.failures))
+
+            # A new game with the same constants in another representation
+            g = camelup.CompactGameState(num_players=2)
+            self.assertEqual((ROUND_BET_ACTION_ID, g.CAMELS[0]), remote_bot.move(0, g.get_player_view(0)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+import unittest.mock
+import random
+import copy
+import camelup
+import bots
+
+
+class CompactGameStateTest(unittest.TestCase):
+
+    def setUp(self):
+        self.g = camelup.GameState()
+
+        # Remove camels from start positions
+        self.g.camel_track[0] = []
+        self.g.camel_track[1] = []
+        self.g.camel_track[2] = []
+
+    def test_no_instance_dict(self):
+        c = camelup.CompactGameState()
+        self.assertFalse(hasattr(c, "__dict__"))
+        self.assertRaises(TypeError, setattr, c, "BOARD_SIZE", 20)
+
+    def test_conversion_round_trip(self):
+        self.g.camel_track[10] = ["c_1", "c_2"]
+        self.g.camel_track[12] = ["c_0", "c_4", "c_3"]
+        self.g.trap_track[5] = [1, 2]
+        c = camelup.CompactGameState.from_game_state(self.g)
+        self.assertEqual(c.camel_location(0), (12, 0))
+        self.assertEqual(c.camel_location(2), (10, 1))
+        self.assertEqual(c.stack_height(12), 3)
+        self.assertEqual(c.camel_track, self.g.camel_track)
+        self.assertEqual(c.to_game_state().camel_track, self.g.camel_track)
+        self.assertEqual(c.trap_track, self.g.trap_track)
+        self.assertEqual(camelup.summarize_game_state(c), camelup.summarize_game_state(self.g))
+
+    def test_ranking(self):
+        self.g.camel_track[10] = ["c_1", "c_2"]
+        self.g.camel_track[12] = ["c_0", "c_4", "c_3"]
+        c = camelup.CompactGameState.from_game_state(self.g)
+        for n in range(1, self.g.NUM_CAMELS + 1):
+            self.assertEqual(
+                camelup.find_camel_in_nth_place(c, n), camelup.find_camel_in_nth_place(self.g, n))
+
+    def test_move_stacks_like_game_state(self):
+        scenarios = [
+            (["c_0", "c_1", "c_2"], ["c_3", "c_4"], 1, 2, 11, []),  # partial stack onto stack
+            (["c_0", "c_1", "c_2"], ["c_3", "c_4"], 1, 1, 11, [-1, 0]),  # partial stack hits -1 trap, stays in place
+            (["c_0", "c_1", "c_2"], ["c_3", "c_4"], 0, 1, 11, [1, 0]),  # whole stack hits +1 trap, lands on stack
+            (["c_0"], ["c_1", "c_2", "c_3", "c_4"], 0, 3, 13, [-1, 3]),  # single camel hits -1 trap, goes under stack
+        ]
+        for stack_a, stack_b, choice, roll, trap_loc, trap in scenarios:
+            g = copy.deepcopy(self.g)
+            g.camel_track[10] = list(stack_a)
+            g.camel_track[12] = list(stack_b)
+            g.trap_track[trap_loc] = list(trap)
+            c = camelup.CompactGameState.from_game_state(g)
+            with unittest.mock.patch('random.choice', lambda x: x[choice] if choice < len(x) else x[0]):
+                with unittest.mock.patch('camelup.roll_dice', lambda _: roll):
+                    self.assertEqual(camelup.move_camel(g, 0), camelup.move_camel(c, 0))
+            self.assertEqual(c.camel_track, g.camel_track)
+            # The per-camel locations agree with the stacks of the fields
+            self.assertEqual(g.camel_locations(), c.camel_locations())
+            self.assertEqual(c.player_money_values, g.player_money_values)
+
+    def test_full_game_matches_game_state(self):
+        players = [bots.RandomBot] * 4
+        random.seed(1234)
+        reference_log, reference_state = camelup.play_game(players)
+        random.seed(1234)
+        compact_log, compact_state = camelup.play_game(players, state_class=camelup.CompactGameState)
+        self.assertEqual(reference_log, compact_log)
+        self.assertEqual(reference_state.camel_track, compact_state.camel_track)
+        self.assertEqual(reference_state.game_winner, compact_state.game_winner)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+import unittest
+import copy
+import camelup
+import endgame
+import gametree
+import racesolver
+from actionids import GAME_BET_ACTION_ID, ROUND_BET_ACTION_ID, MOVE_TRAP_ACTION_ID, MOVE_CAMEL_ACTION_ID
+
+
+def evaluate_horizon(g, root_trap_track):
+    # The search solves the race with the traps of the root position
+    trap_track = g.trap_track
+    g.trap_track = root_trap_track
+    race_probabilities = racesolver.get_placement_probabilities(g)
+    g.trap_track = trap_track
+    return endgame.evaluate_position(g, race_probabilities)
+
+
+def brute_force(g, player, plies, root_trap_track, moved_traps=0):
+    """
+    Max-n search without memoization and pruning, with the same rules as endgame.solve_endgame().
+    :return: Tuple of the values of all players.
+    """
+    if not g.active_game:
+        return tuple(g.player_money_values)
+    if plies == 0:
+        return evaluate_horizon(g, root_trap_track)
+    best = None
+    for action in camelup.get_valid_moves(g, player):
+        if action[0] == MOVE_TRAP_ACTION_ID and moved_traps & (1 << player):
+            continue
+        values = action_value(g, player, action, plies, root_trap_track, moved_traps)
+        if best is None or values[player] > best[player]:
+            best = values
+    return best
+
+
+def action_value(g, player, action, plies, root_trap_track, moved_traps=0):
+    next_player = (player + 1) % g.NUM_PLAYERS
+    if action[0] != MOVE_CAMEL_ACTION_ID:
+        token = gametree.apply_move(g, player, action)
+        if action[0] == MOVE_TRAP_ACTION_ID:
+            moved_traps |= 1 << player
+        values = brute_force(g, next_player, plies - 1, root_trap_track, moved_traps)
+        gametree.undo_move(g, token)
+        return values
+    values = [0.0] * g.NUM_PLAYERS
+    for camel_index, roll, probability in gametree.get_camel_move_outcomes(g):
+        token = gametree.apply_move(g, player, action, outcome=(camel_index, roll))
+        outcome_values = brute_force(g, next_player, plies - 1, root_trap_track)
+        gametree.undo_move(g, token)
+        for i in range(g.NUM_PLAYERS):
+            values[i] += probability * outcome_values[i]
+    return tuple(values)
+
+
+class EndgameTest(unittest.TestCase):
+
+    @staticmethod
+    def make_game_state(stacks, camel_yet_to_move=None, **kwargs):
+        g = camelup.GameState(**kwargs)
+        g.camel_track = [[] for _ in range(g.BOARD_SIZE * 2)]
+        for board_loc, stack in stacks.items():
+            g.camel_track[board_loc] = list(stack)
+        if camel_yet_to_move is not None:
+            g.camel_yet_to_move = camel_yet_to_move
+        return g
+
+    def test_is_endgame(self):
+        g = self.make_game_state({10: ["c_0", "c_1"], 12: ["c_2", "c_3", "c_4"]})
+        self.assertFalse(endgame.is_endgame(g))
+        self.assertTrue(endgame.is_endgame(g, max_distance=4))
+        g.camel_track[13], g.camel_track[12] = g.camel_track[12], []
+        self.assertTrue(endgame.is_endgame(g))
+
+    def test_evaluate_position(self):
+        # c_4 wins the round and the game for sure, c_3 is second and c_0 loses
+        g = self.make_game_state({15: ["c_0", "c_1", "c_2", "c_3", "c_4"]}, num_players=3)
+        g.player_money_values = [2, 3, 4]
+        g.round_bets = [["c_4", 1], ["c_3", 0], ["c_4", 0], ["c_2", 2]]
+        g.game_winner_bets = [["c_4", 2], ["c_1", 0], ["c_4", 1]]
+        g.game_loser_bets = [["c_0", 0]]
+        for expected, actual in zip((2 + 1 + 3 - 1 + 8, 3 + 5 + 5, 4 - 1 + 8), endgame.evaluate_position(g)):
+            self.assertAlmostEqual(expected, actual)
+
+    def test_matches_brute_force(self):
+        g = self.make_game_state(
+            {4: ["c_0"], 5: ["c_1", "c_2"], 7: ["c_3", "c_4"]}, [True, False, True, True, False], num_players=2,
+            board_size=9)
+        g.trap_track[6] = [-1, 1]
+        g.round_bets = [["c_4", 1]]
+        g.game_winner_bets = [["c_4", 0]]
+        g.player_money_values = [4, 2]
+        for plies in (1, 2, 3):
+            result = endgame.solve_endgame(g, 0, max_plies=plies)
+            self.assertEqual(plies, result.plies)
+            self.assertFalse(result.exact)
+            self.assertEqual(sorted(camelup.get_valid_moves(g, 0)), sorted(result.action_values))
+            for action, value in result.action_values.items():
+                self.assertAlmostEqual(action_value(g, 0, action, plies, copy.deepcopy(g.trap_track))[0], value)
+
+    def test_end_of_game(self):
+        # The game ends with the next camel move: c_4 wins and c_0 loses
+        g = self.make_game_state({7: ["c_0", "c_1", "c_2", "c_3", "c_4"]}, num_players=2, board_size=8)
+        g.player_money_values = [3, 3]
+        g.round_bets = [[camel, 0] for camel in g.CAMELS for _ in range(3)]
+        g.game_winner_bets = [[camel, player] for camel in g.CAMELS for player in range(2)]
+        g.game_loser_bets = [[camel, player] for camel in g.CAMELS for player in range(2)]
+        result = endgame.solve_endgame(g, 1, actions=[(MOVE_CAMEL_ACTION_ID,)])
+        self.assertTrue(result.exact)
+        self.assertEqual(1, result.plies)
+        # One coin for moving, the second payout and four wrong bets for each of the game bets
+        self.assertAlmostEqual(3 + 1 + 5 - 4 + 5 - 4, result.action_values[(MOVE_CAMEL_ACTION_ID,)])
+
+    def test_time_budget(self):
+        g = self.make_game_state({10: ["c_0", "c_1"], 13: ["c_2", "c_3", "c_4"]})
+        result = endgame.solve_endgame(g, 0, time_budget=0)
+        self.assertEqual(0, result.plies)
+        self.assertFalse(result.exact)
+        # All actions get their static values
+        self.assertEqual(sorted(camelup.get_valid_moves(g, 0)), sorted(result.action_values))
+        self.assertAlmostEqual(
+            endgame.evaluate_position(g)[0] + 1, result.action_values[(MOVE_CAMEL_ACTION_ID,)])
+        g.round_bets = [["c_4", 0]]
+        self.assertAlmostEqual(
+            endgame.evaluate_position(g)[0], result.action_values[(ROUND_BET_ACTION_ID, "c_4")])
+
+    def test_player_view(self):
+        g = self.make_game_state({10: ["c_0", "c_1"], 13: ["c_2", "c_3", "c_4"]}, num_players=2)
+        camelup.place_game_bet(g, "c_4", "win", 1)
+        camelup.place_game_bet(g, "c_2", "win", 0)
+        result = endgame.solve_endgame(g.get_player_view(0), 0, max_plies=1)
+        self.assertEqual(1, result.plies)
+        # The hidden bet of player 1 is ignored
+        h = self.make_game_state({10: ["c_0", "c_1"], 13: ["c_2", "c_3", "c_4"]}, num_players=2)
+        camelup.place_game_bet(h, "c_2", "win", 0)
+        self.assertAlmostEqual(
+            endgame.solve_endgame(h, 0, max_plies=1).action_values[(GAME_BET_ACTION_ID, "lose", "c_0")],
+            result.action_values[(GAME_BET_ACTION_ID, "lose", "c_0")])
+        self.assertIn((ROUND_BET_ACTION_ID, "c_4"), result.action_values)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+import unittest
+import random
+import numpy as np
+import camelup
+import gamecodec
+import bots
+
+# Attributes that are not encoded, see the gamecodec module documentation
+UNENCODED_ATTRIBUTES = ("verbose", "rng", "event_bus", "valid_moves_cache", "position_hash")
+
+
+def get_mid_game_state(state_class=camelup.GameState):
+    random.seed(3)
+    g = state_class(num_players=4)
+    for _ in range(7):
+        camelup.move_camel(g, 0)
+    camelup.move_trap(g, 1, 14, 1)
+    camelup.move_trap(g, -1, 11, 3)
+    camelup.place_round_winner_bet(g, g.CAMELS[2], 2)
+    camelup.place_round_winner_bet(g, g.CAMELS[0], 0)
+    camelup.place_game_bet(g, g.CAMELS[4], "win", 1)
+    camelup.place_game_bet(g, g.CAMELS[1], "lose", 3)
+    camelup.place_game_bet(g, g.CAMELS[3], "win", 0)
+    return g
+
+
+class GameCodecTest(unittest.TestCase):
+
+    def assertGameStatesEqual(self, expected, actual):
+        for key in camelup._SHARED_STATE_ATTRIBUTES:
+            if key not in UNENCODED_ATTRIBUTES:
+                self.assertEqual(getattr(expected, key), getattr(actual, key), key)
+        self.assertEqual(expected.camel_track, actual.camel_track)
+        self.assertEqual(expected.camel_locations(), actual.camel_locations())
+
+    def test_round_trip(self):
+        for state_class in (camelup.GameState, camelup.CompactGameState):
+            g = get_mid_game_state(state_class)
+            codec = gamecodec.GameCodec(g)
+            data = codec.encode(g)
+            # Four coin counts, the flags, five camels three times, two traps per player, four counts, five bets
+            self.assertEqual(8 + 1 + 15 + 8 + 4 + 10, len(data))
+            for decode_class in (camelup.GameState, camelup.CompactGameState):
+                h = codec.decode(data, decode_class)
+                self.assertIs(decode_class, type(h))
+                self.assertGameStatesEqual(g, h)
+                self.assertEqual(data, codec.encode(h))
+            # The order of the bets is kept
+            self.assertEqual([[g.CAMELS[4], 1], [g.CAMELS[3], 0]], codec.decode(data).game_winner_bets)
+
+        # Decoded states can be played on
+        h = codec.decode(data)
+        random.seed(0)
+        camelup.move_camel(h, 2)
+        random.seed(0)
+        camelup.move_camel(g, 2)
+        self.assertGameStatesEqual(g, h)
+        with self.assertRaises(TypeError):
+            h.NUM_PLAYERS = 5
+
+    def test_player_view(self):
+        g = get_mid_game_state()
+        view = g.get_player_view(1)
+        codec = gamecodec.GameCodec(view)
+        h = codec.decode(codec.encode(view), camelup.GameState)
+        self.assertGameStatesEqual(view, h)
+        self.assertEqual([[g.CAMELS[4], 1], [None, None]], h.game_winner_bets)
+        # The live game state can be encoded as seen by a player
+        self.assertEqual(codec.encode(view), codec.encode(g, 1))
+        self.assertNotEqual(codec.encode(view), codec.encode(g))
+
+    def test_finished_game(self):
+        random.seed(1)
+        _, g = camelup.play_game([bots.RandomBot] * 3)
+        codec = gamecodec.GameCodec(g)
+        h = codec.decode(codec.encode(g))
+        self.assertGameStatesEqual(g, h)
+        self.assertFalse(h.active_game)
+        self.assertTrue(len(h.game_winner) > 0)
+
+    def test_constants(self):
+        g = camelup.GameState(num_camels=4, num_players=3, board_size=12, move_range=(1, 2))
+        codec = gamecodec.GameCodec.from_constants(gamecodec.GameCodec(g).encode_constants())
+        self.assertEqual(g.CAMELS, codec.constants["CAMELS"])
+        self.assertEqual((1, 2), codec.constants["MOVE_RANGE"])
+        self.assertGameStatesEqual(g, codec.decode(codec.encode(g), camelup.GameState))
+        h = codec.new_game_state()
+        self.assertEqual((4, 3, 12), (h.NUM_CAMELS, h.NUM_PLAYERS, h.BOARD_SIZE))
+
+        with self.assertRaises(ValueError):
+            gamecodec.GameCodec(camelup.GameState(board_size=70))
+        data = codec.encode_constants().replace(b'"format_version": 1', b'"format_version": 0')
+        with self.assertRaises(ValueError):
+            gamecodec.GameCodec.from_constants(data)
+
+    def test_view(self):
+        g = get_mid_game_state()
+        codec = gamecodec.GameCodec(g)
+        data = bytearray(codec.encode(g))
+        view = codec.view(data)
+        locations = g.camel_locations()
+        self.assertEqual(g.player_money_values, view.player_money_values.tolist())
+        self.assertTrue(view.active_game)
+        self.assertEqual([board_loc for board_loc, _ in locations], view.camel_positions.tolist())
+        self.assertEqual([stack_loc for _, stack_loc in locations], view.camel_heights.tolist())
+        self.assertEqual(g.camel_yet_to_move, view.camel_yet_to_move.astype(bool).tolist())
+        self.assertEqual([-1, 14, -1, 11], view.trap_locations.tolist())
+        self.assertEqual([0, 1, 0, -1], view.trap_types.tolist())
+        self.assertEqual([[2, 2], [0, 0]], view.round_bets.tolist())
+        self.assertEqual([[4, 1], [3, 0]], view.game_winner_bets.tolist())
+        self.assertEqual([[1, 3]], view.game_loser_bets.tolist())
+        self.assertEqual((0,), view.game_winner.shape)
+
+        # The fields share memory with the encoded state
+        self.assertTrue(np.shares_memory(view.camel_positions, np.frombuffer(data, dtype=np.int8)))
+        data[codec.camels_offset] = 9
+        self.assertEqual(9, view.camel_positions[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
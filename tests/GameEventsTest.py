@@ -0,0 +1,109 @@
+import unittest
+import unittest.mock
+import contextlib
+import logging
+import random
+import io
+import camelup
+import gameevents
+import bots
+
+
+class GameEventsTest(unittest.TestCase):
+
+    def test_silent_game_builds_no_events(self):
+        g = camelup.GameState()
+        self.assertIsNone(g.event_bus)
+        with unittest.mock.patch.object(camelup, "CamelMoved") as camel_moved:
+            camelup.move_camel(g, 0)
+        camel_moved.assert_not_called()
+
+        g.event_bus = gameevents.EventBus()
+        self.assertFalse(g.event_bus)
+        with unittest.mock.patch.object(camelup, "CamelMoved") as camel_moved:
+            camelup.move_camel(g, 0)
+        camel_moved.assert_not_called()
+
+    def test_camel_moved_and_trap_hit(self):
+        events = []
+        g = camelup.GameState(event_bus=gameevents.EventBus([events.append]))
+        g.camel_track = [[] for _ in range(g.BOARD_SIZE * 2)]
+        g.camel_track[0] = ["c_0", "c_1", "c_2", "c_3", "c_4"]
+        g.trap_track[2] = [1, 3]
+        camelup.move_camel_with_roll(g, 0, 0, 2)
+        self.assertEqual([
+            gameevents.TrapHit(player=0, camel="c_0", location=2, trap_type=1, owner=3),
+            gameevents.CamelMoved(player=0, camel="c_0", roll=2, distance=3)], events)
+
+    def test_bets_paid(self):
+        counter = gameevents.CounterSubscriber()
+        g = camelup.GameState(event_bus=gameevents.EventBus([counter]))
+        g.camel_track = [[] for _ in range(g.BOARD_SIZE * 2)]
+        g.camel_track[0] = ["c_0", "c_1", "c_2", "c_3", "c_4"]
+        g.round_bets = [["c_4", 0], ["c_4", 1], ["c_3", 2], ["c_0", 3]]
+        g.game_winner_bets = [["c_4", 0], ["c_0", 1]]
+        camelup.end_of_round(g)
+        camelup.end_of_game(g)
+        self.assertEqual({("round", "first"): 8, ("round", "second"): 1, ("round", "other"): -1,
+                          ("game_winner", "correct"): 8, ("game_winner", "incorrect"): -1}, counter.payouts)
+        self.assertEqual(1, counter.events["RoundSettled"])
+        self.assertEqual(1, counter.events["GameEnded"])
+
+    def test_verbose_output(self):
+        g = camelup.GameState(verbose=True)
+        g.camel_track = [[] for _ in range(g.BOARD_SIZE * 2)]
+        g.camel_track[0] = ["c_0", "c_1", "c_2", "c_3", "c_4"]
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            camelup.move_trap(g, -1, 5, 1)
+            camelup.place_round_winner_bet(g, "c_4", 2)
+            camelup.move_camel_with_roll(g, 0, 4, 1)
+        self.assertEqual(
+            "Player 1 moves a -1 trap to field 5\n"
+            "Player 2 places a round winner bet on camel c_4\n"
+            "Player 0 moves camel c_4 by 1 spaces\n", out.getvalue())
+
+    def test_player_copies_have_no_event_bus(self):
+        events = []
+        g = camelup.GameState(event_bus=gameevents.EventBus([events.append]))
+        self.assertIsNone(g.get_player_copy(0).event_bus)
+        self.assertIsNone(g.get_player_view(0).event_bus)
+        camelup.move_camel(g.get_player_copy(0), 0)
+        self.assertEqual([], events)
+
+    def test_play_game(self):
+        counter = gameevents.CounterSubscriber()
+        messages = []
+        handler = logging.Handler()
+        handler.emit = lambda record: messages.append(record.event)
+        logger = logging.getLogger("GameEventsTest")
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        bus = gameevents.EventBus([counter, gameevents.LoggingSubscriber(logger)])
+
+        random.seed(5)
+        log, g = camelup.play_game([bots.RandomBot] * 4, event_bus=bus, state_class=camelup.CompactGameState)
+        self.assertEqual(len(log) - 1, counter.events["TurnEnded"])
+        self.assertEqual(1, counter.events["GameEnded"])
+        num_camel_moves = len([row for row in log if row.get("action_type") == "move_camel"])
+        self.assertEqual(num_camel_moves, counter.events["CamelMoved"])
+        self.assertEqual(sum(counter.events.values()) - counter.events["TurnEnded"], len(messages))
+        self.assertEqual({"type": "GameEnded", "winning_camel": g.camel_in_nth_place(1),
+                          "losing_camel": g.camel_in_nth_place(g.NUM_CAMELS), "game_winner": g.game_winner,
+                          "player_money_values": g.player_money_values}, messages[-1])
+
+    def test_counter_merge(self):
+        a = gameevents.CounterSubscriber()
+        b = gameevents.CounterSubscriber()
+        a(gameevents.CamelMoved(0, "c_1", 2, 2))
+        b(gameevents.CamelMoved(1, "c_1", 3, 3))
+        b(gameevents.TrapHit(1, "c_1", 4, 1, 2))
+        a.merge(b)
+        result = a.to_dict()
+        self.assertEqual({"CamelMoved": 2, "TrapHit": 1}, result["events"])
+        self.assertEqual({"c_1": 5}, result["distance"])
+        self.assertEqual({"2": 1}, result["trap_hits"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import unittest
+import tempfile
+import random
+import os
+import numpy as np
+import pandas as pd
+import camelup
+import gamelogs
+import bots
+
+
+class GameLogsTest(unittest.TestCase):
+
+    def setUp(self):
+        random.seed(5)
+        self.games = [camelup.play_game([bots.RandomBot] * 3)[0] for _ in range(4)]
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "GameLogs.npl")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_round_trip(self):
+        # Small row groups so that games are split across row groups
+        with gamelogs.GameLogWriter(self.path, num_players=3, row_group_size=50) as writer:
+            for i, game in enumerate(self.games):
+                writer.write_game(i, game)
+
+        row_groups = list(gamelogs.read_row_groups(self.path))
+        self.assertGreater(len(row_groups), 1)
+        self.assertEqual(np.int8, row_groups[0]["camel_c_0_location"].dtype)
+
+        games = gamelogs.read_game_logs(self.path)
+        expected = pd.concat(
+            [pd.DataFrame(game).assign(game_id=i) for i, game in enumerate(self.games)], ignore_index=True)
+        self.assertEqual(len(expected), len(games))
+        for column in expected.columns:
+            self.assertEqual(
+                expected[column].astype(object).where(expected[column].notna(), None).tolist(),
+                games[column].astype(object).where(games[column].notna(), None).tolist(), column)
+
+    def test_columns_from_buffer(self):
+        log_buffer = gamelogs.GameLogBuffer(num_players=3)
+        log_buffer.add_game(7, self.games[0])
+        self.assertEqual(len(self.games[0]), len(log_buffer))
+        with gamelogs.GameLogWriter(self.path, num_players=3) as writer:
+            writer.write_columns(log_buffer.to_columns())
+        self.assertEqual(0, len(log_buffer))
+
+        games = gamelogs.read_game_logs(self.path, decode=False)
+        self.assertEqual([7] * len(self.games[0]), games["game_id"].tolist())
+        self.assertEqual(-1, games["active_player"][0])
+        self.assertEqual(0, games["player_0_trap_type"][0])
+
+    def test_mixed_buffer(self):
+        # Rows added as columns and row by row keep their order and types
+        other = gamelogs.GameLogBuffer(num_players=3)
+        other.add_game(1, self.games[1])
+        log_buffer = gamelogs.GameLogBuffer(num_players=3)
+        log_buffer.add_game(0, self.games[0])
+        log_buffer.add_columns(other.to_columns())
+        log_buffer.add_game(2, self.games[2])
+        self.assertEqual(sum(len(game) for game in self.games[:3]), len(log_buffer))
+        columns = log_buffer.to_columns()
+        self.assertEqual(np.int8, columns["camel_c_0_location"].dtype)
+        self.assertEqual(
+            [i for i, game in enumerate(self.games[:3]) for _ in game], columns["game_id"].tolist())
+        self.assertEqual(0, len(log_buffer.to_columns()["game_id"]))
+
+    def test_turns(self):
+        random.seed(6)
+        expected, g = camelup.play_game([bots.RandomBot] * 3)
+        random.seed(6)
+        with gamelogs.GameLogWriter(self.path, num_players=3) as writer:
+            h = writer.write_turns(2, camelup.play_game_iter([bots.RandomBot] * 3))
+        self.assertEqual(g.player_money_values, h.player_money_values)
+        games = gamelogs.read_game_logs(self.path)
+        self.assertEqual([2] * len(expected), games["game_id"].tolist())
+        self.assertEqual([row["player_2_coins"] for row in expected], games["player_2_coins"].tolist())
+
+        # The CSV log has the values of the log of play_game(), with all columns of a game record
+        random.seed(6)
+        csv_path = os.path.join(self.tmp_dir.name, "game_2.csv")
+        h = gamelogs.write_csv_game(csv_path, camelup.play_game_iter([bots.RandomBot] * 3))
+        self.assertEqual(g.player_money_values, h.player_money_values)
+        game = pd.read_csv(csv_path, index_col=0)
+        self.assertEqual(camelup.GameRecord(g).columns, list(game.columns))
+        self.assertEqual(list(range(len(expected))), game.index.tolist())
+        expected = pd.DataFrame(expected)
+        for column in expected.columns:
+            self.assertEqual(
+                expected[column].astype(object).where(expected[column].notna(), None).tolist(),
+                game[column].astype(object).where(game[column].notna(), None).tolist(), column)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+import numpy as np
+import camelup
+import gameoutcomes
+import roundoutcomes
+
+
+class GameOutcomesTest(unittest.TestCase):
+
+    @staticmethod
+    def make_game_state(stacks, camel_yet_to_move=None):
+        g = camelup.GameState()
+        g.camel_track = [[] for _ in range(g.BOARD_SIZE * 2)]
+        for board_loc, stack in stacks.items():
+            g.camel_track[board_loc] = list(stack)
+        if camel_yet_to_move is not None:
+            g.camel_yet_to_move = camel_yet_to_move
+        return g
+
+    def test_certain_outcome(self):
+        # Whichever camel moves carries c_4 over the finish line, c_0 stays at the bottom
+        g = self.make_game_state({15: ["c_0", "c_1", "c_2", "c_3", "c_4"]})
+        estimate = gameoutcomes.estimate_game_outcome_probabilities(g, rng=np.random.default_rng(0))
+        self.assertEqual(1.0, estimate.win_probabilities["c_4"])
+        self.assertEqual(1.0, estimate.lose_probabilities["c_0"])
+        self.assertEqual(0.0, estimate.win_probabilities["c_0"])
+        self.assertLess(1.0 - estimate.win_intervals["c_4"][0], 0.01)
+
+    def test_matches_exact_round_outcomes(self):
+        # c_2 is on the last field and has yet to move, so the game ends this round
+        g = self.make_game_state({12: ["c_0"], 13: ["c_1", "c_3"], 15: ["c_2"], 10: ["c_4"]}, [True] * 5)
+        g.trap_track[14] = [-1, 0]
+        estimate = gameoutcomes.estimate_game_outcome_probabilities(
+            g, precision=0.005, max_rollouts=200000, rng=np.random.default_rng(1))
+        placement_probabilities, _ = roundoutcomes.get_round_outcome_probabilities(g)
+        for camel in g.CAMELS:
+            self.assertAlmostEqual(placement_probabilities[camel][0], estimate.win_probabilities[camel], delta=0.01)
+            lower, upper = estimate.win_intervals[camel]
+            self.assertLessEqual(lower, estimate.win_probabilities[camel])
+            self.assertLessEqual(estimate.win_probabilities[camel], upper)
+        self.assertAlmostEqual(1.0, sum(estimate.lose_probabilities.values()))
+
+    def test_stopping(self):
+        g = camelup.GameState()
+        estimate = gameoutcomes.estimate_game_outcome_probabilities(
+            g, batch_size=100, time_budget=0, rng=np.random.default_rng(2))
+        self.assertEqual(100, estimate.num_rollouts)
+        estimate = gameoutcomes.estimate_game_outcome_probabilities(
+            g, batch_size=100, max_rollouts=250, rng=np.random.default_rng(2))
+        self.assertEqual(250, estimate.num_rollouts)
+        estimate = gameoutcomes.estimate_game_outcome_probabilities(
+            g, precision=0.05, batch_size=100, rng=np.random.default_rng(2))
+        self.assertLess(estimate.num_rollouts, 1000)
+        for lower, upper in list(estimate.win_intervals.values()) + list(estimate.lose_intervals.values()):
+            self.assertLessEqual(upper - lower, 0.1)
+
+    def test_finished_game(self):
+        g = self.make_game_state({16: ["c_3", "c_1"], 3: ["c_0", "c_2", "c_4"]})
+        g.active_game = False
+        estimate = gameoutcomes.estimate_game_outcome_probabilities(g)
+        self.assertEqual(0, estimate.num_rollouts)
+        self.assertEqual(1.0, estimate.win_probabilities["c_1"])
+        self.assertEqual(1.0, estimate.lose_probabilities["c_0"])
+
+    def test_game_bet_expected_values(self):
+        g = self.make_game_state({15: ["c_0", "c_1", "c_2", "c_3", "c_4"]})
+        g.game_winner_bets = [["c_4", 1], ["c_4", 2]]
+        estimate = gameoutcomes.estimate_game_outcome_probabilities(g, rng=np.random.default_rng(3))
+        expected_values = gameoutcomes.get_game_bet_expected_values(g, estimate)
+        self.assertEqual(3, expected_values[("win", "c_4")])
+        self.assertEqual(-1, expected_values[("win", "c_0")])
+        self.assertEqual(8, expected_values[("lose", "c_0")])
+
+
+if __name__ == '__main__':
+    unittest.main()
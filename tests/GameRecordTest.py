@@ -0,0 +1,86 @@
+import unittest
+import random
+import camelup
+import bots
+from actionids import GAME_BET_ACTION_ID, MOVE_TRAP_ACTION_ID
+
+
+class GameRecordTest(unittest.TestCase):
+
+    def setUp(self):
+        self.g = camelup.GameState()
+        self.g.camel_track[0] = []
+        self.g.camel_track[1] = []
+        self.g.camel_track[2] = []
+        self.g.camel_track[3] = ["c_1", "c_3"]
+        self.g.camel_track[4] = ["c_0"]
+        self.g.camel_track[6] = ["c_4", "c_2"]
+        self.g.trap_track[9] = [-1, 2]
+        self.g.trap_track[5] = [1, 0]
+        self.g.player_money_values = [3, -1, 0, 7]
+
+    def test_append(self):
+        game_record = camelup.GameRecord(self.g, capacity=1)
+        game_record.append(self.g, 0)
+        game_record.append(self.g, 1, 3, GAME_BET_ACTION_ID, camel=2, bet_type=1)
+        game_record.append(self.g, 2, 0, MOVE_TRAP_ACTION_ID, trap_type=1, trap_location=5)
+        self.assertEqual(3, len(game_record))
+
+        summary = camelup.summarize_game_state(self.g)
+        self.assertEqual([
+            {"round_id": 0, **summary},
+            {"round_id": 1, "active_player": 3, "action_type": "game_bet", "bet_type": "lose", "camel": "c_2",
+             **summary},
+            {"round_id": 2, "active_player": 0, "action_type": "move_trap", "trap_type": 1, "trap_location": 5,
+             **summary}], game_record.to_dicts())
+        self.assertEqual(list(summary), list(game_record.to_dicts()[0])[1:])
+
+        columns = game_record.to_columns()
+        self.assertEqual([-1, 1, -1], columns["bet_type"])
+        self.assertEqual([9] * 3, columns["player_2_trap_location"])
+        self.assertEqual([-1] * 3, columns["player_1_trap_location"])
+        self.assertEqual([0] * 3, columns["player_1_trap_type"])
+        self.assertEqual([-1] * 3, columns["player_1_coins"])
+        self.assertEqual([4] * 3, columns["camel_c_0_location"])
+        self.assertEqual([1] * 3, columns["camel_c_2_stack_location"])
+
+    def test_play_game_record(self):
+        random.seed(4)
+        action_log, g = camelup.play_game([bots.RandomBot] * 3)
+        random.seed(4)
+        game_record, _ = camelup.play_game([bots.RandomBot] * 3, record=True)
+        self.assertIsInstance(game_record, camelup.GameRecord)
+        self.assertEqual(action_log, game_record.to_dicts())
+        self.assertEqual(g.player_money_values, game_record.get_row(len(game_record) - 1)[-3:])
+
+    def test_play_game_iter(self):
+        random.seed(4)
+        action_log, g = camelup.play_game([bots.RandomBot] * 3)
+        random.seed(4)
+        game_record = None
+        for turn, h in camelup.play_game_iter([bots.RandomBot] * 3):
+            if game_record is None:
+                self.assertEqual(camelup.START_TURN, turn)
+                game_record = camelup.GameRecord(h)
+            game_record.append(h, *turn)
+        self.assertEqual(action_log, game_record.to_dicts())
+        self.assertEqual(g.player_money_values, h.player_money_values)
+
+        # The game can end early
+        random.seed(4)
+        turns = list(camelup.play_game_iter([bots.RandomBot] * 3, stop=lambda g, round_id: round_id == 5))
+        self.assertEqual(list(range(6)), [turn.round_id for turn, _ in turns])
+        self.assertTrue(turns[-1][1].active_game)
+        random.seed(4)
+        _, h = camelup.play_game([bots.RandomBot] * 3, stop=lambda g, round_id: round_id == 5)
+        self.assertEqual(turns[-1][1].player_money_values, h.player_money_values)
+
+    def test_camel_locations(self):
+        compact = camelup.CompactGameState.from_game_state(self.g)
+        expected = [self.g.camel_location(i) for i in range(self.g.NUM_CAMELS)]
+        self.assertEqual(expected, self.g.camel_locations())
+        self.assertEqual(expected, compact.camel_locations())
+
+
+if __name__ == '__main__':
+    unittest.main()
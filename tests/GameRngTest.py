@@ -0,0 +1,96 @@
+import unittest
+import random
+import collections
+import numpy as np
+import camelup
+import gamerng
+import gametree
+import bots
+from actionids import MOVE_CAMEL_ACTION_ID
+
+
+class GameRngTest(unittest.TestCase):
+
+    def test_game_streams(self):
+        # Every game has its own stream which can be created directly from the seed and the game index
+        streams = [gamerng.GameRandom(5, i) for i in range(3)]
+        rolls = [[rng.roll_dice((1, 3)) for _ in range(20)] for rng in streams]
+        rng = gamerng.GameRandom(5, 2)
+        self.assertEqual(rolls[2], [rng.roll_dice((1, 3)) for _ in range(20)])
+        self.assertNotEqual(rolls[0], rolls[1])
+        self.assertNotEqual(rolls[1], rolls[2])
+
+        random.seed(1)
+        log, g = camelup.play_game([bots.RandomBot] * 3, rng=gamerng.GameRandom(5, 2))
+        random.seed(1)
+        self.assertEqual(log, camelup.play_game([bots.RandomBot] * 3, rng=gamerng.GameRandom(5, 2))[0])
+
+    def test_rolls_and_camels(self):
+        rng = gamerng.GameRandom(0, block_size=7)
+        counts = collections.Counter(rng.roll_dice((1, 3)) for _ in range(3000))
+        self.assertEqual({1, 2, 3}, set(counts))
+        self.assertTrue(all(abs(count - 1000) < 150 for count in counts.values()))
+        self.assertIn(rng.roll_dice((4, 4)), [4])
+
+        # A round draws every camel exactly once
+        camel_yet_to_move = [True] * 5
+        order = []
+        for _ in range(5):
+            order.append(rng.choose_camel(camel_yet_to_move))
+            camel_yet_to_move[order[-1]] = False
+        self.assertEqual([0, 1, 2, 3, 4], sorted(order))
+
+        # Camels that are moved again after an undo can still be drawn
+        counts = collections.Counter()
+        for _ in range(2000):
+            counts[rng.choose_camel([True, False, True, False, False])] += 1
+        self.assertEqual({0, 2}, set(counts))
+        self.assertAlmostEqual(1000, counts[0], delta=150)
+
+    def test_draw_rounds(self):
+        camel_orders, rolls = gamerng.GameRandom(3).draw_rounds(100, 5, (1, 3))
+        self.assertEqual((100, 5), camel_orders.shape)
+        np.testing.assert_array_equal(np.tile(np.arange(5), (100, 1)), np.sort(camel_orders, axis=1))
+        self.assertEqual(1, rolls.min())
+        self.assertEqual(3, rolls.max())
+
+    def test_game_state_stream(self):
+        g = camelup.GameState(rng=gamerng.GameRandom(9))
+        self.assertIsNone(g.get_player_copy(0).rng)
+        self.assertIsNone(g.get_player_view(0).rng)
+        self.assertIsNone(camelup.CompactGameState.from_game_state(g).get_player_copy(0).rng)
+
+        token = gametree.apply_move(g, 0, (MOVE_CAMEL_ACTION_ID,))
+        camel_index, roll = gametree.undo_move(g, token)
+        self.assertIn(roll, [1, 2, 3])
+        self.assertTrue(all(g.camel_yet_to_move))
+
+    def test_rng_tape(self):
+        tape = gamerng.RngTape(gamerng.GameRandom(4))
+        rolls = [tape.roll_dice((1, 3)) for _ in range(10)]
+        camels = [tape.choose_camel([True] * 5) for _ in range(3)]
+        # Draws of one kind don't shift the draws of another
+        tape.rewind()
+        self.assertEqual(camels, [tape.choose_camel([True] * 5) for _ in range(3)])
+        self.assertEqual(rolls, [tape.roll_dice((1, 3)) for _ in range(10)])
+        tape.roll_dice((1, 3))
+        self.assertEqual(11, len(tape.tracks["roll_dice"]))
+        # A camel that has already moved isn't replayed
+        tape.rewind()
+        camel_yet_to_move = [True] * 5
+        camel_yet_to_move[camels[0]] = False
+        self.assertNotEqual(camels[0], tape.choose_camel(camel_yet_to_move))
+
+        # A game replayed from the tape is the same game and draws nothing new
+        tape = gamerng.RngTape(gamerng.GameRandom(4))
+        random.seed(1)
+        log, g = camelup.play_game([bots.RandomBot] * 2, rng=tape)
+        num_rolls = len(tape.tracks["roll_dice"])
+        # The starting positions are rolled too
+        self.assertEqual(num_rolls, len(tape.tracks["choose_camel"]) + g.NUM_CAMELS)
+        random.seed(1)
+        self.assertEqual(log, camelup.play_game([bots.RandomBot] * 2, rng=tape.rewind())[0])
+        self.assertEqual(num_rolls, len(tape.tracks["roll_dice"]))
+
+if __name__ == '__main__':
+    unittest.main()
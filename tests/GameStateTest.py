@@ -1,6 +1,7 @@
 import unittest
 import camelup
 import copy
+import pickle
 
 
 class EndOfRoundTest(unittest.TestCase):
@@ -17,6 +18,72 @@ class EndOfRoundTest(unittest.TestCase):
         self.assertEqual(expected_gwb, player_copy.game_winner_bets)
         self.assertEqual(expected_glb, player_copy.game_loser_bets)
 
+    def test_player_view(self):
+        self.g.game_winner_bets = [["c_2", 1], ["c_3", 0], ["c_4", 0], ["c_4", 3]]
+        self.g.game_loser_bets = [["c_2", 0], ["c_3", 0]]
+        player_view = self.g.get_player_view(player=0)
+        expected_gwb = [[None, None], ["c_3", 0], ["c_4", 0], [None, None]]
+        expected_glb = [["c_2", 0], ["c_3", 0]]
+        self.assertEqual(expected_gwb, player_view.game_winner_bets)
+        self.assertEqual(expected_glb, player_view.game_loser_bets)
+        self.assertEqual(["c_3", "c_4", "c_2", "c_3"], player_view.get_player_bets(0))
+        self.assertEqual([], player_view.get_player_bets(1))
+        self.assertEqual(expected_gwb, copy.deepcopy(player_view).game_winner_bets)
+        self.assertEqual(camelup.get_valid_moves(self.g, 0), camelup.get_valid_moves(player_view, 0))
+        self.assertIn((3, "win", "c_2"), camelup.get_valid_moves(player_view, 1))
+        self.assertNotIn((3, "win", "c_2"), camelup.get_valid_moves(self.g, 1))
+
+    def test_player_view_copy_on_write(self):
+        self.g.game_winner_bets = [["c_2", 1], ["c_3", 0]]
+        expected_track = copy.deepcopy(self.g.camel_track)
+        expected_money = copy.deepcopy(self.g.player_money_values)
+        player_view = self.g.get_player_view(player=0)
+
+        money = player_view.player_money_values
+        money[0] += 10
+        self.assertEqual(expected_money[0] + 10, player_view.player_money_values[0])
+        self.assertEqual(expected_money[0] + 10, money[0])
+
+        camelup.move_camel(player_view, 0)
+        player_view.game_winner_bets[1][0] = "c_4"
+        self.assertEqual([[None, None], ["c_4", 0]], player_view.game_winner_bets)
+
+        self.assertEqual(expected_track, self.g.camel_track)
+        self.assertEqual(expected_money, self.g.player_money_values)
+        self.assertEqual([True] * self.g.NUM_CAMELS, self.g.camel_yet_to_move)
+        self.assertEqual([["c_2", 1], ["c_3", 0]], self.g.game_winner_bets)
+
+    def test_player_view_private_attributes(self):
+        # The live game state can't be reached through __dict__
+        self.g.game_winner_bets = [["c_2", 1]]
+        player_view = self.g.get_player_view(player=0)
+        with self.assertRaises(TypeError):
+            vars(player_view)
+        with self.assertRaises(AttributeError):
+            getattr(player_view, "__dict__")
+        self.assertEqual([[None, None]], player_view.game_winner_bets)
+        self.assertEqual([["c_2", 1]], self.g.game_winner_bets)
+
+    def test_player_view_lists(self):
+        player_view = self.g.get_player_view(player=0)
+        self.assertEqual(sorted(self.g.camel_track), sorted(player_view.camel_track))
+        self.assertEqual(max(self.g.camel_track), max(player_view.camel_track))
+        self.assertLess(player_view.camel_track[0], player_view.camel_track[0] + ["c_9"])
+        self.assertGreaterEqual(player_view.player_money_values, self.g.player_money_values)
+        self.assertIs(list, type(player_view.camel_track.copy()))
+
+    def test_player_view_pickle(self):
+        self.g.game_winner_bets = [["c_2", 1], ["c_3", 0]]
+        player_view = self.g.get_player_view(player=0)
+        player_copy = pickle.loads(pickle.dumps(player_view))
+        self.assertIs(camelup.GameState, type(player_copy))
+        self.assertEqual([[None, None], ["c_3", 0]], player_copy.game_winner_bets)
+        self.assertEqual(self.g.camel_track, player_copy.camel_track)
+
+        player_view.player_money_values[0] += 1
+        player_copy = pickle.loads(pickle.dumps(player_view))
+        self.assertEqual(self.g.player_money_values[0] + 1, player_copy.player_money_values[0])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+import unittest.mock
+import random
+import copy
+import camelup
+import gametree
+
+
+def snapshot(g):
+    return (
+        g.camel_track, copy.deepcopy(g.trap_track), list(g.player_money_values), list(g.camel_yet_to_move),
+        copy.deepcopy(g.round_bets), copy.deepcopy(g.game_winner_bets), copy.deepcopy(g.game_loser_bets),
+        g.active_game, list(g.game_winner))
+
+
+class GameTreeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.g = camelup.GameState()
+
+        # Remove camels from start positions
+        self.g.camel_track[0] = []
+        self.g.camel_track[1] = []
+        self.g.camel_track[2] = []
+
+    def test_camel_move_outcomes(self):
+        self.g.camel_track[3] = ["c_0", "c_1", "c_2", "c_3", "c_4"]
+        self.g.camel_yet_to_move = [True, False, True, False, False]
+        outcomes = gametree.get_camel_move_outcomes(self.g)
+        self.assertEqual([(0, 1), (0, 2), (0, 3), (2, 1), (2, 2), (2, 3)], [outcome[:2] for outcome in outcomes])
+        self.assertAlmostEqual(1.0, sum(outcome[2] for outcome in outcomes))
+
+    def test_forced_outcome_matches_move_camel(self):
+        self.g.camel_track[10] = ["c_0", "c_1", "c_2"]
+        self.g.camel_track[12] = ["c_3", "c_4"]
+        self.g.trap_track[11] = [-1, 2]
+        reference = copy.deepcopy(self.g)
+
+        with unittest.mock.patch('random.choice', lambda _: 1):
+            with unittest.mock.patch('camelup.roll_dice', lambda _: 1):
+                camelup.move_camel(reference, 0)
+        gametree.apply_move(self.g, 0, (camelup.MOVE_CAMEL_ACTION_ID,), outcome=(1, 1))
+        self.assertEqual(snapshot(reference), snapshot(self.g))
+
+    def test_undo_end_of_game(self):
+        self.g.camel_track[15] = ["c_0"]
+        self.g.camel_track[8] = ["c_1", "c_2"]
+        self.g.camel_track[10] = ["c_4"]
+        self.g.camel_track[12] = ["c_3"]
+        self.g.camel_yet_to_move = [True, False, False, False, False]
+        self.g.round_bets = [["c_0", 1], ["c_3", 2]]
+        self.g.game_winner_bets = [["c_0", 0], ["c_3", 1]]
+        self.g.game_loser_bets = [["c_1", 1]]
+        expected = snapshot(self.g)
+
+        token = gametree.apply_move(self.g, 2, (camelup.MOVE_CAMEL_ACTION_ID,), outcome=(0, 2))
+        self.assertFalse(self.g.active_game)
+        gametree.undo_move(self.g, token)
+        self.assertEqual(expected, snapshot(self.g))
+
+    def test_random_walk_undo(self):
+        random.seed(7)
+        for state_class in (camelup.GameState, camelup.CompactGameState):
+            g = state_class()
+            camelup.enable_valid_moves_cache(g)
+            expected = [snapshot(g)]
+            tokens = []
+            while g.active_game:
+                player = len(tokens) % g.NUM_PLAYERS
+                action = random.choice(camelup.get_valid_moves(g, player))
+                tokens.append(gametree.apply_move(g, player, action))
+                expected.append(snapshot(g))
+
+            while tokens:
+                expected.pop()
+                gametree.undo_move(g, tokens.pop())
+                self.assertEqual(expected[-1], snapshot(g))
+                uncached = copy.deepcopy(g)
+                uncached.valid_moves_cache = None
+                for player in range(g.NUM_PLAYERS):
+                    self.assertEqual(camelup.get_valid_moves(uncached, player), camelup.get_valid_moves(g, player))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+import tempfile
+import random
+import json
+import os
+import camelup
+import instrumentation
+import rungame
+import bots
+
+
+class InstrumentationTest(unittest.TestCase):
+
+    def test_play_game(self):
+        stats = instrumentation.Instrumentation()
+        move_camel = camelup.move_camel
+        random.seed(2)
+        _, g = camelup.play_game([bots.RandomBot] * 3, instrumentation=stats)
+        _, g = camelup.play_game([bots.RandomBot] * 3, instrumentation=stats)
+        self.assertIs(move_camel, camelup.move_camel)
+
+        result = stats.to_dict()
+        self.assertEqual(2, result["games"])
+        self.assertEqual(2, result["functions"]["end_of_game"]["calls"])
+        self.assertEqual(
+            result["turns"],
+            sum(result["functions"][name]["calls"] for name in (
+                "move_camel", "move_trap", "place_game_bet", "place_round_winner_bet")))
+        for phase in ("player_view", "bot_move", "validation", "action", "logging", "events"):
+            self.assertEqual(result["turns"], result["phases"][phase]["calls"])
+        self.assertEqual(result["turns"], sum(player["moves"] for player in result["think_time"].values()))
+        self.assertEqual(["0", "1", "2"], list(result["think_time"]))
+
+    def test_play_game_iter(self):
+        # The engine functions are only patched while a turn is played, calls of the consumer are not counted
+        stats = instrumentation.Instrumentation()
+        move_camel = camelup.move_camel
+        is_valid_move = camelup.is_valid_move
+        random.seed(3)
+        for turn, g in camelup.play_game_iter([bots.RandomBot] * 3, instrumentation=stats):
+            self.assertIs(move_camel, camelup.move_camel)
+            for _ in range(100):
+                camelup.is_valid_move(g, 0, (0,))
+            if turn.round_id == 4:
+                break
+        self.assertIs(is_valid_move, camelup.is_valid_move)
+        result = stats.to_dict()
+        # The phases of a turn are added once the consumer is done with it, so the last turn has none
+        self.assertEqual(3, result["turns"])
+        self.assertLess(result["functions"]["is_valid_move"]["calls"], 100)
+
+    def test_merge(self):
+        a = instrumentation.Instrumentation()
+        b = instrumentation.Instrumentation()
+        a.add_time("bot_move", 1.0)
+        a.add_think_time(0, 1e-3)
+        b.add_time("bot_move", 2.0)
+        b.add_think_time(0, 1e-3)
+        b.add_think_time(1, 100.0)
+        a.merge(b)
+        result = a.to_dict()
+        self.assertEqual({"seconds": 3.0, "calls": 2}, result["phases"]["bot_move"])
+        self.assertEqual({"<=0.001024": 2}, result["think_time"]["0"]["histogram"])
+        self.assertEqual({">16.7772": 1}, result["think_time"]["1"]["histogram"])
+
+    def test_run_game_stats_file(self):
+        with tempfile.TemporaryDirectory() as log_dir:
+            stats_file = os.path.join(log_dir, "stats.json")
+            rungame.run_game(
+                4, [bots.RandomBot] * 2, workers=2, seed=1, chunk_size=1, log_dir=log_dir, stats_file=stats_file)
+            with open(stats_file) as f:
+                result = json.load(f)
+        self.assertEqual(4, result["games"])
+        self.assertEqual(["RandomBot", "RandomBot"], result["players"])
+        # The CSV logs are written by the consumer of the turns and only counted as logging
+        self.assertNotIn("write_logs", result["phases"])
+        self.assertGreater(result["phases"]["logging"]["calls"], 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+import tempfile
+import os
+import numpy as np
+import pandas as pd
+import rungame
+import gamelogs
+import merge_game_logs
+import bots
+
+
+class MergeGameLogsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.log_dir = tempfile.TemporaryDirectory()
+        self.columnar_dir = tempfile.TemporaryDirectory()
+        players = [bots.RandomBot] * 3
+        rungame.run_game(12, players, seed=2, log_dir=self.log_dir.name)
+        rungame.run_game(12, players, seed=2, log_dir=self.columnar_dir.name, log_format="columnar")
+
+    def tearDown(self):
+        self.log_dir.cleanup()
+        self.columnar_dir.cleanup()
+
+    def test_merge_csv(self):
+        output = merge_game_logs.merge_game_logs(self.log_dir.name, workers=2, chunk_size=5, max_pending_chunks=1)
+        merged = pd.read_csv(output)
+
+        # Same result as loading all games into memory and sorting them
+        games = []
+        for i in range(12):
+            dat = pd.read_csv(os.path.join(self.log_dir.name, "game_{}.csv".format(i)), index_col=0)
+            dat["game_id"] = i
+            games.append(dat)
+        games = pd.concat(games, sort=True).sort_values(["game_id", "round_id"])
+        self.assertEqual(["game_id", "round_id"], list(merged.columns[:2]))
+        self.assertEqual(sorted(games.columns), sorted(merged.columns))
+        pd.testing.assert_frame_equal(
+            games[merged.columns].reset_index(drop=True), merged, check_dtype=False)
+
+    def test_merge_columnar(self):
+        output = merge_game_logs.merge_game_logs(
+            self.log_dir.name, output_format="columnar", workers=1, chunk_size=5)
+        self.assertEqual(os.path.join(self.log_dir.name, "GameLogs.npl"), output)
+        merged = gamelogs.read_game_logs(output, decode=False)
+        expected = gamelogs.read_game_logs(os.path.join(self.columnar_dir.name, rungame.COLUMNAR_LOG_FILE), decode=False)
+        self.assertEqual(list(expected.columns), list(merged.columns))
+        for column in expected.columns:
+            np.testing.assert_array_equal(expected[column].to_numpy(), merged[column].to_numpy(), column)
+
+
+if __name__ == '__main__':
+    unittest.main()
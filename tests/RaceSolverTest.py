@@ -0,0 +1,105 @@
+import unittest
+import os
+import tempfile
+import camelup
+import racesolver
+import roundoutcomes
+
+
+class RaceSolverTest(unittest.TestCase):
+
+    @staticmethod
+    def make_game_state(stacks, camel_yet_to_move=None, board_size=16):
+        g = camelup.GameState(board_size=board_size)
+        g.camel_track = [[] for _ in range(g.BOARD_SIZE * 2)]
+        for board_loc, stack in stacks.items():
+            g.camel_track[board_loc] = list(stack)
+        if camel_yet_to_move is not None:
+            g.camel_yet_to_move = camel_yet_to_move
+        return g
+
+    def test_matches_exact_round_outcomes(self):
+        # c_2 is on the last field and has yet to move, so the game ends this round
+        g = self.make_game_state({12: ["c_0"], 13: ["c_1", "c_3"], 15: ["c_2"], 10: ["c_4"]}, [True] * 5)
+        g.trap_track[14] = [-1, 0]
+        placement_probabilities = racesolver.get_placement_probabilities(g, racesolver.RaceSolver())
+        round_probabilities, _ = roundoutcomes.get_round_outcome_probabilities(g)
+        for camel in g.CAMELS:
+            self.assertAlmostEqual(round_probabilities[camel][0], placement_probabilities[camel][0])
+            self.assertAlmostEqual(round_probabilities[camel][1], placement_probabilities[camel][1])
+            self.assertAlmostEqual(1.0, sum(placement_probabilities[camel]))
+
+    def test_certain_outcome(self):
+        g = self.make_game_state({15: ["c_0", "c_1", "c_2", "c_3", "c_4"]})
+        placement_probabilities = racesolver.get_placement_probabilities(g, racesolver.RaceSolver())
+        self.assertAlmostEqual(1.0, placement_probabilities["c_4"][0])
+        self.assertAlmostEqual(1.0, placement_probabilities["c_0"][4])
+        order_distribution = racesolver.get_finishing_order_distribution(g, racesolver.RaceSolver(full_order=True))
+        self.assertEqual([("c_4", "c_3", "c_2", "c_1", "c_0")], list(order_distribution))
+
+        g.active_game = False
+        g.camel_track[15], g.camel_track[16] = [], ["c_0", "c_1", "c_2", "c_3", "c_4"]
+        self.assertEqual(
+            [1.0, 0.0, 0.0, 0.0, 0.0], racesolver.get_placement_probabilities(g, racesolver.RaceSolver())["c_4"])
+
+    def test_canonical_states(self):
+        # The same race with other camels on another board
+        solver = racesolver.RaceSolver()
+        g = self.make_game_state({10: ["c_0", "c_1"], 12: ["c_2"], 13: ["c_3", "c_4"]}, [True, False, True, True, True])
+        h = self.make_game_state(
+            {7: ["c_4", "c_2"], 9: ["c_0"], 10: ["c_1", "c_3"]}, [True, True, False, True, True], board_size=13)
+        expected = racesolver.get_placement_probabilities(g, solver)
+        num_states = len(solver)
+        actual = racesolver.get_placement_probabilities(h, solver)
+        self.assertEqual(num_states, len(solver))
+        for camel_g, camel_h in (("c_0", "c_4"), ("c_1", "c_2"), ("c_2", "c_0"), ("c_3", "c_1"), ("c_4", "c_3")):
+            self.assertEqual(expected[camel_g], actual[camel_h])
+
+    def test_cycles(self):
+        # If all camels roll a 1 they fall back onto their field, which can repeat forever
+        g = self.make_game_state({11: ["c_0", "c_1", "c_2"], 13: ["c_3", "c_4"]})
+        g.trap_track[12] = [-1, 0]
+        g.trap_track[14] = [-1, 1]
+        for full_order in (False, True):
+            solver = racesolver.RaceSolver(full_order=full_order)
+            placement_probabilities = racesolver.get_placement_probabilities(g, solver)
+            for camel in g.CAMELS:
+                self.assertAlmostEqual(1.0, sum(placement_probabilities[camel]))
+            for place in range(g.NUM_CAMELS):
+                self.assertAlmostEqual(1.0, sum(p[place] for p in placement_probabilities.values()))
+            self.assertEqual(({}, [], {}), (solver._indices, solver._stack, solver._edges))
+
+    def test_finishing_order_distribution(self):
+        g = self.make_game_state({11: ["c_0", "c_1"], 12: ["c_2"], 14: ["c_3", "c_4"]})
+        g.trap_track[13] = [1, 2]
+        order_distribution = racesolver.get_finishing_order_distribution(g, racesolver.RaceSolver(full_order=True))
+        self.assertAlmostEqual(1.0, sum(order_distribution.values()))
+        placement_probabilities = racesolver.get_placement_probabilities(g, racesolver.RaceSolver())
+        for camel in g.CAMELS:
+            for place in range(g.NUM_CAMELS):
+                self.assertAlmostEqual(
+                    placement_probabilities[camel][place],
+                    sum(p for order, p in order_distribution.items() if order[place] == camel))
+        with self.assertRaises(ValueError):
+            racesolver.get_finishing_order_distribution(g, racesolver.RaceSolver())
+
+    def test_save_and_load(self):
+        g = self.make_game_state({11: ["c_0", "c_1"], 12: ["c_2"], 14: ["c_3", "c_4"]})
+        g.trap_track[13] = [-1, 2]
+        for full_order in (False, True):
+            solver = racesolver.RaceSolver(full_order=full_order)
+            expected = racesolver.get_placement_probabilities(g, solver)
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, "race_table.npz")
+                solver.save(path)
+                loaded = racesolver.RaceSolver.load(path)
+            self.assertEqual(len(solver), len(loaded))
+            self.assertEqual(full_order, loaded.full_order)
+            self.assertEqual(expected, racesolver.get_placement_probabilities(g, loaded))
+            self.assertEqual(len(solver), len(loaded))
+        with self.assertRaises(ValueError):
+            racesolver.RaceSolver().update(loaded)
+
+
+if __name__ == '__main__':
+    unittest.main()
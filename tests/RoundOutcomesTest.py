@@ -0,0 +1,131 @@
+import unittest
+import camelup
+import gametree
+import roundoutcomes
+
+
+def brute_force(g, player=0):
+    """
+    Enumerate the rest of the round with the game engine.
+    :return: Tuple (first, second, trap_income) of dictionaries/lists like get_round_outcome_probabilities().
+    """
+    first = dict.fromkeys(g.CAMELS, 0.0)
+    second = dict.fromkeys(g.CAMELS, 0.0)
+    trap_income = [0.0] * g.NUM_PLAYERS
+
+    def recurse(probability):
+        for camel_index, roll, outcome_probability in gametree.get_camel_move_outcomes(g):
+            money = list(g.player_money_values)
+            token = gametree.apply_move(g, player, (camelup.MOVE_CAMEL_ACTION_ID,), outcome=(camel_index, roll))
+            for i in range(g.NUM_PLAYERS):
+                trap_income[i] += probability * outcome_probability * (
+                    g.player_money_values[i] - money[i] - (1 if i == player else 0))
+            if all(g.camel_yet_to_move) or not g.active_game:
+                first[camelup.find_camel_in_nth_place(g, 1)] += probability * outcome_probability
+                second[camelup.find_camel_in_nth_place(g, 2)] += probability * outcome_probability
+            else:
+                recurse(probability * outcome_probability)
+            gametree.undo_move(g, token)
+
+    recurse(1.0)
+    return first, second, trap_income
+
+
+class RoundOutcomesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.g = camelup.GameState()
+
+        # Remove camels from start positions
+        self.g.camel_track[0] = []
+        self.g.camel_track[1] = []
+        self.g.camel_track[2] = []
+
+    def assert_matches_brute_force(self):
+        placement_probabilities, trap_income = roundoutcomes.get_round_outcome_probabilities(self.g)
+        first, second, expected_trap_income = brute_force(self.g)
+        for camel in self.g.CAMELS:
+            self.assertAlmostEqual(first[camel], placement_probabilities[camel][0])
+            self.assertAlmostEqual(second[camel], placement_probabilities[camel][1])
+            self.assertAlmostEqual(1.0, sum(placement_probabilities[camel]))
+        for expected, actual in zip(expected_trap_income, trap_income):
+            self.assertAlmostEqual(expected, actual)
+
+    def test_round_with_traps(self):
+        self.g.camel_track[3] = ["c_1", "c_3"]
+        self.g.camel_track[4] = ["c_0"]
+        self.g.camel_track[6] = ["c_4", "c_2"]
+        self.g.trap_track[5] = [-1, 1]
+        self.g.trap_track[8] = [1, 3]
+        self.g.camel_yet_to_move = [True, True, False, True, True]
+        self.assert_matches_brute_force()
+
+    def test_end_of_game_during_round(self):
+        self.g.camel_track[13] = ["c_1", "c_3"]
+        self.g.camel_track[14] = ["c_0"]
+        self.g.camel_track[11] = ["c_4", "c_2"]
+        self.g.camel_yet_to_move = [True, False, True, True, False]
+        self.g.trap_track[12] = [1, 0]
+        self.assert_matches_brute_force()
+
+    def test_last_camel(self):
+        self.g.camel_track[5] = ["c_0", "c_1", "c_2", "c_3", "c_4"]
+        self.g.camel_yet_to_move = [False, False, True, False, False]
+        placement_probabilities, _ = roundoutcomes.get_round_outcome_probabilities(self.g)
+        self.assertEqual([1.0, 0.0, 0.0], placement_probabilities["c_4"])
+        self.assertEqual([0.0, 1.0, 0.0], placement_probabilities["c_3"])
+        self.assertEqual([0.0, 0.0, 1.0], placement_probabilities["c_0"])
+
+    def test_round_bet_expected_values(self):
+        self.g.camel_track[5] = ["c_0", "c_1", "c_2", "c_3", "c_4"]
+        self.g.camel_yet_to_move = [False, False, True, False, False]
+        self.g.round_bets = [["c_4", 0], ["c_2", 1], ["c_2", 2], ["c_2", 3]]
+        expected_values = roundoutcomes.get_round_bet_expected_values(self.g)
+        self.assertNotIn("c_2", expected_values)
+        self.assertEqual(self.g.FIRST_PLACE_ROUND_PAYOUT[1], expected_values["c_4"])
+        self.assertEqual(self.g.SECOND_PLACE_ROUND_PAYOUT[0], expected_values["c_3"])
+        self.assertEqual(self.g.THIRD_OR_WORSE_PLACE_ROUND_PAYOUT, expected_values["c_1"])
+
+    def test_trap_placement_evaluations(self):
+        self.g.camel_track[3] = ["c_1", "c_3"]
+        self.g.camel_track[4] = ["c_0"]
+        self.g.camel_track[6] = ["c_4", "c_2"]
+        self.g.trap_track[8] = [1, 3]
+        self.g.trap_track[10] = [-1, 0]
+        self.g.camel_yet_to_move = [True, True, False, True, True]
+        self.g.round_bets = [["c_2", 1], ["c_0", 0], ["c_2", 0]]
+
+        def bet_value(placement_probabilities):
+            # Player 0 holds the first card of c_0 and the second card of c_2
+            p_0, p_2 = placement_probabilities["c_0"], placement_probabilities["c_2"]
+            return p_0[0] * 5 + p_0[1] - p_0[2] + p_2[0] * 3 + p_2[1] - p_2[2]
+
+        current_probabilities, current_trap_income = roundoutcomes.get_round_outcome_probabilities(self.g)
+        current_bet_value = bet_value(current_probabilities)
+
+        evaluations = roundoutcomes.get_trap_placement_evaluations(self.g, 0)
+        trap_moves = [
+            action for action in camelup.get_valid_moves(self.g, 0) if action[0] == camelup.MOVE_TRAP_ACTION_ID]
+        self.assertEqual(sorted(trap_moves), sorted(evaluations))
+        for action, evaluation in evaluations.items():
+            token = gametree.apply_move(self.g, 0, action)
+            placement_probabilities, trap_income = roundoutcomes.get_round_outcome_probabilities(self.g)
+            gametree.undo_move(self.g, token)
+            bet_value_change = bet_value(placement_probabilities) - current_bet_value
+            self.assertAlmostEqual(trap_income[0], evaluation.expected_trap_income)
+            self.assertAlmostEqual(bet_value_change, evaluation.bet_value_change)
+            self.assertAlmostEqual(
+                trap_income[0] + bet_value_change - current_trap_income[0], evaluation.expected_coin_gain)
+            for camel in self.g.CAMELS:
+                for expected, actual in zip(placement_probabilities[camel], evaluation.placement_probabilities[camel]):
+                    self.assertAlmostEqual(expected, actual)
+                self.assertAlmostEqual(
+                    placement_probabilities[camel][0] - current_probabilities[camel][0],
+                    evaluation.round_winner_change[camel])
+
+        # A trap far ahead of the camels is never reached
+        self.assertEqual(0.0, evaluations[(camelup.MOVE_TRAP_ACTION_ID, 1, 15)].expected_trap_income)
+
+
+if __name__ == '__main__':
+    unittest.main()
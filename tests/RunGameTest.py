@@ -0,0 +1,78 @@
+import unittest
+import tempfile
+import filecmp
+import os
+import pandas as pd
+import rungame
+import gamelogs
+import bots
+
+
+class RunGameTest(unittest.TestCase):
+
+    def test_parallel_run_matches_serial_run(self):
+        players = [bots.RandomBot] * 3
+        with tempfile.TemporaryDirectory() as serial_dir, tempfile.TemporaryDirectory() as parallel_dir:
+            serial = rungame.run_game(6, players, workers=1, seed=11, chunk_size=4, log_dir=serial_dir)
+            parallel = rungame.run_game(6, players, workers=2, seed=11, chunk_size=1, log_dir=parallel_dir)
+            self.assertEqual(serial, parallel)
+            files = ["game_{}.csv".format(i) for i in range(6)]
+            match, mismatch, errors = filecmp.cmpfiles(serial_dir, parallel_dir, files, shallow=False)
+            self.assertEqual(files, match)
+
+            # A single game can be replayed from the seed and its index
+            _, gamestate = rungame.play_seeded_game(players, 11, 4)
+            self.assertEqual(serial[4], (gamestate.player_money_values, gamestate.game_winner))
+            self.assertTrue(os.path.exists(os.path.join(serial_dir, "game_5.csv")))
+
+    def test_columnar_logs_match_csv_logs(self):
+        players = [bots.RandomBot] * 2
+        with tempfile.TemporaryDirectory() as csv_dir, tempfile.TemporaryDirectory() as columnar_dir:
+            csv_results = rungame.run_game(5, players, seed=3, chunk_size=2, log_dir=csv_dir)
+            columnar_results = rungame.run_game(
+                5, players, workers=2, seed=3, chunk_size=2, log_dir=columnar_dir, log_format="columnar")
+            self.assertEqual(csv_results, columnar_results)
+            self.assertEqual([rungame.COLUMNAR_LOG_FILE], os.listdir(columnar_dir))
+
+            games = gamelogs.read_game_logs(os.path.join(columnar_dir, rungame.COLUMNAR_LOG_FILE))
+            for i in range(5):
+                expected = pd.read_csv(os.path.join(csv_dir, "game_{}.csv".format(i)), index_col=0)
+                game = games[games["game_id"] == i]
+                self.assertEqual(len(expected), len(game))
+                self.assertEqual(expected["player_1_coins"].tolist(), game["player_1_coins"].tolist())
+                self.assertEqual(
+                    expected["action_type"].fillna("").tolist(), game["action_type"].astype(object).fillna("").tolist())
+
+    def test_game_rng(self):
+        players = [bots.RandomBot] * 2
+        with tempfile.TemporaryDirectory() as log_dir:
+            serial = rungame.run_game(4, players, seed=8, log_dir=log_dir, log_format="columnar", game_rng=True)
+            parallel = rungame.run_game(
+                4, players, workers=2, seed=8, chunk_size=1, log_dir=log_dir, log_format="columnar", game_rng=True)
+            self.assertEqual(serial, parallel)
+            _, gamestate = rungame.play_seeded_game(players, 8, 3, game_rng=True)
+            self.assertEqual(serial[3], (gamestate.player_money_values, gamestate.game_winner))
+
+    def test_log_sampling_and_max_turns(self):
+        players = [bots.RandomBot] * 2
+        with tempfile.TemporaryDirectory() as log_dir, tempfile.TemporaryDirectory() as sampled_dir:
+            results = rungame.run_game(6, players, seed=5, log_dir=log_dir)
+            sampled = rungame.run_game(6, players, seed=5, log_dir=sampled_dir, log_every=4)
+            self.assertEqual(results, sampled)
+            self.assertEqual(["game_0.csv", "game_4.csv"], sorted(os.listdir(sampled_dir)))
+            self.assertTrue(filecmp.cmp(
+                os.path.join(log_dir, "game_4.csv"), os.path.join(sampled_dir, "game_4.csv"), shallow=False))
+
+            results = rungame.run_game(3, players, seed=5, log_dir=log_dir, log_format="columnar", max_turns=4)
+            self.assertEqual([[]] * 3, [winners for _, winners in results])
+            games = gamelogs.read_game_logs(os.path.join(log_dir, rungame.COLUMNAR_LOG_FILE))
+            self.assertEqual([5] * 3, games.groupby("game_id").size().tolist())
+
+            with self.assertRaises(ValueError):
+                rungame.run_game(2, players, seed=5, log_dir=log_dir, log_every=0)
+            with self.assertRaises(ValueError):
+                rungame.run_games(players, 5, range(2), log_dir=log_dir, log_every=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
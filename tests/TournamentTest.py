@@ -0,0 +1,125 @@
+import unittest
+import numpy as np
+import tournament
+import bots
+import camelup
+from playerinterface import PlayerInterface
+from actionids import MOVE_CAMEL_ACTION_ID, ROUND_BET_ACTION_ID
+
+
+class CamelBot(PlayerInterface):
+    @staticmethod
+    def move(active_player, game_state):
+        return MOVE_CAMEL_ACTION_ID,
+
+
+class LeaderBot(PlayerInterface):
+    @staticmethod
+    def move(active_player, game_state):
+        leader = camelup.find_camel_in_nth_place(game_state, 1)
+        if (ROUND_BET_ACTION_ID, leader) in camelup.get_valid_moves(game_state, active_player):
+            return ROUND_BET_ACTION_ID, leader
+        return MOVE_CAMEL_ACTION_ID,
+
+
+class TournamentTest(unittest.TestCase):
+
+    def test_add_game(self):
+        results = tournament.TournamentResults(["a", "b", "c"])
+        results.add_game((2, 0, 1), (5, 7, 7))
+        self.assertEqual([1, 1, 1], results.games.tolist())
+        self.assertEqual([0.5, 0.5, 0.0], results.wins.tolist())
+        self.assertEqual([0.5, 0.5], results.seat_wins[[0, 1], [1, 2]].tolist())
+        self.assertEqual(0.5, results.pair_wins[0, 1])
+        self.assertEqual(1.0, results.pair_wins[1, 2])
+        self.assertAlmostEqual(3 * tournament.INITIAL_RATING, results.ratings.sum())
+        self.assertEqual(results.ratings[0], results.ratings[1])
+        self.assertLess(results.ratings[2], tournament.INITIAL_RATING)
+        # The first rows of the standings are tied
+        self.assertEqual("c", results.standings()["bot"].iloc[2])
+        self.assertTrue(np.isnan(results.seat_win_rates().loc["a", "seat_0"]))
+
+    def test_swiss_lineups(self):
+        ratings = [1500, 1600, 1400, 1550, 1450]
+        self.assertEqual([(1, 3), (0, 4)], tournament.swiss_lineups(ratings, 2, 0))
+        self.assertEqual([(3, 0), (4, 2)], tournament.swiss_lineups(ratings, 2, 1))
+        with self.assertRaises(ValueError):
+            tournament.swiss_lineups(ratings, 6, 0)
+
+    def test_seat_rotation(self):
+        matchups = list(tournament.schedule(tournament.round_robin_lineups(3, 2), 2, first_game_index=5))
+        self.assertEqual(list(range(5, 17)), [matchup.game_index for matchup in matchups])
+        self.assertEqual([(0, 1), (0, 1), (1, 0), (1, 0)], [matchup.seats for matchup in matchups[:4]])
+
+        results = tournament.run_tournament([bots.RandomBot, CamelBot, bots.RandomBot], games_per_seating=2, seed=1)
+        self.assertEqual(12, results.num_games)
+        self.assertEqual([[4, 4]] * 3, results.seat_games.tolist())
+        self.assertAlmostEqual(12, results.wins.sum())
+
+    def test_parallel_run_matches_serial_run(self):
+        players = [bots.RandomBot, CamelBot, bots.RandomBot]
+        for tournament_format in tournament.FORMATS:
+            serial = tournament.run_tournament(
+                players, players_per_game=2, games_per_seating=3, tournament_format=tournament_format,
+                swiss_rounds=2, seed=4, chunk_size=4)
+            parallel = tournament.run_tournament(
+                players, players_per_game=2, games_per_seating=3, tournament_format=tournament_format,
+                swiss_rounds=2, workers=2, seed=4, chunk_size=1)
+            self.assertEqual(serial.num_games, parallel.num_games)
+            self.assertEqual(serial.ratings.tolist(), parallel.ratings.tolist())
+            self.assertEqual(serial.pair_wins.tolist(), parallel.pair_wins.tolist())
+            self.assertEqual(serial.coins.tolist(), parallel.coins.tolist())
+        # Two Swiss rounds of one line-up each
+        self.assertEqual(12, serial.num_games)
+
+    def test_pair_decision(self):
+        results = tournament.TournamentResults(["a", "b"])
+        for i in range(30):
+            results.add_game((i % 2, 1 - i % 2), (10, 5) if i % 2 == 0 else (5, 10))
+        decision = tournament.get_pair_decision(results, 0, 1, 0.05)
+        self.assertEqual((30, 1.0, 5.0, 0), (decision.games, decision.win_rate, decision.coin_margin, decision.better))
+        self.assertLess(0.5, decision.win_rate_bounds[0])
+        self.assertIsNone(tournament.get_pair_decision(results, 0, 1, 0.05, min_games=31).better)
+        # Without any variance, the margin is certain
+        self.assertEqual((5.0, 5.0), tournament.get_pair_decision(results, 0, 1, 0.05, "coin_margin").coin_margin_bounds)
+
+        results.add_game((1, 0), (4, 4))
+        decision = tournament.get_pair_decision(results, 1, 0, 1e-6, "coin_margin")
+        self.assertLess(decision.coin_margin_bounds[1], 0)
+        self.assertEqual(0, decision.better)
+        self.assertAlmostEqual(0.5 / 31, decision.win_rate)
+        with self.assertRaises(ValueError):
+            tournament.get_pair_decision(results, 0, 1, 0.05, "rating")
+
+    def test_adaptive_tournament(self):
+        results, decisions = tournament.run_adaptive_tournament(
+            [bots.RandomBot, LeaderBot, bots.RandomBot], games_per_batch=5, max_games=100, seed=3)
+        self.assertEqual([(0, 1), (0, 2), (1, 2)], list(decisions))
+        self.assertEqual(1, decisions[(0, 1)].better)
+        self.assertEqual(1, decisions[(1, 2)].better)
+        # Identical bots are never resolved
+        self.assertIsNone(decisions[(0, 2)].better)
+        self.assertEqual(100, decisions[(0, 2)].games)
+        self.assertLess(decisions[(0, 1)].games, 100)
+        self.assertEqual(sum(decision.games for decision in decisions.values()), results.num_games)
+
+    def test_paired_evaluation(self):
+        candidates = [bots.RandomBot, LeaderBot, bots.RandomBot]
+        serial = tournament.run_paired_evaluation(candidates, [CamelBot], 6, seed=2, chunk_size=4)
+        parallel = tournament.run_paired_evaluation(candidates, [CamelBot], 6, workers=2, seed=2, chunk_size=1)
+        self.assertEqual(6, serial.num_deals)
+        self.assertEqual(serial.differences.tolist(), parallel.differences.tolist())
+        comparisons = serial.comparisons()
+        self.assertEqual([("RandomBot", "LeaderBot"), ("RandomBot", "RandomBot"), ("LeaderBot", "RandomBot")],
+                         list(zip(comparisons["candidate_a"], comparisons["candidate_b"])))
+        # The same bot plays the same games on the same deal
+        self.assertEqual((0.0, 0.0), tuple(comparisons[["mean_difference", "standard_error"]].iloc[1]))
+        self.assertLess(comparisons["mean_difference"].iloc[0], 0)
+
+        deal_coins = tournament.play_paired_deals(candidates, [CamelBot, CamelBot], 2, [0])
+        self.assertEqual((3, 3), deal_coins[0].shape)
+        self.assertEqual(deal_coins[0][0].tolist(), deal_coins[0][2].tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
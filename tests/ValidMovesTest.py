@@ -1,4 +1,6 @@
 import unittest
+import random
+import copy
 from camelup import *
 
 
@@ -137,6 +139,47 @@ class ValidMovesTest(unittest.TestCase):
         self.assertEqual(set(valid_moves_2), set(expected_result_2))
         self.assertEqual(set(valid_moves_3), set(expected_result_3))
 
+    def test_is_valid_move(self):
+        candidate_moves = [(0,), (0, 1), [0], (), (4,), (1, 1, 5, 0)]
+        candidate_moves += [(1, trap_type, trap_location) for trap_type in (1, -1, 0)
+                            for trap_location in range(-1, self.g.BOARD_SIZE + 2)]
+        candidate_moves += [(2, camel) for camel in self.g.CAMELS + ["c_9"]]
+        candidate_moves += [(3, bet_type, camel) for bet_type in ("win", "lose", "draw")
+                            for camel in self.g.CAMELS + ["c_9"]]
+        for player in range(self.g.NUM_PLAYERS):
+            valid_moves = get_valid_moves(self.g, player)
+            for move in candidate_moves:
+                self.assertEqual(move in valid_moves, is_valid_move(self.g, player, move), msg=str((player, move)))
+
+    def test_valid_moves_cache(self):
+        random.seed(42)
+        g = GameState()
+        enable_valid_moves_cache(g)
+        while g.active_game:
+            for player in range(g.NUM_PLAYERS):
+                uncached = copy.deepcopy(g)
+                uncached.valid_moves_cache = None
+                self.assertEqual(get_valid_moves(uncached, player), get_valid_moves(g, player))
+            action = random.choice(get_valid_moves(g, 0))
+            if action[0] == MOVE_CAMEL_ACTION_ID:
+                move_camel(g, 0)
+            elif action[0] == MOVE_TRAP_ACTION_ID:
+                move_trap(g, action[1], action[2], 0)
+            elif action[0] == ROUND_BET_ACTION_ID:
+                place_round_winner_bet(g, action[1], 0)
+            else:
+                place_game_bet(g, action[2], action[1], 0)
+
+    def test_valid_moves_cache_of_player_view(self):
+        # A view of one player must not cache the game bet moves of another player from the hidden bets
+        g = GameState()
+        enable_valid_moves_cache(g)
+        place_game_bet(g, "c_1", "win", 1)
+        self.assertIn((GAME_BET_ACTION_ID, "win", "c_1"), get_valid_moves(g.get_player_view(0), 1))
+        self.assertNotIn((GAME_BET_ACTION_ID, "win", "c_1"), get_valid_moves(g, 1))
+        self.assertNotIn((GAME_BET_ACTION_ID, "win", "c_1"), get_valid_moves(g.get_player_view(1), 1))
+        self.assertFalse(is_valid_move(g, 1, (GAME_BET_ACTION_ID, "win", "c_1")))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,117 @@
+import unittest
+import random
+import camelup
+import gametree
+import roundoutcomes
+import zobrist
+import bots
+from actionids import GAME_BET_ACTION_ID, ROUND_BET_ACTION_ID, MOVE_TRAP_ACTION_ID, MOVE_CAMEL_ACTION_ID
+
+
+class ZobristTest(unittest.TestCase):
+
+    def test_incremental_hash(self):
+        for state_class in (camelup.GameState, camelup.CompactGameState):
+            random.seed(3)
+            for _ in range(20):
+                g = state_class()
+                camelup.enable_position_hashing(g)
+                player = 0
+                while g.active_game:
+                    position_hash = g.position_hash
+                    token = gametree.apply_move(g, player, bots.RandomBot.move(player, g.get_player_view(player)))
+                    self.assertEqual(zobrist.compute_hash(g), g.position_hash)
+                    if random.random() < 0.2:
+                        gametree.undo_move(g, token)
+                        self.assertEqual(position_hash, g.position_hash)
+                    else:
+                        player = (player + 1) % g.NUM_PLAYERS
+
+    def test_transpositions(self):
+        g = camelup.GameState()
+        camelup.enable_position_hashing(g)
+        h = camelup.GameState()
+        h.camel_track = [list(stack) for stack in g.camel_track]
+        camelup.enable_position_hashing(h)
+        self.assertEqual(g.position_hash, h.position_hash)
+
+        gametree.apply_move(g, 0, (MOVE_TRAP_ACTION_ID, 1, 14))
+        gametree.apply_move(g, 1, (ROUND_BET_ACTION_ID, "c_0"))
+        gametree.apply_move(g, 2, (MOVE_CAMEL_ACTION_ID,), outcome=(2, 1))
+        gametree.apply_move(h, 2, (MOVE_CAMEL_ACTION_ID,), outcome=(2, 1))
+        gametree.apply_move(h, 1, (ROUND_BET_ACTION_ID, "c_0"))
+        gametree.apply_move(h, 0, (MOVE_TRAP_ACTION_ID, 1, 14))
+        self.assertEqual(g.position_hash, h.position_hash)
+
+        # The order of bets on the same camel decides the payouts
+        gametree.apply_move(g, 0, (ROUND_BET_ACTION_ID, "c_1"))
+        gametree.apply_move(g, 3, (ROUND_BET_ACTION_ID, "c_1"))
+        gametree.apply_move(h, 3, (ROUND_BET_ACTION_ID, "c_1"))
+        gametree.apply_move(h, 0, (ROUND_BET_ACTION_ID, "c_1"))
+        self.assertNotEqual(g.position_hash, h.position_hash)
+
+    def test_hidden_game_bets(self):
+        g = camelup.GameState()
+        camelup.enable_position_hashing(g)
+        h = camelup.GameState()
+        h.camel_track = [list(stack) for stack in g.camel_track]
+        camelup.enable_position_hashing(h)
+        camelup.place_game_bet(g, "c_0", "win", 1)
+        camelup.place_game_bet(h, "c_4", "win", 1)
+        self.assertNotEqual(g.position_hash, h.position_hash)
+        self.assertEqual(g.get_player_view(0).position_hash, h.get_player_view(0).position_hash)
+        self.assertEqual(g.get_player_copy(0).position_hash, h.get_player_copy(0).position_hash)
+        self.assertEqual(g.get_player_view(1).position_hash, g.get_player_copy(1).position_hash)
+        self.assertEqual(g.position_hash, g.get_player_view(1).position_hash)
+
+    def test_compact_game_state(self):
+        g = camelup.GameState()
+        gametree.apply_move(g, 0, (GAME_BET_ACTION_ID, "lose", "c_3"))
+        gametree.apply_move(g, 1, (MOVE_CAMEL_ACTION_ID,))
+        self.assertEqual(zobrist.compute_hash(g), zobrist.compute_hash(camelup.CompactGameState.from_game_state(g)))
+
+    def test_hash_summary(self):
+        random.seed(4)
+        game_log, g = camelup.play_game([bots.RandomBot] * 3)
+        self.assertEqual(zobrist.board_hash(g), zobrist.hash_summary(game_log[-1]))
+        self.assertEqual(zobrist.board_hash(g), zobrist.hash_summary(camelup.summarize_game_state(g)))
+        self.assertNotEqual(zobrist.hash_summary(game_log[-2]), zobrist.hash_summary(game_log[-1]))
+
+    def test_lru_table(self):
+        table = zobrist.TranspositionTable(max_entries=2)
+        table.store(1, "a")
+        table.store(2, "b")
+        self.assertEqual("a", table.get(1))
+        table.store(3, "c")
+        self.assertEqual(2, len(table))
+        self.assertNotIn(2, table)
+        self.assertEqual("a", table.get(1))
+        self.assertEqual("c", table.get(3))
+        self.assertIsNone(table.get(2))
+        self.assertEqual((3, 1), (table.hits, table.misses))
+
+    def test_depth_preferred_table(self):
+        table = zobrist.TranspositionTable(max_entries=4, eviction="depth")
+        self.assertTrue(table.store(1, "a", depth=3))
+        self.assertFalse(table.store(5, "b", depth=2))
+        self.assertEqual("a", table.get(1))
+        self.assertIsNone(table.get(1, min_depth=4))
+        self.assertTrue(table.store(5, "b", depth=3))
+        self.assertIsNone(table.get(1))
+        self.assertEqual("b", table.get(5))
+        self.assertEqual(1, len(table))
+        with self.assertRaises(ValueError):
+            zobrist.TranspositionTable(eviction="fifo")
+
+    def test_round_outcomes_table(self):
+        g = camelup.GameState()
+        camelup.enable_position_hashing(g)
+        table = zobrist.TranspositionTable()
+        expected = roundoutcomes.get_round_outcome_probabilities(g)
+        self.assertEqual(expected, roundoutcomes.get_round_outcome_probabilities(g, table))
+        self.assertEqual(expected, roundoutcomes.get_round_outcome_probabilities(g, table))
+        self.assertEqual((1, 1), (table.hits, table.misses))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,593 @@
+"""
+Tournaments between bots.
+
+A tournament plays many games between bots from bots.py and keeps only a summary of each game: the bots in their seat
+order and the final coins. Line-ups are scheduled either round-robin (every combination of bots) or in Swiss rounds
+(bots of similar rating play each other). Every line-up is played in all rotations of the seat order, so that no bot
+profits from moving first.
+
+The summaries are streamed into a TournamentResults object, which keeps running Elo ratings, win rates by bot and by
+seat, and head-to-head records. Its memory use does not depend on the number of games. In a game of more than two
+players, every pair of players counts as a match decided by their final coins.
+
+An adaptive tournament (run_adaptive_tournament()) plays two player games in batches and only sends new games to the
+pairs of bots whose ranking is not yet decided at the requested confidence.
+
+A paired evaluation (run_paired_evaluation()) plays every candidate bot in every seat order on the same deals of
+starting positions, camels and dice (see gamerng.RngTape), and compares candidates by their coin difference per deal.
+
+Games are seeded like in rungame.py, so a tournament only depends on its seed and not on the number of worker
+processes:
+
+    python tournament.py RandomBot OtherBot ThirdBot --players-per-game 2 --games-per-seating 500 --workers 8
+"""
+import argparse
+import collections
+import concurrent.futures
+import contextlib
+import functools
+import itertools
+import math
+import random
+import statistics
+import sys
+import numpy as np
+import pandas as pd
+import camelup
+import gamerng
+import rungame
+import bots
+
+FORMATS = ("round-robin", "swiss")
+CRITERIA = ("win_rate", "coin_margin")
+INITIAL_RATING = 1500.0
+ELO_SCALE = 400.0
+
+# A game to play
+#   - game_index: Index of the game within the tournament, which determines its seed.
+#   - seats: Tuple of the indices of the bots in seat order. The bot in seat 0 moves first.
+Matchup = collections.namedtuple("Matchup", ["game_index", "seats"])
+
+
+class TournamentResults:
+    """
+    Running summary of a tournament.
+    """
+
+    def __init__(self, bot_names, k_factor=16.0):
+        """
+        :param bot_names: List of the names of the bots.
+        :param k_factor: Maximum change of the Elo rating by a single match.
+        """
+        num_bots = len(bot_names)
+        self.bot_names = list(bot_names)
+        self.k_factor = k_factor
+        self.num_games = 0
+        self.ratings = np.full(num_bots, INITIAL_RATING)
+        self.games = np.zeros(num_bots, dtype=np.int64)
+        # Games won, with shared first places split between the winners
+        self.wins = np.zeros(num_bots)
+        self.coins = np.zeros(num_bots, dtype=np.int64)
+        # Games and wins by bot and seat. The number of seats grows with the largest game seen.
+        self.seat_games = np.zeros((num_bots, 0), dtype=np.int64)
+        self.seat_wins = np.zeros((num_bots, 0))
+        # Matches between pairs of bots, i.e. the number of games in which bot i had more coins than bot j (ties count
+        # half) and the number of games bot i and bot j played together
+        self.pair_wins = np.zeros((num_bots, num_bots))
+        self.pair_games = np.zeros((num_bots, num_bots), dtype=np.int64)
+        # Sums of the coin margins of bot i over bot j in their games together, and of their squares
+        self.pair_margins = np.zeros((num_bots, num_bots), dtype=np.int64)
+        self.pair_margin_squares = np.zeros((num_bots, num_bots), dtype=np.int64)
+
+    def add_game(self, seats, coins):
+        """
+        Add the result of a game.
+        :param seats: Sequence of bot indices in seat order.
+        :param coins: Sequence of the final coins of the players in seat order.
+        :return:
+        """
+        num_players = len(seats)
+        if num_players > self.seat_games.shape[1]:
+            extra = num_players - self.seat_games.shape[1]
+            self.seat_games = np.pad(self.seat_games, ((0, 0), (0, extra)))
+            self.seat_wins = np.pad(self.seat_wins, ((0, 0), (0, extra)))
+
+        winners = [seat for seat in range(num_players) if coins[seat] == max(coins)]
+        for seat, bot in enumerate(seats):
+            self.games[bot] += 1
+            self.coins[bot] += coins[seat]
+            self.seat_games[bot, seat] += 1
+            if seat in winners:
+                self.wins[bot] += 1 / len(winners)
+                self.seat_wins[bot, seat] += 1 / len(winners)
+
+        # Elo updates of all pairs are computed from the ratings before the game. K is shared between the opponents of
+        # a player, so that a game moves a rating at most as much as a two player game.
+        k = self.k_factor / max(1, num_players - 1)
+        changes = np.zeros(len(self.ratings))
+        for a, b in itertools.combinations(range(num_players), 2):
+            bot_a, bot_b = seats[a], seats[b]
+            score = 1.0 if coins[a] > coins[b] else 0.0 if coins[a] < coins[b] else 0.5
+            self.pair_wins[bot_a, bot_b] += score
+            self.pair_wins[bot_b, bot_a] += 1 - score
+            self.pair_games[bot_a, bot_b] += 1
+            self.pair_games[bot_b, bot_a] += 1
+            margin = coins[a] - coins[b]
+            self.pair_margins[bot_a, bot_b] += margin
+            self.pair_margins[bot_b, bot_a] -= margin
+            self.pair_margin_squares[bot_a, bot_b] += margin ** 2
+            self.pair_margin_squares[bot_b, bot_a] += margin ** 2
+            if bot_a != bot_b:
+                expected = 1 / (1 + 10 ** ((self.ratings[bot_b] - self.ratings[bot_a]) / ELO_SCALE))
+                changes[bot_a] += k * (score - expected)
+                changes[bot_b] -= k * (score - expected)
+        self.ratings += changes
+        self.num_games += 1
+
+    def standings(self):
+        """
+        :return: pandas DataFrame with one row per bot, sorted by rating.
+        """
+        games = np.maximum(self.games, 1)
+        table = pd.DataFrame({
+            "bot": self.bot_names, "rating": self.ratings, "games": self.games, "wins": self.wins,
+            "win_rate": self.wins / games, "mean_coins": self.coins / games})
+        return table.sort_values("rating", ascending=False).reset_index(drop=True)
+
+    def seat_win_rates(self):
+        """
+        :return: pandas DataFrame of the win rate of each bot (rows) in each seat (columns). NaN where a bot never sat.
+        """
+        with np.errstate(invalid="ignore", divide="ignore"):
+            rates = self.seat_wins / self.seat_games
+        return pd.DataFrame(
+            rates, index=self.bot_names, columns=["seat_{}".format(seat) for seat in range(rates.shape[1])])
+
+    def head_to_head(self):
+        """
+        :return: pandas DataFrame of the rate at which each bot (rows) finished with more coins than each other bot
+            (columns) in their games together. Ties count half. NaN where two bots never met.
+        """
+        with np.errstate(invalid="ignore", divide="ignore"):
+            rates = self.pair_wins / self.pair_games
+        return pd.DataFrame(rates, index=self.bot_names, columns=self.bot_names)
+
+
+def get_seatings(lineup):
+    """
+    :param lineup: Tuple of bot indices.
+    :return: List of all rotations of the seat order.
+    """
+    return [tuple(lineup[i:] + lineup[:i]) for i in range(len(lineup))]
+
+
+def round_robin_lineups(num_bots, players_per_game):
+    """
+    :param num_bots: Number of bots in the tournament.
+    :param players_per_game: Number of players of each game.
+    :return: List of all combinations of bots, as tuples of bot indices.
+    """
+    if players_per_game > num_bots:
+        raise ValueError("A round-robin of {} bots can't fill games of {} players".format(num_bots, players_per_game))
+    return list(itertools.combinations(range(num_bots), players_per_game))
+
+
+def swiss_lineups(ratings, players_per_game, round_index):
+    """
+    Group the bots by rating into line-ups of one Swiss round. Each round shifts the groups by one place, so that
+    neighbours in the standings don't always meet in the same groups. Bots that don't fill a group sit out the round.
+    :param ratings: Sequence of the ratings of the bots.
+    :param players_per_game: Number of players of each game.
+    :param round_index: Index of the round.
+    :return: List of line-ups, as tuples of bot indices.
+    """
+    if players_per_game > len(ratings):
+        raise ValueError(
+            "A Swiss round of {} bots can't fill games of {} players".format(len(ratings), players_per_game))
+    # Sort by rating with ties broken by index, so that the first round is in the given order
+    order = sorted(range(len(ratings)), key=lambda bot: (-ratings[bot], bot))
+    shift = round_index % players_per_game if len(order) > players_per_game else 0
+    order = order[shift:] + order[:shift]
+    num_groups = len(order) // players_per_game
+    return [tuple(order[i * players_per_game:(i + 1) * players_per_game]) for i in range(num_groups)]
+
+
+def schedule(lineups, games_per_seating, first_game_index=0):
+    """
+    :param lineups: List of line-ups, as tuples of bot indices.
+    :param games_per_seating: Number of games of every rotation of the seat order of a line-up.
+    :param first_game_index: Game index of the first game.
+    :return: Generator of Matchup objects.
+    """
+    game_index = first_game_index
+    for lineup in lineups:
+        for seats in get_seatings(lineup):
+            for _ in range(games_per_seating):
+                yield Matchup(game_index, seats)
+                game_index += 1
+
+
+def play_matchups(players, master_seed, matchups, game_rng=False):
+    """
+    Play a chunk of games. This is the unit of work of a worker process.
+    :param players: List of bot classes. Matchups refer to bots by their index in this list.
+    :param master_seed: Integer seed of the tournament.
+    :param matchups: List of Matchup objects.
+    :param game_rng: Passed on to rungame.play_seeded_game().
+    :return: List of tuples (seats, final coins), one per matchup.
+    """
+    results = []
+    for game_index, seats in matchups:
+        _, gamestate = rungame.play_seeded_game([players[bot] for bot in seats], master_seed, game_index,
+                                                game_rng=game_rng)
+        results.append((seats, tuple(gamestate.player_money_values)))
+    return results
+
+
+def _chunks(iterable, chunk_size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, chunk_size))
+        if len(chunk) == 0:
+            return
+        yield chunk
+
+
+def _play_chunks(play_chunk, chunks, executor, workers):
+    """
+    Play chunks of games on a process pool and yield their results in order. Only a few chunks per worker are
+    submitted ahead, so that the schedule is never held in memory as a whole.
+    """
+    if executor is None:
+        yield from map(play_chunk, chunks)
+        return
+    pending = collections.deque()
+    for chunk in chunks:
+        pending.append(executor.submit(play_chunk, chunk))
+        if len(pending) >= 2 * workers:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def run_tournament(players, players_per_game=2, games_per_seating=10, tournament_format="round-robin",
+                   swiss_rounds=5, workers=1, seed=None, chunk_size=100, k_factor=16.0, game_rng=False,
+                   verbose=False):
+    """
+    Play a tournament between bots.
+    :param players: List of bot classes inheriting PlayerInterface, each entered once.
+    :param players_per_game: Number of players of each game.
+    :param games_per_seating: Number of games of every rotation of the seat order of a line-up.
+    :param tournament_format: "round-robin" to play every combination of bots once, or "swiss" to play swiss_rounds
+        rounds of line-ups grouped by the current ratings.
+    :param swiss_rounds: Number of rounds of a Swiss tournament.
+    :param workers: Number of worker processes. With 1, all games are played in the current process.
+    :param seed: Master seed of the tournament. If None, a random seed is drawn and printed. Results don't depend on
+        the number of workers or the chunk size.
+    :param chunk_size: Number of games assigned to a worker at a time.
+    :param k_factor: See TournamentResults.
+    :param game_rng: Passed on to rungame.play_seeded_game().
+    :param verbose: If True, print the progress.
+    :return: TournamentResults object.
+    """
+    if tournament_format not in FORMATS:
+        raise ValueError("Unknown tournament format {}, must be one of {}".format(tournament_format, FORMATS))
+    if seed is None:
+        seed = random.SystemRandom().randrange(2 ** 32)
+        print("Using seed {}".format(seed))
+
+    results = TournamentResults([player.__name__ for player in players], k_factor=k_factor)
+    play_chunk = functools.partial(play_matchups, players, seed, game_rng=game_rng)
+    with contextlib.ExitStack() as stack:
+        executor = None
+        if workers > 1:
+            executor = stack.enter_context(concurrent.futures.ProcessPoolExecutor(max_workers=workers))
+        if tournament_format == "round-robin":
+            rounds = [round_robin_lineups(len(players), players_per_game)]
+        else:
+            # Later rounds depend on the ratings after the previous round and are generated lazily
+            rounds = (swiss_lineups(results.ratings, players_per_game, i) for i in range(swiss_rounds))
+        for round_index, lineups in enumerate(rounds):
+            matchups = schedule(lineups, games_per_seating, first_game_index=results.num_games)
+            for chunk_results in _play_chunks(play_chunk, _chunks(matchups, chunk_size), executor, workers):
+                for seats, coins in chunk_results:
+                    results.add_game(seats, coins)
+                if verbose:
+                    print("Round {}: played {} games".format(round_index + 1, results.num_games))
+    return results
+
+
+# Decision of run_adaptive_tournament() about a pair of bots (a, b) with a < b
+#   - games: Number of games of the pair.
+#   - win_rate: Rate at which bot a finished with more coins than bot b. Ties count half.
+#   - win_rate_bounds: Tuple (lower, upper) of the confidence interval of the win rate.
+#   - coin_margin: Mean coins of bot a minus the coins of bot b.
+#   - coin_margin_bounds: Tuple (lower, upper) of the confidence interval of the coin margin.
+#   - better: Index of the better bot according to the decision criterion, or None if the pair is unresolved.
+PairDecision = collections.namedtuple(
+    "PairDecision", ["games", "win_rate", "win_rate_bounds", "coin_margin", "coin_margin_bounds", "better"])
+
+
+def get_pair_decision(results, a, b, delta, criterion="win_rate", min_games=20):
+    """
+    Decide which of two bots is better with confidence bounds that hold for all numbers of games at once, so the
+    decision can be checked after every game without inflating the error probability. The error probability delta is
+    spread over the numbers of games n as delta * 6 / (pi^2 n^2). The bound of the win rate is Hoeffding's, the bound
+    of the coin margin a normal approximation.
+    :param results: TournamentResults object.
+    :param a: Index of the first bot.
+    :param b: Index of the second bot.
+    :param delta: Probability that either bound doesn't hold.
+    :param criterion: "win_rate" to decide by the rate at which a bot finishes with more coins than the other, or
+        "coin_margin" to decide by the mean difference of their coins.
+    :param min_games: Minimum number of games before a decision is made.
+    :return: PairDecision.
+    """
+    if criterion not in CRITERIA:
+        raise ValueError("Unknown decision criterion {}, must be one of {}".format(criterion, CRITERIA))
+    n = int(results.pair_games[a, b])
+    if n == 0:
+        return PairDecision(0, None, (0.0, 1.0), None, (-math.inf, math.inf), None)
+    delta_n = delta * 6 / (math.pi ** 2 * n ** 2)
+    win_rate = float(results.pair_wins[a, b]) / n
+    width = math.sqrt(math.log(2 / delta_n) / (2 * n))
+    win_rate_bounds = (max(0.0, win_rate - width), min(1.0, win_rate + width))
+    coin_margin = float(results.pair_margins[a, b]) / n
+    if n > 1:
+        variance = max(0.0, (results.pair_margin_squares[a, b] - n * coin_margin ** 2) / (n - 1))
+        width = statistics.NormalDist().inv_cdf(1 - delta_n / 2) * math.sqrt(variance / n)
+    else:
+        width = math.inf
+    coin_margin_bounds = (coin_margin - width, coin_margin + width)
+
+    lower, upper, null = win_rate_bounds + (0.5,) if criterion == "win_rate" else coin_margin_bounds + (0.0,)
+    better = None
+    if n >= min_games and lower > null:
+        better = a
+    elif n >= min_games and upper < null:
+        better = b
+    return PairDecision(n, win_rate, win_rate_bounds, coin_margin, coin_margin_bounds, better)
+
+
+def run_adaptive_tournament(players, confidence=0.95, criterion="win_rate", games_per_batch=10, min_games=20,
+                            max_games=10000, workers=1, seed=None, chunk_size=100, k_factor=16.0, game_rng=False,
+                            verbose=False):
+    """
+    Play two player games between all pairs of bots until it is decided which bot of every pair is better. Games are
+    played in batches, and every batch only goes to the pairs that are still unresolved, see get_pair_decision().
+    Lopsided pairs are decided after a few dozen games, so most games are spent on close pairs.
+    :param players: List of bot classes inheriting PlayerInterface, each entered once.
+    :param confidence: Probability that all decisions together are correct. It is split evenly between the pairs.
+    :param criterion: See get_pair_decision().
+    :param games_per_batch: Number of games of each seat order of a pair in a batch.
+    :param min_games: See get_pair_decision().
+    :param max_games: Number of games after which a pair is no longer played, even if it is unresolved. The last batch
+        may exceed it.
+    :param workers: See run_tournament().
+    :param seed: See run_tournament().
+    :param chunk_size: See run_tournament().
+    :param k_factor: See TournamentResults.
+    :param game_rng: See run_tournament().
+    :param verbose: If True, print the progress.
+    :return: Tuple (results, decisions): the TournamentResults object and a dictionary mapping the pairs (a, b) of bot
+        indices to their PairDecision.
+    """
+    if seed is None:
+        seed = random.SystemRandom().randrange(2 ** 32)
+        print("Using seed {}".format(seed))
+    pairs = round_robin_lineups(len(players), 2)
+    delta = (1 - confidence) / len(pairs)
+
+    results = TournamentResults([player.__name__ for player in players], k_factor=k_factor)
+    play_chunk = functools.partial(play_matchups, players, seed, game_rng=game_rng)
+    with contextlib.ExitStack() as stack:
+        executor = None
+        if workers > 1:
+            executor = stack.enter_context(concurrent.futures.ProcessPoolExecutor(max_workers=workers))
+        while True:
+            decisions = {
+                pair: get_pair_decision(results, pair[0], pair[1], delta, criterion=criterion, min_games=min_games)
+                for pair in pairs}
+            open_pairs = [
+                pair for pair in pairs if decisions[pair].better is None and decisions[pair].games < max_games]
+            if len(open_pairs) == 0:
+                break
+            matchups = schedule(open_pairs, games_per_batch, first_game_index=results.num_games)
+            for chunk_results in _play_chunks(play_chunk, _chunks(matchups, chunk_size), executor, workers):
+                for seats, coins in chunk_results:
+                    results.add_game(seats, coins)
+            if verbose:
+                print("Played {} games, {} of {} pairs unresolved".format(
+                    results.num_games, len(open_pairs), len(pairs)))
+    return results, decisions
+
+
+class PairedResults:
+    """
+    Running summary of a paired evaluation, see run_paired_evaluation(). For every deal, the coins of a candidate are
+    averaged over the seat orders.
+    """
+
+    def __init__(self, candidate_names):
+        """
+        :param candidate_names: List of the names of the candidate bots.
+        """
+        num_candidates = len(candidate_names)
+        self.candidate_names = list(candidate_names)
+        self.num_deals = 0
+        # Sums of the coins of each candidate per deal and of their squares
+        self.coins = np.zeros(num_candidates)
+        self.coin_squares = np.zeros(num_candidates)
+        # Sums of the coin differences of candidate i and candidate j in the same deal and of their squares
+        self.differences = np.zeros((num_candidates, num_candidates))
+        self.difference_squares = np.zeros((num_candidates, num_candidates))
+
+    def add_deal(self, deal_coins):
+        """
+        Add the games of one deal.
+        :param deal_coins: Array of shape (number of candidates, number of seat orders) of the final coins of each
+            candidate in each seat order.
+        :return:
+        """
+        coins = np.asarray(deal_coins, dtype=float).mean(axis=1)
+        differences = coins[:, np.newaxis] - coins[np.newaxis, :]
+        self.coins += coins
+        self.coin_squares += coins ** 2
+        self.differences += differences
+        self.difference_squares += differences ** 2
+        self.num_deals += 1
+
+    def comparisons(self):
+        """
+        Compare all pairs of candidates. The variance reduction is the ratio of the variance of the coin difference of
+        two candidates on independent deals to its variance on common deals, i.e. how many times more deals an unpaired
+        comparison needs for the same standard error.
+        :return: pandas DataFrame with one row per pair of candidates (a, b) with a < b and the columns candidate_a,
+            candidate_b, deals, mean_difference (coins of a minus coins of b), standard_error, unpaired_standard_error
+            and variance_reduction.
+        """
+        n = self.num_deals
+        with np.errstate(invalid="ignore", divide="ignore"):
+            coin_variances = (self.coin_squares - self.coins ** 2 / n) / (n - 1)
+            difference_variances = (self.difference_squares - self.differences ** 2 / n) / (n - 1)
+            rows = []
+            for a, b in itertools.combinations(range(len(self.candidate_names)), 2):
+                unpaired_variance = coin_variances[a] + coin_variances[b]
+                rows.append({
+                    "candidate_a": self.candidate_names[a], "candidate_b": self.candidate_names[b], "deals": n,
+                    "mean_difference": self.differences[a, b] / n,
+                    "standard_error": np.sqrt(max(0.0, difference_variances[a, b]) / n),
+                    "unpaired_standard_error": np.sqrt(max(0.0, unpaired_variance) / n),
+                    "variance_reduction": unpaired_variance / max(0.0, difference_variances[a, b])})
+        return pd.DataFrame(rows, columns=[
+            "candidate_a", "candidate_b", "deals", "mean_difference", "standard_error", "unpaired_standard_error",
+            "variance_reduction"])
+
+
+def play_paired_deals(candidates, opponents, master_seed, deal_indices):
+    """
+    Play deals of a paired evaluation. This is the unit of work of a worker process. All games of a deal replay the
+    same gamerng.RngTape, and the random module is reseeded the same way before each of them.
+    :param candidates: List of bot classes to compare.
+    :param opponents: List of bot classes filling the other seats.
+    :param master_seed: Integer seed of the evaluation.
+    :param deal_indices: Iterable of deal indices.
+    :return: List of arrays of shape (number of candidates, number of seat orders), see PairedResults.add_deal().
+    """
+    seatings = get_seatings(tuple(range(len(opponents) + 1)))
+    results = []
+    for deal_index in deal_indices:
+        tape = gamerng.RngTape(gamerng.GameRandom(master_seed, deal_index))
+        deal_coins = np.zeros((len(candidates), len(seatings)), dtype=np.int64)
+        for c, candidate in enumerate(candidates):
+            # Index 0 of a line-up is the candidate
+            lineup = [candidate] + list(opponents)
+            for s, seats in enumerate(seatings):
+                random.seed(rungame.get_game_seed(master_seed, deal_index))
+                _, gamestate = camelup.play_game([lineup[i] for i in seats], rng=tape.rewind())
+                deal_coins[c, s] = gamestate.player_money_values[seats.index(0)]
+        results.append(deal_coins)
+    return results
+
+
+def run_paired_evaluation(candidates, opponents, num_deals, workers=1, seed=None, chunk_size=10, verbose=False):
+    """
+    Compare bots on common random numbers. Every deal is a stream of starting positions, camels and dice, which is
+    replayed for every candidate in every rotation of the seat order against the same opponents. The comparison of two
+    candidates is then paired by deal, so that most of the dice luck cancels out.
+    :param candidates: List of bot classes inheriting PlayerInterface to compare.
+    :param opponents: List of bot classes filling the other seats of every game.
+    :param num_deals: Number of deals. Every deal is played len(candidates) * (len(opponents) + 1) times.
+    :param workers: See run_tournament().
+    :param seed: See run_tournament().
+    :param chunk_size: Number of deals assigned to a worker at a time.
+    :param verbose: If True, print the progress.
+    :return: PairedResults object.
+    """
+    if seed is None:
+        seed = random.SystemRandom().randrange(2 ** 32)
+        print("Using seed {}".format(seed))
+    results = PairedResults([candidate.__name__ for candidate in candidates])
+    play_chunk = functools.partial(play_paired_deals, candidates, opponents, seed)
+    with contextlib.ExitStack() as stack:
+        executor = None
+        if workers > 1:
+            executor = stack.enter_context(concurrent.futures.ProcessPoolExecutor(max_workers=workers))
+        chunks = [range(i, min(i + chunk_size, num_deals)) for i in range(0, num_deals, chunk_size)]
+        for chunk_results in _play_chunks(play_chunk, chunks, executor, workers):
+            for deal_coins in chunk_results:
+                results.add_deal(deal_coins)
+            if verbose:
+                print("Played {} deals out of {}".format(results.num_deals, num_deals))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play a tournament between bots and print ratings and win rates.")
+    parser.add_argument(
+        "players", nargs="+", metavar="PLAYER", help="PLAYER_J should be the name of a bot class in bots.py")
+    parser.add_argument("--players-per-game", type=int, default=2, help="Number of players of each game (default: 2)")
+    parser.add_argument(
+        "--games-per-seating", type=int, default=10,
+        help="Number of games of each seat order of a line-up (default: 10)")
+    parser.add_argument(
+        "--format", choices=FORMATS + ("adaptive", "paired"), default="round-robin",
+        help="Tournament format. adaptive plays two player games until every pair of bots is decided, in batches of "
+             "--games-per-seating games per seat order. paired compares the bots against --opponents on --deals common "
+             "deals.")
+    parser.add_argument("--swiss-rounds", type=int, default=5, help="Number of Swiss rounds (default: 5)")
+    parser.add_argument("--workers", type=int, default=1, help="Number of worker processes (default: 1)")
+    parser.add_argument("--seed", type=int, default=None, help="Master seed to reproduce a tournament")
+    parser.add_argument(
+        "--chunk-size", type=int, default=100, help="Number of games assigned to a worker at a time (default: 100)")
+    parser.add_argument("--k-factor", type=float, default=16.0, help="Elo K-factor (default: 16)")
+    parser.add_argument(
+        "--game-rng", action="store_true",
+        help="Draw camels and dice from a counter-based stream per game instead of the random module")
+    parser.add_argument(
+        "--confidence", type=float, default=0.95, help="Confidence of all adaptive decisions together (default: 0.95)")
+    parser.add_argument("--criterion", choices=CRITERIA, default="win_rate", help="Adaptive decision criterion")
+    parser.add_argument(
+        "--max-games", type=int, default=10000, help="Maximum number of games of a pair in adaptive mode")
+    parser.add_argument(
+        "--opponents", nargs="+", default=["RandomBot"], metavar="OPPONENT",
+        help="Bots filling the other seats in paired mode (default: RandomBot)")
+    parser.add_argument("--deals", type=int, default=1000, help="Number of deals in paired mode (default: 1000)")
+    args = parser.parse_args()
+    if args.format == "adaptive" and args.players_per_game != 2:
+        parser.error("--format adaptive only plays two player games, got --players-per-game {}".format(
+            args.players_per_game))
+
+    p = [getattr(bots, botname) for botname in args.players]
+    pair_decisions = None
+    if args.format == "paired":
+        paired_results = run_paired_evaluation(
+            p, [getattr(bots, botname) for botname in args.opponents], args.deals, workers=args.workers,
+            seed=args.seed, verbose=True)
+        with pd.option_context("display.width", 120, "display.max_columns", None):
+            print(paired_results.comparisons())
+        sys.exit(0)
+    if args.format == "adaptive":
+        tournament_results, pair_decisions = run_adaptive_tournament(
+            p, confidence=args.confidence, criterion=args.criterion, games_per_batch=args.games_per_seating,
+            max_games=args.max_games, workers=args.workers, seed=args.seed, chunk_size=args.chunk_size,
+            k_factor=args.k_factor, game_rng=args.game_rng, verbose=True)
+    else:
+        tournament_results = run_tournament(
+            p, players_per_game=args.players_per_game, games_per_seating=args.games_per_seating,
+            tournament_format=args.format, swiss_rounds=args.swiss_rounds, workers=args.workers, seed=args.seed,
+            chunk_size=args.chunk_size, k_factor=args.k_factor, game_rng=args.game_rng, verbose=True)
+    with pd.option_context("display.width", 120, "display.max_columns", None):
+        print(tournament_results.standings())
+        print()
+        print(tournament_results.seat_win_rates())
+        print()
+        print(tournament_results.head_to_head())
+        if pair_decisions is not None:
+            print()
+            for (a, b), decision in pair_decisions.items():
+                verdict = "undecided" if decision.better is None else "{} is better".format(p[decision.better].__name__)
+                print("{} vs {}: {} games, win rate {:.3f} [{:.3f}, {:.3f}], coin margin {:+.2f} [{:+.2f}, {:+.2f}], "
+                      "{}".format(
+                          p[a].__name__, p[b].__name__, decision.games, decision.win_rate, *decision.win_rate_bounds,
+                          decision.coin_margin, *decision.coin_margin_bounds, verdict))
@@ -0,0 +1,308 @@
+"""
+Zobrist hashing of game states and a transposition table.
+
+The hash of a game state is the XOR of one 64 bit key per feature of the state:
+    - the rules (board size, move range, number of camels and players, payouts),
+    - the board and stack location of every camel, and whether it has yet to move this round,
+    - every trap (location, type and owner),
+    - every bet: round bets and game bets are keyed by the camel, the position of the bet among the bets on that camel
+      (which decides the payout) and the player,
+    - the coins of every player, and whether the game is over.
+Positions reached through different move orders therefore get the same hash. Keys are derived from the features with
+blake2b rather than drawn at random, so hashes are identical across processes and runs and can be used to find the
+same position in different logged games.
+
+camelup.enable_position_hashing() attaches the hash to a game state as g.position_hash. The engine functions then
+update it incrementally, touching only the keys of the features they change. As with camelup.ValidMoveCache, the hash
+is only correct if the game state is changed exclusively through the engine functions (or gametree.apply_move() and
+undo_move()).
+
+Player views and player copies hash the obfuscated game bets, so the hash of another player's position reveals nothing
+about their secret bets.
+"""
+import collections
+import hashlib
+
+# Eviction policies of TranspositionTable
+EVICTION_POLICIES = ("lru", "depth")
+
+_keys = {}
+
+
+def get_key(*feature):
+    """
+    The key of a feature of a game state.
+    :param feature: Tuple of strings, integers and None describing the feature, e.g. ("trap", 5, -1, 2).
+    :return: 64 bit integer.
+    """
+    try:
+        return _keys[feature]
+    except KeyError:
+        key = int.from_bytes(hashlib.blake2b(repr(feature).encode(), digest_size=8).digest(), "little")
+        _keys[feature] = key
+        return key
+
+
+def rules_key(g):
+    """
+    :param g: GameState object.
+    :return: Key of the game constants.
+    """
+    return get_key(
+        "rules", g.BOARD_SIZE, tuple(g.MOVE_RANGE), g.NUM_CAMELS, g.NUM_PLAYERS, tuple(g.FIRST_PLACE_ROUND_PAYOUT),
+        tuple(g.SECOND_PLACE_ROUND_PAYOUT), g.THIRD_OR_WORSE_PLACE_ROUND_PAYOUT, tuple(g.GAME_END_PAYOUT),
+        g.BAD_GAME_END_BET)
+
+
+def camels_key(g):
+    """
+    :param g: GameState object.
+    :return: XOR of the keys of the locations of all camels.
+    """
+    h = 0
+    for camel_index, (board_loc, stack_loc) in enumerate(g.camel_locations()):
+        h ^= get_key("camel", camel_index, board_loc, stack_loc)
+    return h
+
+
+def stacks_key(g, board_locs):
+    """
+    :param g: GameState object.
+    :param board_locs: Iterable of distinct board locations.
+    :return: XOR of the keys of the locations of the camels on the given fields, i.e. the part of camels_key() that
+        changes when only these fields change.
+    """
+    h = 0
+    for board_loc in board_locs:
+        for stack_loc, camel_index in enumerate(g.stack_camels(board_loc)):
+            h ^= get_key("camel", camel_index, board_loc, stack_loc)
+    return h
+
+
+def camels_to_move_key(g):
+    """
+    :param g: GameState object.
+    :return: XOR of the keys of the camels that have yet to move this round.
+    """
+    h = 0
+    for camel_index, yet_to_move in enumerate(g.camel_yet_to_move):
+        if yet_to_move:
+            h ^= get_key("to_move", camel_index)
+    return h
+
+
+def trap_key(trap_location, trap_type, player):
+    return get_key("trap", trap_location, trap_type, player)
+
+
+def traps_key(g):
+    """
+    :param g: GameState object.
+    :return: XOR of the keys of all traps.
+    """
+    h = 0
+    for trap_location, entry in enumerate(g.trap_track):
+        if len(entry) > 0:
+            h ^= trap_key(trap_location, entry[0], entry[1])
+    return h
+
+
+def bets_key(bets, bet_type):
+    """
+    :param bets: List of [camel, player] entries, i.e. g.round_bets, g.game_winner_bets or g.game_loser_bets.
+    :param bet_type: "round", "win" or "lose".
+    :return: XOR of the keys of the bets.
+    """
+    h = 0
+    counts = collections.Counter()
+    for camel, player in bets:
+        h ^= get_key("bet", bet_type, camel, counts[camel], player)
+        counts[camel] += 1
+    return h
+
+
+def game_bets_key(g):
+    """
+    :param g: GameState object.
+    :return: XOR of the keys of the game winner and loser bets.
+    """
+    return bets_key(g.game_winner_bets, "win") ^ bets_key(g.game_loser_bets, "lose")
+
+
+def coins_key(g, players=None):
+    """
+    :param g: GameState object.
+    :param players: Iterable of distinct player IDs, or None for all players.
+    :return: XOR of the keys of the coins of the players.
+    """
+    if players is None:
+        players = range(g.NUM_PLAYERS)
+    h = 0
+    for player in players:
+        h ^= get_key("coins", player, g.player_money_values[player])
+    return h
+
+
+def game_over_key(g):
+    return 0 if g.active_game else get_key("game_over")
+
+
+def compute_hash(g):
+    """
+    Compute the hash of a game state from scratch.
+    :param g: GameState object.
+    :return: 64 bit integer.
+    """
+    return (
+        rules_key(g) ^ camels_key(g) ^ camels_to_move_key(g) ^ traps_key(g) ^ bets_key(g.round_bets, "round") ^
+        game_bets_key(g) ^ coins_key(g) ^ game_over_key(g))
+
+
+def board_hash(g):
+    """
+    The hash of the part of a game state that is recorded in the game logs: camels, traps and coins.
+    :param g: GameState object.
+    :return: 64 bit integer, equal to hash_summary() of the log row of the game state.
+    """
+    return camels_key(g) ^ traps_key(g) ^ coins_key(g)
+
+
+def hash_summary(summary):
+    """
+    Hash a row of a game log or the return value of camelup.summarize_game_state(), e.g. to find positions that occur
+    in several logged games. Missing values (None or NaN) are skipped.
+    :param summary: Dictionary (or pandas.Series) with the columns camel_<camel>_location,
+        camel_<camel>_stack_location, player_<i>_trap_location, player_<i>_trap_type and player_<i>_coins.
+    :return: 64 bit integer, see board_hash().
+    """
+    def value(column):
+        v = summary.get(column)
+        return None if v is None or v != v else int(v)
+
+    h = 0
+    for column in summary.keys():
+        parts = column.split("_")
+        if parts[0] == "camel" and parts[-1] == "location" and parts[-2] != "stack":
+            camel = column[len("camel_"):-len("_location")]
+            board_loc, stack_loc = value(column), value("camel_{}_stack_location".format(camel))
+            if board_loc is not None:
+                h ^= get_key("camel", int(camel.split("_")[-1]), board_loc, stack_loc)
+        elif parts[0] == "player" and parts[-1] == "coins":
+            coins = value(column)
+            if coins is not None:
+                h ^= get_key("coins", int(parts[1]), coins)
+        elif parts[0] == "player" and parts[-2:] == ["trap", "location"]:
+            trap_location = value(column)
+            if trap_location is not None:
+                h ^= trap_key(trap_location, value("player_{}_trap_type".format(parts[1])), int(parts[1]))
+    return h
+
+
+def hide_game_bets_key(g, cp):
+    """
+    The change of the hash when the game bets of a game state are obfuscated for a player.
+    :param g: GameState object.
+    :param cp: Player copy or player view of g.
+    :return: Integer to XOR into the hash of g.
+    """
+    return game_bets_key(g) ^ game_bets_key(cp)
+
+
+class TranspositionTable:
+    """
+    A bounded map from position hashes (or any other hashable keys) to values, e.g. evaluations of positions, that
+    search-based bots and the probability calculators can share.
+
+    When the table is full, storing a new position evicts
+        - "lru": the least recently used entry,
+        - "depth": the entry in the same slot (slots are chosen by key modulo size) unless it was searched deeper than
+          the new one. Each slot holds a single entry, so the table can drop entries before it is full.
+    """
+
+    def __init__(self, max_entries=2 ** 16, eviction="lru"):
+        """
+        :param max_entries: Maximum number of entries.
+        :param eviction: "lru" or "depth", see above.
+        """
+        if eviction not in EVICTION_POLICIES:
+            raise ValueError("Unknown eviction policy {}, must be one of {}".format(eviction, EVICTION_POLICIES))
+        self.max_entries = max_entries
+        self.eviction = eviction
+        self.hits = 0
+        self.misses = 0
+        self.clear()
+
+    def clear(self):
+        if self.eviction == "lru":
+            self.entries = collections.OrderedDict()  # key -> (value, depth)
+        else:
+            self.entries = [None] * self.max_entries  # slot -> (key, value, depth)
+        self.num_entries = 0
+
+    def __len__(self):
+        return self.num_entries
+
+    def __contains__(self, key):
+        return self.lookup(key, count=False) is not None
+
+    def lookup(self, key, min_depth=0, count=True):
+        """
+        :param key: Hashable key, e.g. g.position_hash.
+        :param min_depth: Entries stored with a smaller depth are treated as missing.
+        :param count: Whether to count the lookup as hit or miss.
+        :return: Tuple (value, depth), or None if there is no entry.
+        """
+        if self.eviction == "lru":
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+        else:
+            entry = self.entries[hash(key) % self.max_entries]
+            entry = entry[1:] if entry is not None and entry[0] == key else None
+        if entry is not None and entry[1] < min_depth:
+            entry = None
+        if count:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return entry
+
+    def get(self, key, default=None, min_depth=0):
+        """
+        :param key: Hashable key, e.g. g.position_hash.
+        :param default: Returned if there is no entry.
+        :param min_depth: Entries stored with a smaller depth are treated as missing.
+        :return: The stored value.
+        """
+        entry = self.lookup(key, min_depth)
+        return default if entry is None else entry[0]
+
+    def store(self, key, value, depth=0):
+        """
+        Store a value, evicting an entry if necessary (see the class documentation).
+        :param key: Hashable key, e.g. g.position_hash.
+        :param value: Any value.
+        :param depth: Depth of the search the value is based on. With the "depth" policy, deeper entries are kept in
+            favour of shallower ones.
+        :return: True if the value was stored.
+        """
+        if self.eviction == "lru":
+            if key in self.entries:
+                self.entries.move_to_end(key)
+            else:
+                if self.num_entries >= self.max_entries:
+                    self.entries.popitem(last=False)
+                else:
+                    self.num_entries += 1
+            self.entries[key] = (value, depth)
+            return True
+
+        slot = hash(key) % self.max_entries
+        entry = self.entries[slot]
+        if entry is not None and entry[0] != key and entry[2] > depth:
+            return False
+        if entry is None:
+            self.num_entries += 1
+        self.entries[slot] = (key, value, depth)
+        return True